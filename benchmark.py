@@ -0,0 +1,85 @@
+"""
+Сравнение производительности поэлементного и векторизованного скрещивания групп родителей
+"""
+import time
+import argparse
+import numpy as np
+
+from survey_route_generation.genetic.genetic_optimal_route_finder import GeneticOptimalRouteFinder
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Сравнение способов скрещивания групп родителей.")
+    parser.add_argument("--genes", type=int, nargs="+", default=[32, 128, 512], help="Длины генотипов.")
+    parser.add_argument("--groups", type=int, default=64, help="Количество групп родителей.")
+    parser.add_argument("--parents", type=int, default=2, help="Количество родителей в группе.")
+    parser.add_argument("--repeats", type=int, default=10, help="Количество повторов замера.")
+    parser.add_argument("--seed", type=int, default=0, help="Начальное значение генератора случайных чисел.")
+
+    return parser.parse_args()
+
+
+def make_route_finder(genes_count, crossing_type):
+    """
+    Создать поисковик маршрута, готовый к скрещиванию генотипов заданной длины.
+    """
+    # Корректировка генотипов требует матрицы расстояний и в замер не входит.
+    route_finder = GeneticOptimalRouteFinder(None, repair_route_genotypes=False, crossing_type=crossing_type)
+    route_finder.route_points = np.zeros((genes_count, 2))
+
+    return route_finder
+
+
+def gen_route_groups(groups_count, parents_count, genes_count):
+    """
+    Сгенерировать тензор групп случайных генотипов.
+    """
+    return np.argsort(np.random.random((groups_count, parents_count, genes_count)), axis=2)
+
+
+def measure(func, repeats):
+    """
+    Замерить наименьшее время выполнения функции.
+    """
+    best_time = None
+    result = None
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        result = func()
+        spent_time = time.perf_counter() - start_time
+        if best_time is None or spent_time < best_time:
+            best_time = spent_time
+
+    return best_time, result
+
+
+def main():
+    args = parse_args()
+    np.random.seed(args.seed)
+
+    print("genes\tloop, s\tbatch, s\tspeedup\torder, s\tequal")
+    for genes_count in args.genes:
+        route_groups = gen_route_groups(args.groups, args.parents, genes_count)
+
+        route_finder = make_route_finder(genes_count, "first_unused")
+        loop_time, loop_children = measure(
+            lambda: np.array([route_finder._cross_routes(route_group) for route_group in route_groups]),
+            args.repeats
+        )
+        batch_time, batch_children = measure(lambda: route_finder._cross_route_groups(route_groups), args.repeats)
+
+        order_route_finder = make_route_finder(genes_count, "order")
+        order_time, _ = measure(lambda: order_route_finder._cross_route_groups(route_groups), args.repeats)
+
+        print(
+            str(genes_count) +
+            "\t" + "{:.6f}".format(loop_time) +
+            "\t" + "{:.6f}".format(batch_time) +
+            "\t" + "{:.1f}".format(loop_time / batch_time) +
+            "\t" + "{:.6f}".format(order_time) +
+            "\t" + str(np.array_equal(loop_children, batch_children))
+        )
+
+
+if __name__ == "__main__":
+    main()
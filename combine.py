@@ -1,6 +1,7 @@
 """
 Комбинирование разных параметров генерации маршрута в целях поиска оптимальных и исследования их зависимостей.
 """
+import argparse
 import numpy as np
 
 from config import settings
@@ -10,16 +11,87 @@ from survey_route_generation.data.mission_settings import MissionSettings
 from survey_route_generation.data.vehicle_data import VehicleData
 from survey_route_generation.factories.route_generator_factory import RouteGeneratorFactory
 from survey_route_generation.combinator.combinator import Combinator
+from survey_route_generation.combinator.successive_halving_combinator import SuccessiveHalvingCombinator
+from survey_route_generation.combinator.combinations_journal import CombinationsJournal
+from survey_route_generation.combinator.results_ledger import ResultsLedger
+from survey_route_generation.combinator.distributed_combinator import (
+    DistributedCombinator,
+    run_combinations_worker,
+    parse_address
+)
+from survey_route_generation.scaffolding.generator_factory import tune_generator_factory
 from survey_route_generation.scaffolding.dirs import DATA_DIR
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Комбинирование параметров генерации маршрута.")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Продолжить полный перебор по журналу, пропустив обработанные комбинации."
+    )
+    parser.add_argument(
+        "--journal",
+        help="Файл журнала обработанных комбинаций полного перебора; "
+             "по умолчанию combinations_journal.jsonl в директории данных."
+    )
+    parser.add_argument(
+        "--ledger",
+        default=DATA_DIR + "\\combinations_ledger.npz",
+        help="Файл колоночного журнала итогов всех комбинаций полного перебора или завершённых кандидатов отсева."
+    )
+    parser.add_argument(
+        "--serve",
+        metavar="HOST:PORT",
+        help="Раздавать комбинации полного перебора подключившимся исполнителям по заданному адресу."
+    )
+    parser.add_argument(
+        "--connect",
+        metavar="HOST:PORT",
+        help="Работать исполнителем: обрабатывать комбинации координатора по заданному адресу."
+    )
+    parser.add_argument(
+        "--authkey",
+        help="Ключ аутентификации исполнителей координатора. Обязателен для исполнителя; "
+             "координатор без него создаёт случайный ключ и выводит его в консоль."
+    )
+
+    args = parser.parse_args()
+    if args.connect and not args.authkey:
+        parser.error("для работы исполнителем необходим ключ аутентификации координатора: --authkey")
+
+    # Последовательный отсев не ведёт журнал комбинаций и не распределяется между исполнителями
+    if settings.get("combinator_type", "grid") == "successive_halving" and not args.connect:
+        for option, is_set in [("--resume", args.resume), ("--journal", args.journal), ("--serve", args.serve)]:
+            if is_set:
+                parser.error(option + " не поддерживается последовательным отсевом (combinator_type: successive_halving)")
+
+    if args.journal is None:
+        args.journal = DATA_DIR + "\\combinations_journal.jsonl"
+
+    return args
+
+
 def main():
+    args = parse_args()
+
+    # Исполнитель получает фабрику, данные миссии и комбинации от координатора
+    if args.connect:
+        run_combinations_worker(
+            parse_address(args.connect),
+            args.authkey.encode(),
+            heartbeat_interval=settings.get("distributed_heartbeat_interval", 5)
+        )
+        return
+
     data_keeper = DataKeeper(DATA_DIR)
 
     generator_factory = RouteGeneratorFactory()
 
-    generator_factory.max_lifecycles = settings.max_lifecycles
-    generator_factory.mutation_swap_type = settings.mutation_swap_type
+    # Настраиваем фабрику генераторов маршрута с помощью файла настроек;
+    # перебираемые параметры задаются комбинатором для каждой комбинации
+    tune_generator_factory(generator_factory)
+
     generator_factory.data_keep_func = data_keeper.keep
 
     # Диапазоны параметров для комбинации
@@ -35,19 +107,65 @@ def main():
     # Координаты точек зоны обследования
     survey_area_points = np.array(settings.survey_area_points)
 
-    # Создаём экземпляр комбинатора параметров
-    combinator = Combinator(
-        generator_factory,
-        params_ranges,
-        vehicle_data,
-        mission_settings,
-        survey_area_points,
-        data_keeper,
-        11
-    )
+    # Создаём экземпляр комбинатора параметров: полный перебор (grid) или последовательный отсев (successive_halving)
+    if settings.get("combinator_type", "grid") == "successive_halving":
+        combinator = SuccessiveHalvingCombinator(
+            generator_factory,
+            params_ranges,
+            vehicle_data,
+            mission_settings,
+            survey_area_points,
+            data_keeper,
+            11,
+            # Бюджет кандидатов на первом этапе отсева, жизненные циклы
+            min_lifecycles=settings.get("successive_halving_min_lifecycles", 4),
+            # Во сколько раз на каждом этапе уменьшается количество кандидатов и увеличивается их бюджет
+            reduction_factor=settings.get("successive_halving_reduction_factor", 3),
+            # Количество случайно выбранных кандидатов; null - все комбинации диапазонов
+            samples_count=settings.get("successive_halving_samples_count", None),
+            # Колоночный журнал итогов завершённых кандидатов для анализа
+            ledger=ResultsLedger(args.ledger)
+        )
+    elif args.serve:
+        combinator = DistributedCombinator(
+            generator_factory,
+            params_ranges,
+            vehicle_data,
+            mission_settings,
+            survey_area_points,
+            data_keeper,
+            11,
+            CombinationsJournal(args.journal),
+            ResultsLedger(args.ledger),
+            address=parse_address(args.serve),
+            authkey=args.authkey.encode() if args.authkey else None,
+            # Интервал сигналов присутствия исполнителей, с
+            heartbeat_interval=settings.get("distributed_heartbeat_interval", 5),
+            # Время без сигналов, после которого комбинации исполнителя возвращаются в очередь, с
+            heartbeat_timeout=settings.get("distributed_heartbeat_timeout", 30)
+        )
+    else:
+        combinator = Combinator(
+            generator_factory,
+            params_ranges,
+            vehicle_data,
+            mission_settings,
+            survey_area_points,
+            data_keeper,
+            11,
+            # Количество процессов перебора комбинаций; 0 - последовательный перебор
+            settings.get("combinator_workers_count", 0),
+            # Журнал обработанных комбинаций для продолжения прерванного перебора
+            CombinationsJournal(args.journal),
+            # Колоночный журнал итогов всех комбинаций для анализа
+            ResultsLedger(args.ledger)
+        )
 
     # Комбинируем параметры относительно поиска оптимальных маршрутов
-    combinator.combine()
+    if isinstance(combinator, SuccessiveHalvingCombinator):
+        combinator.combine()
+    else:
+        combinator.combine(args.resume)
 
     # Сохраняем топ результатов
     combinator.save()
@@ -0,0 +1,73 @@
+"""
+Журнал обработанных комбинаций параметров: по строке JSON на комбинацию, дописываемой по мере перебора.
+Для комбинаций из списка лучших в записи указан файл их спота данных,
+что позволяет восстановить список при продолжении перебора.
+"""
+import os
+import json
+
+
+class CombinationsJournal:
+    def __init__(self, filename):
+        """
+        :param filename: Файл журнала.
+        """
+        self.filename = filename
+
+        self.entries_count = 0
+
+        self._file = None
+
+    @staticmethod
+    def gen_combination_key(combination):
+        """
+        Сформировать ключ комбинации параметров, не зависящий от порядка параметров.
+        """
+        return json.dumps(combination, sort_keys=True)
+
+    def read(self):
+        """
+        Прочитать записи журнала.
+        Недописанная при аварийном завершении строка пропускается.
+        """
+        entries = []
+        if not os.path.exists(self.filename):
+            return entries
+
+        with open(self.filename, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+
+        return entries
+
+    def open(self, resume=False):
+        """
+        Открыть журнал для записи.
+
+        :param resume: Дописывать существующий журнал, иначе начать новый.
+        """
+        journal_dir = os.path.dirname(self.filename)
+        if journal_dir:
+            os.makedirs(journal_dir, exist_ok=True)
+
+        self.entries_count = len(self.read()) if resume else 0
+        self._file = open(self.filename, "a" if resume else "w", encoding="utf-8")
+
+    def write(self, entry):
+        """
+        Дописать запись в журнал, сразу передав её в файл.
+        """
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        self.entries_count += 1
+
+    def close(self):
+        """
+        Закрыть журнал.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -1,12 +1,134 @@
 """
 Перебор всех комбинаций заданных параметров с сохранением нескольких наилучших.
+Комбинации обрабатываются последовательно или в пуле процессов, где у каждого процесса
+своя фабрика генераторов и свой хранитель данных, а лучшие результаты собираются в управляющем процессе.
+В памяти хранятся только краткие итоги лучших комбинаций, их споты данных сохраняются на диск.
 """
+import os
 import sys
+import copy
 import time
+import heapq
+import random
 import signal
+import hashlib
+import itertools
+import multiprocessing
+import numpy as np
 
 from survey_route_generation.console.console import cls
+from survey_route_generation.data.data_keeper import DataKeeper
 from survey_route_generation.scaffolding.geojson import save_result
+from survey_route_generation.survey_problem import SurveyProblem
+
+# Перебираемые параметры фабрики генераторов в порядке вложенности перебора.
+COMBINATION_PARAMS = [
+    "population_size",
+    "selection_rate",
+    "parents_count",
+    "mutants_rate",
+    "parents_choice_type",
+    "parents_similarity_type",
+    "mutation_swap_value",
+    "route_distance_weight",
+    "route_turns_angle_weight",
+    "route_self_intersection_weight",
+    "repair_route_genotypes"
+]
+
+# Состояние процесса пула: фабрика, хранитель данных, задача и порог попадания в список лучших.
+_worker_factory = None
+_worker_data_keeper = None
+_worker_survey_problem = None
+_worker_top_threshold = None
+
+
+def calc_route_digest(route):
+    """
+    Вычислить дайджест маршрута для обнаружения повторяющихся маршрутов.
+    """
+    return hashlib.blake2b(np.ascontiguousarray(route).tobytes(), digest_size=16).hexdigest()
+
+
+def summarize_result(combination, route_result, elapsed_time=None):
+    """
+    Сформировать краткий итог обработки комбинации параметров.
+    """
+    return {
+        "combination": combination,
+        "route_fitness": float(route_result["route_fitness"]),
+        "route_hash": int(route_result["route_hash"]),
+        "route_digest": calc_route_digest(route_result["route"]),
+        "stop_reason": route_result["stop_reason"],
+        "elapsed_time": elapsed_time,
+        "data_spot_file": None
+    }
+
+
+def _init_combination_worker(factory, save_dir, survey_problem, top_threshold):
+    """
+    Подготовить процесс пула к обработке комбинаций.
+    Прерывание обрабатывает управляющий процесс, процессы пула его игнорируют.
+    """
+    global _worker_factory, _worker_data_keeper, _worker_survey_problem, _worker_top_threshold
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    _worker_data_keeper = DataKeeper(save_dir)
+    _worker_factory = factory
+    _worker_factory.data_keep_func = _worker_data_keeper.keep
+    _worker_survey_problem = survey_problem
+    _worker_top_threshold = top_threshold
+
+
+def solve_combination(factory, data_keeper, survey_problem, combination, seed, top_threshold):
+    """
+    Составить маршрут по комбинации параметров и вернуть её итог.
+    Спот данных возвращается, только если результат может попасть в список лучших.
+
+    :param factory: Фабрика генераторов, передающая данные в хранитель данных.
+    :param data_keeper: Хранитель данных.
+    :param survey_problem: Подготовленная задача обследования зоны.
+    :param combination: Комбинация параметров.
+    :param seed: Зерно генератора случайных чисел.
+    :param top_threshold: Порог попадания в список лучших.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+
+    for param_name, param_value in combination.items():
+        setattr(factory, param_name, param_value)
+
+    generator = factory.make()
+
+    start_time = time.time()
+    route_result = generator.solve(survey_problem)
+    data_keeper.keep(route_result, "result_obtaining")
+    elapsed_time = time.time() - start_time
+
+    data_spot = None
+    if route_result["route_fitness"] > top_threshold:
+        data_spot = data_keeper.data_spot.copy()
+    data_keeper.clear_spot()
+
+    return summarize_result(combination, route_result, elapsed_time), data_spot
+
+
+def _handle_worker_combination(task):
+    """
+    Обработать комбинацию параметров в процессе пула и вернуть её итог.
+    """
+    combination, seed = task
+
+    return solve_combination(
+        _worker_factory,
+        _worker_data_keeper,
+        _worker_survey_problem,
+        combination,
+        seed,
+        _worker_top_threshold.value
+    )
 
 
 class Combinator:
@@ -18,7 +140,11 @@ class Combinator:
             mission_settings,
             survey_area_points,
             data_keeper,
-            top_size=11
+            top_size=11,
+            workers_count=0,
+            journal=None,
+            ledger=None,
+            spots_dir=None
     ):
         """
         Инициализировать параметры для перебора.
@@ -29,6 +155,11 @@ class Combinator:
         :param survey_area_points: Данные зоны обследования.
         :param data_keeper: Хранитель данных.
         :param top_size: Размер выборки наилучших слепков данных.
+        :param workers_count: Количество процессов перебора; 0 - последовательный перебор.
+        :param journal: Журнал обработанных комбинаций; None - без журнала.
+        :param ledger: Колоночный журнал итогов всех комбинаций; None - без него.
+        :param spots_dir: Собственная директория спотов данных лучших комбинаций перебора; None - поддиректория
+         top_spots директории хранителя данных: по журналу, если он задан, иначе новая для каждого перебора.
         """
         self.factory = factory
         self.params_ranges = params_ranges
@@ -37,14 +168,41 @@ class Combinator:
         self.survey_area_points = survey_area_points
         self.data_keeper = data_keeper
         self.top_size = top_size
+        self.workers_count = workers_count
+        self.journal = journal
+        self.ledger = ledger
+        self.spots_dir = spots_dir if spots_dir is not None else self._gen_spots_dir()
 
         self.combination_counter = 0
         self.time_behind = 0
-        self.top_data_spots = []
+        self.survey_problem = None
+
+        # Куча итогов лучших комбинаций с наихудшим в вершине и дайджесты их маршрутов
+        self._top_heap = []
+        self._top_route_digests = set()
+        self._top_sequence = 0
+        self._spilled_spots_counter = 0
+
+        self._top_threshold = None
+        self._journaled_combinations = set()
 
         self._calc_combinations_amount()
         self._subscribe_signals()
 
+    def _gen_spots_dir(self):
+        """
+        Сформировать директорию спотов данных перебора. Перебор с журналом получает директорию по файлу журнала,
+        чтобы при продолжении найти свои споты; перебор без журнала - новую директорию.
+        Споты разных переборов в общей директории хранителя данных не пересекаются.
+        """
+        if self.journal is not None:
+            journal_filename = os.path.abspath(self.journal.filename)
+            run_name = "journal_" + hashlib.blake2b(journal_filename.encode(), digest_size=8).hexdigest()
+        else:
+            run_name = "run_" + str(time.time_ns()) + "_" + str(os.getpid())
+
+        return os.path.join(self.data_keeper.save_dir, "top_spots", run_name)
+
     def _subscribe_signals(self):
         """
         Подписываем обработчик на сигналы завершения.
@@ -60,40 +218,85 @@ class Combinator:
         self.save()
         sys.exit(0)
 
-    def _insert_data_spot(self):
+    def _spill_data_spot(self, data_spot):
         """
-        Вставить спот данных в отсортированный список.
+        Сохранить спот данных на диск и вернуть имя его файла.
         """
-        insert_index = None
-        for data_spot_index in range(len(self.top_data_spots) - 2, -1, -1):
-            if (
-                    self.top_data_spots[data_spot_index]["route_result"]["route_fitness"]
-                    < self.data_keeper.data_spot["route_result"]["route_fitness"]
-            ):
-                insert_index = data_spot_index
-                if data_spot_index > 0:
-                    self.top_data_spots[data_spot_index] = self.top_data_spots[data_spot_index - 1]
-            else:
-                break
-        if insert_index is not None:
-            self.top_data_spots[insert_index] = self.data_keeper.data_spot.copy()
+        os.makedirs(self.spots_dir, exist_ok=True)
+
+        data_spot_file = os.path.join(
+            self.spots_dir,
+            "spot_" + str(time.time_ns()) + "_" + str(self._spilled_spots_counter) + ".npy"
+        )
+        self._spilled_spots_counter += 1
+        np.save(data_spot_file, data_spot)
+
+        return data_spot_file
 
-    def _append_data_spot(self):
+    @staticmethod
+    def _remove_data_spot_file(data_spot_file):
         """
-        Добавить спот данных в список лучших и поддержать
+        Удалить файл спота данных, вытесненного из списка лучших.
+        """
+        if os.path.exists(data_spot_file):
+            os.remove(data_spot_file)
+
+    def _remove_orphan_spot_files(self):
+        """
+        Удалить из директории спотов перебора файлы, не входящие в список лучших: оставшиеся от прежнего
+        перебора с тем же журналом или сохранённые перед аварийным завершением, но не записанные в журнал.
+        """
+        if not os.path.isdir(self.spots_dir):
+            return
+
+        top_spot_files = {os.path.abspath(summary["data_spot_file"]) for _fitness, _sequence, summary in self._top_heap}
+        for filename in os.listdir(self.spots_dir):
+            data_spot_file = os.path.abspath(os.path.join(self.spots_dir, filename))
+            if filename.startswith("spot_") and filename.endswith(".npy") and data_spot_file not in top_spot_files:
+                os.remove(data_spot_file)
+
+    def _qualifies_for_top(self, summary):
         """
-        self.top_data_spots.append(self.data_keeper.data_spot.copy())
-        self.top_data_spots.sort(key=lambda data_spot: data_spot["route_result"]["route_fitness"], reverse=True)
+        Проверить, попадает ли итог в список лучших: маршрут новый и лучше наихудшего в заполненном списке.
+        """
+        if summary["route_digest"] in self._top_route_digests:
+            return False
+
+        return len(self._top_heap) < self.top_size or summary["route_fitness"] > self._top_heap[0][0]
+
+    def _push_top_result(self, summary):
+        """
+        Поместить итог в кучу лучших, вытеснив наихудший итог из заполненной кучи.
+        """
+        top_entry = (summary["route_fitness"], self._top_sequence, summary)
+        self._top_sequence += 1
+
+        if len(self._top_heap) < self.top_size:
+            heapq.heappush(self._top_heap, top_entry)
+        else:
+            _fitness, _sequence, evicted_summary = heapq.heapreplace(self._top_heap, top_entry)
+            self._top_route_digests.discard(evicted_summary["route_digest"])
+            self._remove_data_spot_file(evicted_summary["data_spot_file"])
+
+        self._top_route_digests.add(summary["route_digest"])
+
+    def _merge_result(self, summary, data_spot):
+        """
+        Учесть итог комбинации в списке лучших, сохранив на диск спот данных попавшего в него итога.
+        """
+        if data_spot is None or not self._qualifies_for_top(summary):
+            return
+
+        summary["data_spot_file"] = self._spill_data_spot(data_spot)
+        self._push_top_result(summary)
 
-    def _current_spots_have_route(self, route_hash):
+    def get_top_results(self):
         """
-        Проверить, есть ли текущий спот данных в списке сохранённых.
+        Получить итоги лучших комбинаций в порядке убывания приспособленности.
         """
-        for data_spot in self.top_data_spots:
-            if data_spot["route_result"]["route_hash"] == route_hash:
-                return True
+        top_entries = sorted(self._top_heap, key=lambda top_entry: top_entry[:2], reverse=True)
 
-        return False
+        return [summary for _fitness, _sequence, summary in top_entries]
 
     def _calc_combinations_amount(self):
         """
@@ -104,31 +307,58 @@ class Combinator:
         for param_range in self.params_ranges.values():
             self.combinations_amount *= len(param_range)
 
-    def _calc_elapsed_time(self):
-        """
-        Посчитать затраченное время последней обработки комбинации.
-        """
-        self.elapsed_time = time.time() - self.combination_start_time
-
     def _calc_time_behind(self):
         """
         Посчитать время работы.
         """
         self.time_behind += self.elapsed_time
 
-    def _analyze_result(self):
+    def _record_result(self, summary):
         """
-        Выполнить анализ результата применения параметров комбинации.
+        Записать итог комбинации в журнал обработанных комбинаций и в колоночный журнал итогов.
         """
-        self._calc_elapsed_time()
+        if self.journal is not None:
+            self.journal.write(summary)
+        if self.ledger is not None:
+            self.ledger.append(summary)
 
-        if self._current_spots_have_route(self.data_keeper.data_spot["route_result"]["route_hash"]):
+    def _restore_from_journal(self, resume):
+        """
+        Открыть журнал; при продолжении перебора восстановить по нему
+        обработанные комбинации, счётчики, журнал итогов и список лучших.
+        Файлы спотов данных перебора вне восстановленного списка лучших удаляются.
+        """
+        if self.journal is None:
             return
 
-        if len(self.top_data_spots) < self.top_size:
-            self._append_data_spot()
-        else:
-            self._insert_data_spot()
+        entries = self.journal.read() if resume else []
+        self.journal.open(resume)
+
+        self._journaled_combinations = {self.journal.gen_combination_key(entry["combination"]) for entry in entries}
+        self.combination_counter = len(entries)
+        self.time_behind = sum(entry["elapsed_time"] for entry in entries)
+
+        for entry in entries:
+            if self.ledger is not None:
+                self.ledger.append(entry)
+
+            if (
+                    entry["data_spot_file"] is not None
+                    and os.path.exists(entry["data_spot_file"])
+                    and self._qualifies_for_top(entry)
+            ):
+                self._push_top_result(entry)
+
+        self._remove_orphan_spot_files()
+
+    def _is_combination_journaled(self, combination):
+        """
+        Проверить, обработана ли комбинация до продолжения перебора.
+        """
+        return (
+            len(self._journaled_combinations) > 0
+            and self.journal.gen_combination_key(combination) in self._journaled_combinations
+        )
 
     def _inc_combination_counter(self):
         """
@@ -136,87 +366,152 @@ class Combinator:
         """
         self.combination_counter += 1
 
-    def _show_progress(self):
+    def _show_progress(self, combination):
         """
         Вывести прогресс в консоль.
+
+        :param combination: Последняя обработанная комбинация параметров.
         """
         percent = (self.combination_counter / self.combinations_amount) * 100
-        combination = [
-            self.factory.population_size,
-            self.factory.selection_rate,
-            self.factory.parents_count,
-            self.factory.mutants_rate,
-            self.factory.parents_choice_type,
-            self.factory.parents_similarity_type,
-            self.factory.mutation_swap_value,
-            self.factory.route_distance_weight,
-            self.factory.route_turns_angle_weight,
-            self.factory.route_self_intersection_weight,
-            self.factory.repair_route_genotypes
-        ]
 
         cls()
         print("Прошло времени: ", self.time_behind, "секунд")
         print(percent, "%", "[", self.combination_counter, "/", self.combinations_amount, "]")
-        print(combination)
+        print(list(combination.values()))
 
-    def _handle_combination(self):
+    def _gen_combinations(self):
         """
-        Обработать текущую комбинацию - применить параметры.
+        Перечислить комбинации параметров в порядке вложенного перебора.
         """
-        self._inc_combination_counter()
+        for params_values in itertools.product(*[self.params_ranges[name] for name in COMBINATION_PARAMS]):
+            yield dict(zip(COMBINATION_PARAMS, params_values))
 
-        self.generator = self.factory.make()
+    def _gen_combinations_tasks(self):
+        """
+        Перечислить задачи: комбинация и зерно генератора случайных чисел,
+        чтобы результат комбинации не зависел от способа перебора и распределения задач по процессам.
+        Зёрна выбираются до обработки первой комбинации, которая сама меняет состояние генератора.
+        """
+        seeds = np.random.randint(np.iinfo(np.int32).max, size=self.combinations_amount)
+        for combination, seed in zip(self._gen_combinations(), seeds):
+            if not self._is_combination_journaled(combination):
+                yield combination, int(seed)
 
-        self.combination_start_time = time.time()
-        self.route_result = self.generator.generate_route(
-            self.vehicle_data,
-            self.mission_settings,
-            self.survey_area_points
+    def _prepare_survey_problem(self):
+        """
+        Подготовить задачу обследования зоны, общую для всех комбинаций параметров.
+        """
+        self.survey_problem = SurveyProblem(self.vehicle_data, self.mission_settings, self.survey_area_points).prepare()
+
+    def _apply_combination(self, combination):
+        """
+        Применить параметры комбинации к фабрике генераторов.
+        """
+        for param_name, param_value in combination.items():
+            setattr(self.factory, param_name, param_value)
+
+    def _calc_top_threshold(self):
+        """
+        Вычислить порог попадания в список лучших: наихудшую приспособленность в заполненном списке.
+        """
+        if len(self._top_heap) >= self.top_size:
+            return self._top_heap[0][0]
+
+        return -np.inf
+
+    def _handle_combination(self, combination, seed):
+        """
+        Обработать текущую комбинацию с заданным зерном генератора случайных чисел.
+        """
+        self._inc_combination_counter()
+
+        summary, data_spot = solve_combination(
+            self.factory,
+            self.data_keeper,
+            self.survey_problem,
+            combination,
+            seed,
+            self._calc_top_threshold()
         )
-        self.data_keeper.keep(self.route_result, "result_obtaining")
+        self.elapsed_time = summary["elapsed_time"]
 
-        self._analyze_result()
-        self.data_keeper.clear_spot()
+        self._merge_result(summary, data_spot)
+        self._record_result(summary)
         self._calc_time_behind()
 
-    def combine(self):
+    def _update_top_threshold(self):
+        """
+        Обновить порог попадания в заполненный список лучших - наихудшую приспособленность в нём.
+        """
+        self._top_threshold.value = self._calc_top_threshold()
+
+    def _handle_worker_result(self, summary, data_spot):
+        """
+        Учесть итог комбинации, обработанной процессом пула.
+        """
+        self._inc_combination_counter()
+        self.time_behind = time.time() - self.combination_start_time
+
+        self._merge_result(summary, data_spot)
+        self._update_top_threshold()
+        self._record_result(summary)
+
+    def _combine_serially(self):
+        """
+        Перебрать комбинации параметров последовательно с теми же зёрнами, что и в пуле процессов.
+        """
+        for combination, seed in self._gen_combinations_tasks():
+            self._handle_combination(combination, seed)
+            self._show_progress(combination)
+
+    def _combine_in_parallel(self):
+        """
+        Перебрать комбинации параметров в пуле процессов, собирая лучшие результаты по мере готовности.
+        """
+        factory = copy.copy(self.factory)
+        factory.data_keep_func = None
+        self._top_threshold = multiprocessing.Value("d", -np.inf, lock=False)
+        self._update_top_threshold()
+
+        self.combination_start_time = time.time() - self.time_behind
+        with multiprocessing.Pool(
+                self.workers_count,
+                initializer=_init_combination_worker,
+                initargs=(factory, self.data_keeper.save_dir, self.survey_problem, self._top_threshold)
+        ) as pool:
+            for summary, data_spot in pool.imap_unordered(_handle_worker_combination, self._gen_combinations_tasks()):
+                self._handle_worker_result(summary, data_spot)
+                self._show_progress(summary["combination"])
+
+    def combine(self, resume=False):
         """
         Выполнить комбинацию параметров.
+
+        :param resume: Продолжить перебор по журналу, пропустив обработанные комбинации.
         """
-        for population_size in self.params_ranges["population_size"]:
-            self.factory.population_size = population_size
-            for selection_rate in self.params_ranges["selection_rate"]:
-                self.factory.selection_rate = selection_rate
-                for parents_count in self.params_ranges["parents_count"]:
-                    self.factory.parents_count = parents_count
-                    for mutants_rate in self.params_ranges["mutants_rate"]:
-                        self.factory.mutants_rate = mutants_rate
-                        for parents_choice_type in self.params_ranges["parents_choice_type"]:
-                            self.factory.parents_choice_type = parents_choice_type
-                            for parents_similarity_type in self.params_ranges["parents_similarity_type"]:
-                                self.factory.parents_similarity_type = parents_similarity_type
-                                for mutation_swap_value in self.params_ranges["mutation_swap_value"]:
-                                    self.factory.mutation_swap_value = mutation_swap_value
-                                    for route_distance_weight in self.params_ranges["route_distance_weight"]:
-                                        self.factory.route_distance_weight = route_distance_weight
-                                        for route_turns_angle_weight in self.params_ranges["route_turns_angle_weight"]:
-                                            self.factory.route_turns_angle_weight = route_turns_angle_weight
-                                            for route_self_intersection_weight in self.params_ranges[
-                                                "route_self_intersection_weight"]:
-                                                self.factory.route_self_intersection_weight = route_self_intersection_weight
-                                                for repair_route_genotypes in self.params_ranges[
-                                                    "repair_route_genotypes"]:
-                                                    self.factory.repair_route_genotypes = repair_route_genotypes
-
-                                                    self._handle_combination()
-                                                    self._show_progress()
+        self._prepare_survey_problem()
+        self._restore_from_journal(resume)
+
+        try:
+            if self.workers_count > 0:
+                self._combine_in_parallel()
+            else:
+                self._combine_serially()
+        finally:
+            if self.journal is not None:
+                self.journal.close()
+            if self.ledger is not None:
+                self.ledger.flush()
 
     def save(self):
         """
-        Сохранить лучшие выбранные споты данных.
+        Сохранить лучшие выбранные споты данных, загружая их с диска по одному.
         """
-        for data_spot in self.top_data_spots:
+        if self.ledger is not None:
+            self.ledger.flush()
+
+        for summary in self.get_top_results():
+            data_spot = np.load(summary["data_spot_file"], allow_pickle=True).item()
             self.data_keeper.data_spot = data_spot
             self.data_keeper.save()
 
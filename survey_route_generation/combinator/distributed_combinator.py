@@ -0,0 +1,375 @@
+"""
+Распределённый перебор комбинаций параметров: координатор раздаёт комбинации по сети
+через сервер multiprocessing.managers, исполнители на разных машинах забирают их, составляют маршруты
+и возвращают итоги. Исполнители подтверждают работу сигналами присутствия; комбинации пропавших
+исполнителей возвращаются в очередь. Лучшие результаты собираются и сохраняются координатором.
+Подключение исполнителей защищено ключом аутентификации; если ключ не задан, координатор создаёт случайный.
+"""
+import os
+import copy
+import time
+import queue
+import socket
+import secrets
+import threading
+import collections
+import numpy as np
+from multiprocessing.managers import BaseManager
+
+from survey_route_generation.combinator.combinator import Combinator, solve_combination
+from survey_route_generation.data.data_keeper import DataKeeper
+from survey_route_generation.survey_problem import SurveyProblem
+
+# Методы раздатчика комбинаций, доступные исполнителям.
+DISPATCHER_METHODS = ("get_setup", "heartbeat", "take_task", "submit_result", "is_finished")
+
+
+class _CoordinatorManager(BaseManager):
+    pass
+
+
+class _WorkerManager(BaseManager):
+    pass
+
+
+_WorkerManager.register("get_dispatcher", exposed=DISPATCHER_METHODS)
+
+
+def parse_address(address):
+    """
+    Разобрать адрес вида host:port.
+    """
+    host, port = address.rsplit(":", 1)
+
+    return host, int(port)
+
+
+def gen_authkey():
+    """
+    Сгенерировать случайный ключ аутентификации исполнителей.
+    """
+    return secrets.token_hex(16)
+
+
+def _check_authkey(authkey):
+    """
+    Проверить, что ключ аутентификации задан.
+    """
+    if not authkey:
+        raise ValueError("Не задан ключ аутентификации исполнителей")
+
+
+def _serve_dispatcher(server):
+    """
+    Обслуживать исполнителей до остановки сервера, который по завершении вызывает sys.exit в своём потоке.
+    """
+    try:
+        server.serve_forever()
+    except SystemExit:
+        pass
+
+
+class CombinationsDispatcher:
+    def __init__(self, tasks, setup):
+        """
+        Раздатчик комбинаций, к которому исполнители обращаются из потоков сервера.
+
+        :param tasks: Список задач: комбинация параметров и зерно генератора случайных чисел.
+        :param setup: Данные подготовки исполнителя: фабрика генераторов, директория хранителя данных,
+         данные БПЛА, полётной миссии и зоны обследования.
+        """
+        self.tasks = tasks
+        self.setup = setup
+
+        self.results = queue.Queue()
+        self.top_threshold = -np.inf
+        self.requeued_tasks_count = 0
+
+        self._pending_tasks = collections.deque(range(len(tasks)))
+        self._assigned_tasks = {}
+        self._done_tasks = set()
+        self._workers_heartbeats = {}
+        self._lock = threading.Lock()
+
+    def _touch_worker(self, worker_id):
+        """
+        Запомнить время последнего обращения исполнителя.
+        """
+        self._workers_heartbeats[worker_id] = time.time()
+
+    def get_setup(self):
+        """
+        Получить данные подготовки исполнителя.
+        """
+        return self.setup
+
+    def heartbeat(self, worker_id):
+        """
+        Принять сигнал присутствия исполнителя.
+        """
+        with self._lock:
+            self._touch_worker(worker_id)
+
+    def take_task(self, worker_id):
+        """
+        Выдать исполнителю очередную задачу вместе с текущим порогом попадания в список лучших;
+        None, если свободных задач нет.
+        """
+        with self._lock:
+            self._touch_worker(worker_id)
+            if len(self._pending_tasks) == 0:
+                return None
+
+            task_id = self._pending_tasks.popleft()
+            self._assigned_tasks[task_id] = worker_id
+            combination, seed = self.tasks[task_id]
+
+            return task_id, combination, seed, self.top_threshold
+
+    def submit_result(self, worker_id, task_id, summary, data_spot):
+        """
+        Принять итог задачи. Повторный итог задачи, возвращённой в очередь, отбрасывается.
+        """
+        with self._lock:
+            self._touch_worker(worker_id)
+            if task_id in self._done_tasks:
+                return
+
+            self._done_tasks.add(task_id)
+            self._assigned_tasks.pop(task_id, None)
+            if task_id in self._pending_tasks:
+                self._pending_tasks.remove(task_id)
+
+        self.results.put((summary, data_spot))
+
+    def is_finished(self):
+        """
+        Проверить, получены ли итоги всех задач.
+        """
+        with self._lock:
+            return len(self._done_tasks) == len(self.tasks)
+
+    def requeue_lost_tasks(self, heartbeat_timeout):
+        """
+        Вернуть в начало очереди задачи исполнителей, не подававших сигналов дольше заданного времени.
+        """
+        now = time.time()
+        with self._lock:
+            for task_id, worker_id in list(self._assigned_tasks.items()):
+                if now - self._workers_heartbeats[worker_id] > heartbeat_timeout:
+                    del self._assigned_tasks[task_id]
+                    self._pending_tasks.appendleft(task_id)
+                    self.requeued_tasks_count += 1
+
+    def set_top_threshold(self, top_threshold):
+        """
+        Задать порог попадания в список лучших.
+        """
+        with self._lock:
+            self.top_threshold = top_threshold
+
+
+class DistributedCombinator(Combinator):
+    def __init__(
+            self,
+            factory,
+            params_ranges,
+            vehicle_data,
+            mission_settings,
+            survey_area_points,
+            data_keeper,
+            top_size=11,
+            journal=None,
+            ledger=None,
+            address=("", 50000),
+            authkey=None,
+            heartbeat_interval=5,
+            heartbeat_timeout=30
+    ):
+        """
+        Параметры совпадают с параметрами Combinator, комбинации обрабатываются подключившимися исполнителями.
+
+        :param address: Адрес сервера координатора: хост и порт.
+        :param authkey: Ключ аутентификации исполнителей; None - случайный ключ, выводимый в консоль.
+        :param heartbeat_interval: Интервал ожидания итогов и проверки пропавших исполнителей, с.
+        :param heartbeat_timeout: Время без сигналов, после которого исполнитель считается пропавшим, с.
+        """
+        if authkey is None:
+            authkey = gen_authkey().encode()
+        _check_authkey(authkey)
+
+        self.address = address
+        self.authkey = authkey
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+
+        self._dispatcher = None
+        self._server = None
+
+        super().__init__(
+            factory,
+            params_ranges,
+            vehicle_data,
+            mission_settings,
+            survey_area_points,
+            data_keeper,
+            top_size,
+            journal=journal,
+            ledger=ledger
+        )
+
+    def _create_dispatcher(self):
+        """
+        Создать раздатчик необработанных комбинаций.
+        """
+        factory = copy.copy(self.factory)
+        factory.data_keep_func = None
+
+        self._dispatcher = CombinationsDispatcher(
+            list(self._gen_combinations_tasks()),
+            (factory, self.data_keeper.save_dir, self.vehicle_data, self.mission_settings, self.survey_area_points)
+        )
+
+    def _start_server(self):
+        """
+        Запустить сервер раздатчика в фоновом потоке.
+        """
+        dispatcher = self._dispatcher
+        _CoordinatorManager.register("get_dispatcher", callable=lambda: dispatcher, exposed=DISPATCHER_METHODS)
+
+        self._server = _CoordinatorManager(address=self.address, authkey=self.authkey).get_server()
+        threading.Thread(target=_serve_dispatcher, args=(self._server,), daemon=True).start()
+
+        self._show_connection_info()
+
+    def _show_connection_info(self):
+        """
+        Вывести в консоль адрес координатора и ключ аутентификации для подключения исполнителей.
+        """
+        host, port = self.address
+        print("Адрес координатора: ", (host or socket.gethostname()) + ":" + str(port))
+        print("Ключ аутентификации: ", self.authkey.decode())
+
+    def _stop_server(self):
+        """
+        Остановить сервер раздатчика. Поток приёма подключений завершается вместе с процессом,
+        а подключившиеся позже исполнители узнают о завершении перебора.
+        """
+        if self._server is not None and hasattr(self._server, "stop_event"):
+            self._server.stop_event.set()
+        self._server = None
+
+    def _update_top_threshold(self):
+        """
+        Передать исполнителям порог попадания в заполненный список лучших.
+        """
+        if len(self._top_heap) >= self.top_size:
+            self._dispatcher.set_top_threshold(self._top_heap[0][0])
+
+    def _collect_results(self):
+        """
+        Собирать итоги исполнителей, пока не будут получены итоги всех комбинаций,
+        возвращая в очередь комбинации пропавших исполнителей.
+        """
+        self.combination_start_time = time.time() - self.time_behind
+        while not self._dispatcher.is_finished():
+            self._dispatcher.requeue_lost_tasks(self.heartbeat_timeout)
+            try:
+                summary, data_spot = self._dispatcher.results.get(timeout=self.heartbeat_interval)
+            except queue.Empty:
+                continue
+
+            self._handle_worker_result(summary, data_spot)
+            self._show_progress(summary["combination"])
+
+    def combine(self, resume=False):
+        """
+        Раздать комбинации параметров исполнителям и собрать лучшие результаты.
+
+        :param resume: Продолжить перебор по журналу, пропустив обработанные комбинации.
+        """
+        self._restore_from_journal(resume)
+        self._create_dispatcher()
+        self._update_top_threshold()
+
+        self._start_server()
+        try:
+            self._collect_results()
+        finally:
+            self._stop_server()
+            if self.journal is not None:
+                self.journal.close()
+            if self.ledger is not None:
+                self.ledger.flush()
+
+
+def _send_heartbeats(dispatcher, worker_id, heartbeat_interval, stop_event):
+    """
+    Подавать сигналы присутствия исполнителя до его остановки или отключения координатора.
+    """
+    while not stop_event.wait(heartbeat_interval):
+        try:
+            dispatcher.heartbeat(worker_id)
+        except (ConnectionError, EOFError, OSError):
+            return
+
+
+def run_combinations_worker(address, authkey, worker_id=None, heartbeat_interval=5, poll_interval=1):
+    """
+    Подключиться к координатору и обрабатывать его комбинации, пока они не закончатся.
+    Вернуть количество обработанных комбинаций.
+
+    :param address: Адрес сервера координатора: хост и порт.
+    :param authkey: Ключ аутентификации, выданный координатором.
+    :param worker_id: Идентификатор исполнителя; None - имя машины и номер процесса.
+    :param heartbeat_interval: Интервал сигналов присутствия, с.
+    :param poll_interval: Интервал ожидания задач, когда очередь пуста, с.
+    """
+    _check_authkey(authkey)
+    if worker_id is None:
+        worker_id = socket.gethostname() + ":" + str(os.getpid())
+
+    manager = _WorkerManager(address=address, authkey=authkey)
+    manager.connect()
+    dispatcher = manager.get_dispatcher()
+
+    factory, save_dir, vehicle_data, mission_settings, survey_area_points = dispatcher.get_setup()
+    data_keeper = DataKeeper(save_dir)
+    factory.data_keep_func = data_keeper.keep
+    survey_problem = SurveyProblem(vehicle_data, mission_settings, survey_area_points).prepare()
+
+    stop_event = threading.Event()
+    threading.Thread(
+        target=_send_heartbeats,
+        args=(dispatcher, worker_id, heartbeat_interval, stop_event),
+        daemon=True
+    ).start()
+
+    solved_count = 0
+    try:
+        while True:
+            task = dispatcher.take_task(worker_id)
+            if task is None:
+                if dispatcher.is_finished():
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            task_id, combination, seed, top_threshold = task
+            summary, data_spot = solve_combination(
+                factory,
+                data_keeper,
+                survey_problem,
+                combination,
+                seed,
+                top_threshold
+            )
+            dispatcher.submit_result(worker_id, task_id, summary, data_spot)
+            solved_count += 1
+    except (ConnectionError, EOFError):
+        # Координатор завершил работу
+        pass
+    finally:
+        stop_event.set()
+
+    return solved_count
@@ -0,0 +1,86 @@
+"""
+Журнал итогов всех обработанных комбинаций в колоночном виде: по массиву на параметр и показатель.
+Сохраняется в файл npz, который загружается без распаковки объектов: np.load(filename).
+"""
+import os
+import numpy as np
+
+
+class ResultsLedger:
+    def __init__(self, filename, flush_interval=1024):
+        """
+        :param filename: Файл журнала итогов.
+        :param flush_interval: Количество итогов между сохранениями файла.
+        """
+        self.filename = filename
+        self.flush_interval = flush_interval
+
+        self.rows_count = 0
+
+        self._columns = {}
+        self._pending_rows = []
+
+    @staticmethod
+    def _gen_row(summary):
+        """
+        Сформировать строку журнала по итогу комбинации: параметры и показатели результата.
+        """
+        row = dict(summary["combination"])
+        row["route_fitness"] = summary["route_fitness"]
+        row["route_hash"] = summary["route_hash"]
+        row["route_digest"] = summary["route_digest"]
+        row["stop_reason"] = summary["stop_reason"] if summary["stop_reason"] is not None else ""
+        row["elapsed_time"] = summary["elapsed_time"]
+
+        return row
+
+    def _collect_pending_rows(self):
+        """
+        Перенести накопленные строки в колонки.
+        """
+        if len(self._pending_rows) == 0:
+            return
+
+        for column_name in self._pending_rows[0]:
+            pending_values = np.array([row[column_name] for row in self._pending_rows])
+            if column_name in self._columns:
+                self._columns[column_name] = np.concatenate([self._columns[column_name], pending_values])
+            else:
+                self._columns[column_name] = pending_values
+
+        self._pending_rows = []
+
+    def append(self, summary):
+        """
+        Добавить итог комбинации, сохраняя файл через каждые flush_interval итогов.
+        """
+        self._pending_rows.append(self._gen_row(summary))
+        self.rows_count += 1
+
+        if len(self._pending_rows) >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        Сохранить журнал в файл, заменив предыдущую версию целиком.
+        """
+        self._collect_pending_rows()
+        if len(self._columns) == 0:
+            return
+
+        ledger_dir = os.path.dirname(self.filename)
+        if ledger_dir:
+            os.makedirs(ledger_dir, exist_ok=True)
+
+        temp_filename = self.filename + ".tmp"
+        with open(temp_filename, "wb") as file:
+            np.savez_compressed(file, **self._columns)
+        os.replace(temp_filename, self.filename)
+
+    @staticmethod
+    def load(filename):
+        """
+        Загрузить колонки журнала итогов.
+        """
+        with np.load(filename) as ledger:
+            return {column_name: ledger[column_name] for column_name in ledger.files}
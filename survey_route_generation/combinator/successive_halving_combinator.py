@@ -0,0 +1,301 @@
+"""
+Поиск наилучших параметров последовательным отсевом: все кандидаты получают несколько жизненных циклов,
+лучшая доля продолжает эволюцию с увеличенным бюджетом, остальные завершаются.
+Лучшие результаты сохраняются в том же формате спотов данных, что и при полном переборе.
+"""
+import math
+import time
+import numpy as np
+
+from survey_route_generation.combinator.combinator import Combinator, COMBINATION_PARAMS, summarize_result
+from survey_route_generation.data.data_keeper import DataKeeper
+
+# Параметры, значения которых при случайном выборе берутся из отрезка между границами диапазона.
+CONTINUOUS_PARAMS = [
+    "selection_rate",
+    "mutants_rate",
+    "mutation_swap_value",
+    "route_distance_weight",
+    "route_turns_angle_weight",
+    "route_self_intersection_weight"
+]
+
+# Данные спота о генотипах каждого жизненного цикла, которые не хранятся для приостановленных кандидатов.
+GENOTYPES_DATA_KEYS = ["genotypes", "estimations", "genotypes_fitness"]
+
+
+class SuccessiveHalvingCombinator(Combinator):
+    def __init__(
+            self,
+            factory,
+            params_ranges,
+            vehicle_data,
+            mission_settings,
+            survey_area_points,
+            data_keeper,
+            top_size=11,
+            min_lifecycles=4,
+            reduction_factor=3,
+            samples_count=None,
+            ledger=None
+    ):
+        """
+        Параметры совпадают с параметрами Combinator,
+        наибольший бюджет кандидата задаётся количеством жизненных циклов фабрики генераторов.
+        Отсев не продолжается по журналу: итоги завершённых кандидатов записываются только в журнал итогов.
+
+        :param min_lifecycles: Бюджет кандидатов на первом этапе отсева, жизненные циклы.
+        :param reduction_factor: Во сколько раз на каждом этапе уменьшается количество кандидатов
+         и увеличивается их бюджет.
+        :param samples_count: Количество случайно выбранных кандидатов; None - все комбинации диапазонов.
+        :param ledger: Колоночный журнал итогов завершённых кандидатов; None - без него.
+        """
+        self.min_lifecycles = min_lifecycles
+        self.reduction_factor = reduction_factor
+        self.samples_count = samples_count
+
+        self.max_lifecycles = None
+        self.rungs_statistics = []
+
+        self._candidates = []
+        self._data_keep_func = None
+        self._fitness_workers_count = None
+
+        super().__init__(
+            factory,
+            params_ranges,
+            vehicle_data,
+            mission_settings,
+            survey_area_points,
+            data_keeper,
+            top_size,
+            ledger=ledger
+        )
+
+    def _calc_combinations_amount(self):
+        """
+        Подсчитать количество кандидатов.
+        """
+        if self.samples_count is not None:
+            self.combinations_amount = self.samples_count
+        else:
+            super()._calc_combinations_amount()
+
+    def _is_swap_count_param(self, param_name):
+        """
+        Проверить, задаёт ли параметр количество перестановок при мутации, а не их долю.
+        """
+        return param_name == "mutation_swap_value" and self.factory.mutation_swap_type != "rate"
+
+    def _sample_continuous_param(self, param_name, param_range):
+        """
+        Выбрать значение параметра из отрезка между границами диапазона,
+        целое - для количества перестановок при мутации.
+        """
+        if self._is_swap_count_param(param_name):
+            return int(np.random.randint(math.ceil(min(param_range)), math.floor(max(param_range)) + 1))
+
+        return float(np.random.uniform(min(param_range), max(param_range)))
+
+    def _sample_combinations(self):
+        """
+        Выбрать случайные комбинации параметров из заданных диапазонов.
+        """
+        for _sample_index in range(self.samples_count):
+            combination = {}
+            for param_name in COMBINATION_PARAMS:
+                param_range = self.params_ranges[param_name]
+                if param_name in CONTINUOUS_PARAMS and len(param_range) > 1:
+                    combination[param_name] = self._sample_continuous_param(param_name, param_range)
+                else:
+                    combination[param_name] = param_range[np.random.randint(len(param_range))]
+
+            yield combination
+
+    def _is_search_resumable(self):
+        """
+        Проверить, поддерживает ли поисковик продолжение эволюции с увеличенным бюджетом.
+        Остальные поисковики на каждом этапе запускаются заново.
+        """
+        return self.factory.route_finder_type == "genetic"
+
+    def _make_candidate_generator(self, candidate):
+        """
+        Создать генератор маршрута кандидата со своим хранителем данных.
+        """
+        self._apply_combination(candidate["combination"])
+        self.factory.data_keep_func = candidate["data_keeper"].keep
+
+        return self.factory.make()
+
+    def _create_candidates(self):
+        """
+        Создать кандидатов по всем или случайно выбранным комбинациям параметров.
+        """
+        combinations = self._gen_combinations() if self.samples_count is None else self._sample_combinations()
+
+        self._candidates = []
+        for combination in combinations:
+            self._candidates.append({
+                "combination": combination,
+                "data_keeper": DataKeeper(self.data_keeper.save_dir),
+                "generator": None,
+                "lifecycles": 0,
+                "fitness": None,
+                "can_continue": True,
+                "elapsed_time": 0,
+                "summary": None
+            })
+
+    def _merge_candidate_result(self, candidate, route_result):
+        """
+        Учесть результат кандидата в списке лучших, запомнив его итог.
+        """
+        candidate["data_keeper"].keep(route_result, "result_obtaining")
+        candidate["summary"] = summarize_result(candidate["combination"], route_result, candidate["elapsed_time"])
+        self._merge_result(candidate["summary"], candidate["data_keeper"].data_spot)
+
+    def _resume_candidate(self, candidate, lifecycles):
+        """
+        Продолжить эволюцию кандидата до заданного количества жизненных циклов.
+        """
+        start_time = time.time()
+        if candidate["generator"] is None:
+            candidate["generator"] = self._make_candidate_generator(candidate)
+            candidate["generator"].start_solving(self.survey_problem)
+
+        candidate["can_continue"] = candidate["generator"].continue_solving(lifecycles - candidate["lifecycles"])
+        candidate["fitness"] = candidate["generator"].estimate_solving()
+        candidate["elapsed_time"] += time.time() - start_time
+
+    def _restart_candidate(self, candidate, lifecycles):
+        """
+        Заново составить маршрут кандидата с заданным количеством жизненных циклов.
+        Результат этапа сразу учитывается в списке лучших, до следующего этапа хранится только его итог.
+        """
+        start_time = time.time()
+        self.factory.max_lifecycles = lifecycles
+        try:
+            generator = self._make_candidate_generator(candidate)
+        finally:
+            self.factory.max_lifecycles = self.max_lifecycles
+
+        route_result = generator.solve(self.survey_problem)
+        candidate["elapsed_time"] += time.time() - start_time
+
+        self._merge_candidate_result(candidate, route_result)
+        candidate["data_keeper"].clear_spot()
+
+        candidate["can_continue"] = route_result["stop_reason"] == "max_lifecycles"
+        candidate["fitness"] = route_result["route_fitness"]
+
+    def _run_candidate(self, candidate, lifecycles):
+        """
+        Дать кандидату бюджет в заданное количество жизненных циклов.
+        """
+        if self._is_search_resumable():
+            self._resume_candidate(candidate, lifecycles)
+        else:
+            self._restart_candidate(candidate, lifecycles)
+
+        candidate["lifecycles"] = lifecycles
+
+    def _finish_candidate(self, candidate):
+        """
+        Завершить эволюцию кандидата, учесть его результат в списке лучших и записать итог в журнал итогов.
+        Результаты перезапускаемых кандидатов уже учтены после каждого этапа.
+        """
+        if candidate["generator"] is not None:
+            start_time = time.time()
+            route_result = candidate["generator"].finish_solving()
+            candidate["elapsed_time"] += time.time() - start_time
+
+            self._merge_candidate_result(candidate, route_result)
+
+        self._inc_combination_counter()
+        self._record_result(candidate["summary"])
+
+        candidate["generator"] = None
+        candidate["data_keeper"] = None
+
+        self.time_behind = time.time() - self.combination_start_time
+        self._show_progress(candidate["combination"])
+
+    @staticmethod
+    def _pause_candidate(candidate):
+        """
+        Приостановить кандидата до следующего этапа, освободив данные о генотипах пройденных жизненных циклов.
+        В споте кандидата остаются итоги всех циклов и генотипы последнего этапа.
+        """
+        for data_key in GENOTYPES_DATA_KEYS:
+            candidate["data_keeper"].data_spot[data_key] = []
+
+    def _run_rung(self, lifecycles):
+        """
+        Провести этап отсева: дать бюджет всем кандидатам и завершить остановившихся.
+        """
+        for candidate in self._candidates:
+            self._run_candidate(candidate, lifecycles)
+
+        self.rungs_statistics.append({
+            "lifecycles": lifecycles,
+            "candidates_count": len(self._candidates),
+            "best_fitness": float(max(candidate["fitness"] for candidate in self._candidates))
+        })
+
+        for candidate in self._candidates:
+            if not candidate["can_continue"]:
+                self._finish_candidate(candidate)
+        self._candidates = [candidate for candidate in self._candidates if candidate["can_continue"]]
+
+    def _halve_candidates(self):
+        """
+        Оставить лучшую долю кандидатов, завершив остальных.
+        """
+        self._candidates.sort(key=lambda candidate: candidate["fitness"], reverse=True)
+        kept_count = math.ceil(len(self._candidates) / self.reduction_factor)
+
+        for candidate in self._candidates[kept_count:]:
+            self._finish_candidate(candidate)
+        self._candidates = self._candidates[:kept_count]
+
+    def _halve_successively(self):
+        """
+        Проводить этапы отсева, увеличивая бюджет кандидатов до наибольшего.
+        """
+        lifecycles = min(self.min_lifecycles, self.max_lifecycles)
+        while len(self._candidates) > 0:
+            self._run_rung(lifecycles)
+
+            if lifecycles >= self.max_lifecycles:
+                for candidate in self._candidates:
+                    self._finish_candidate(candidate)
+                self._candidates = []
+            else:
+                self._halve_candidates()
+                for candidate in self._candidates:
+                    self._pause_candidate(candidate)
+                lifecycles = min(lifecycles * self.reduction_factor, self.max_lifecycles)
+
+    def combine(self):
+        """
+        Выполнить поиск наилучших комбинаций параметров последовательным отсевом.
+        Кандидаты оценивают приспособленность в основном процессе, чтобы не держать пул процессов на каждого.
+        """
+        self._prepare_survey_problem()
+
+        self.max_lifecycles = self.factory.max_lifecycles
+        self._data_keep_func = self.factory.data_keep_func
+        self._fitness_workers_count = self.factory.fitness_workers_count
+        self.factory.fitness_workers_count = 0
+        self.rungs_statistics = []
+        self.combination_start_time = time.time()
+
+        self._create_candidates()
+        try:
+            self._halve_successively()
+        finally:
+            self.factory.data_keep_func = self._data_keep_func
+            self.factory.fitness_workers_count = self._fitness_workers_count
+            if self.ledger is not None:
+                self.ledger.flush()
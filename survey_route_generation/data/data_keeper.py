@@ -34,7 +34,10 @@ class DataKeeper:
             "populations": [],
             "genotypes": [],
             "estimations": [],
-            "genotypes_fitness": []
+            "genotypes_fitness": [],
+            "islands": [],
+            "local_search": [],
+            "clusters": []
         }
 
     def _handle_result_obtaining(self):
@@ -45,6 +48,7 @@ class DataKeeper:
         self.data_spot["route_result"]["route"] = self._data_object["route"]
         self.data_spot["route_result"]["route_fitness"] = self._data_object["route_fitness"]
         self.data_spot["route_result"]["route_hash"] = self._data_object["route_hash"]
+        self.data_spot["route_result"]["stop_reason"] = self._data_object.get("stop_reason")
         self.data_spot["route_result"]["out_point"] = self._data_object["out_point"]
 
     def _handle_lifecycle_step_ending(self):
@@ -78,13 +82,29 @@ class DataKeeper:
         }
         self.data_spot["genotypes_fitness"].append(genotype_fitness)
 
+    def _handle_population_fitness_calculation(self):
+        """
+        Обработать событие вычисления функции приспособленности всех маршрутов популяции.
+        """
+        for route_index in range(self._data_object.population_route_distance.shape[0]):
+            genotype_fitness = {
+                "route_distance": self._data_object.population_route_distance[route_index],
+                "route_turns_angle": self._data_object.population_route_turns_angle[route_index],
+                "route_self_intersections": self._data_object.population_route_self_intersections[route_index],
+                "normalized_route_distance": self._data_object.population_normalized_route_distance[route_index],
+                "normalized_route_turns_angle": self._data_object.population_normalized_route_turns_angle[route_index],
+                "normalized_route_self_intersections":
+                    self._data_object.population_normalized_route_self_intersections[route_index]
+            }
+            self.data_spot["genotypes_fitness"].append(genotype_fitness)
+
     def _handle_lifecycle_step_beginning(self):
         """
         Обработать событие начала эволюционного цикла.
         """
         self._population_size = self._data_object.current_population.shape[0]
-        self.data_spot["genotypes"].extend(self._data_object.current_population)
-        self.data_spot["estimations"].extend(self._data_object.population_estimation)
+        self.data_spot["genotypes"].extend(self._data_object.current_population.copy())
+        self.data_spot["estimations"].extend(self._data_object.population_estimation.copy())
 
     def _handle_evolution_beginning(self):
         """
@@ -97,6 +117,11 @@ class DataKeeper:
         self.data_spot["evolution"]["parents_choice_type"] = self._data_object.parents_choice_type
         self.data_spot["evolution"]["parents_similarity_type"] = self._data_object.parents_similarity_type
         self.data_spot["evolution"]["max_lifecycles"] = self._data_object.max_lifecycles
+        self.data_spot["evolution"]["stagnation_lifecycles"] = self._data_object.stagnation_lifecycles
+        self.data_spot["evolution"]["min_relative_improvement"] = self._data_object.min_relative_improvement
+        self.data_spot["evolution"]["improvement_window"] = self._data_object.improvement_window
+        self.data_spot["evolution"]["time_budget"] = self._data_object.time_budget
+        self.data_spot["evolution"]["target_fitness"] = self._data_object.target_fitness
 
     def _handle_genotype_search_beginning(self):
         """
@@ -117,6 +142,37 @@ class DataKeeper:
         self.data_spot["route_fitness"]["max_turns_angle"] = self._data_object.max_route_turns_angle
         self.data_spot["route_fitness"]["max_self_intersections"] = self._data_object.max_route_self_intersections
 
+    def _handle_genotype_search_ending(self):
+        """
+        Обработать событие окончания поиска лучшего генотипа.
+        """
+        self.data_spot["route_fitness"]["cache_hits"] = self._data_object.fitness_cache.hits
+        self.data_spot["route_fitness"]["cache_misses"] = self._data_object.fitness_cache.misses
+
+    def _handle_local_search_ending(self):
+        """
+        Обработать событие окончания локального поиска на жизненном цикле.
+        """
+        self.data_spot["local_search"].append({
+            "moves": self._data_object.local_search_moves,
+            "improved_routes": self._data_object.local_search_improved_routes,
+            "elapsed_time": self._data_object.local_search_elapsed_time
+        })
+
+    def _handle_island_migration(self):
+        """
+        Обработать событие миграции между островами.
+        """
+        for island_statistics in self._data_object.last_islands_statistics:
+            self.data_spot["islands"].append(dict(island_statistics))
+
+    def _handle_clusters_solving_ending(self):
+        """
+        Обработать событие окончания поиска маршрутов кластеров.
+        """
+        for cluster_statistics in self._data_object.clusters_statistics:
+            self.data_spot["clusters"].append(dict(cluster_statistics))
+
     def _gen_filename(self):
         """
         Сгенерировать имя файла.
@@ -131,14 +187,24 @@ class DataKeeper:
         self._event_name = event_name
         if event_name == "genotype_search_beginning":
             self._handle_genotype_search_beginning()
+        elif event_name == "genotype_search_ending":
+            self._handle_genotype_search_ending()
         elif event_name == "evolution_beginning":
             self._handle_evolution_beginning()
         elif event_name == "lifecycle_step_beginning":
             self._handle_lifecycle_step_beginning()
         elif event_name == "route_fitness_calculation":
             self._handle_route_fitness_calculation()
+        elif event_name == "population_fitness_calculation":
+            self._handle_population_fitness_calculation()
         elif event_name == "lifecycle_step_ending":
             self._handle_lifecycle_step_ending()
+        elif event_name == "local_search_ending":
+            self._handle_local_search_ending()
+        elif event_name == "island_migration":
+            self._handle_island_migration()
+        elif event_name == "clusters_solving_ending":
+            self._handle_clusters_solving_ending()
         elif event_name == "result_obtaining":
             self._handle_result_obtaining()
         else:
@@ -3,6 +3,9 @@
 """
 from survey_route_generation.genetic.genetic_algorithm import GeneticAlgorithm
 from survey_route_generation.genetic.genetic_optimal_route_finder import GeneticOptimalRouteFinder
+from survey_route_generation.genetic.island_optimal_route_finder import IslandOptimalRouteFinder
+from survey_route_generation.genetic.decomposition_optimal_route_finder import DecompositionOptimalRouteFinder
+from survey_route_generation.heuristics.heuristic_optimal_route_finder import HeuristicOptimalRouteFinder
 from survey_route_generation.route_generator import RouteGenerator
 
 
@@ -21,7 +24,36 @@ class RouteGeneratorFactory:
                  route_turns_angle_weight=None,
                  route_self_intersection_weight=None,
                  repair_route_genotypes=None,
-                 data_keep_func=None
+                 data_keep_func=None,
+                 batch_fitness_estimation=True,
+                 fitness_cache_size=4096,
+                 crossing_type="first_unused",
+                 fitness_workers_count=0,
+                 route_finder_type="genetic",
+                 islands_count=4,
+                 islands_settings=None,
+                 migration_interval=8,
+                 migrants_count=2,
+                 migration_topology="ring",
+                 stagnation_lifecycles=None,
+                 min_relative_improvement=None,
+                 improvement_window=8,
+                 time_budget=None,
+                 target_fitness=None,
+                 seeding_rate=0.0,
+                 local_search=False,
+                 local_search_scope="children",
+                 local_search_top_count=4,
+                 local_search_time_cap=0.05,
+                 heuristic_construction_type="all",
+                 heuristic_local_search_passes=16,
+                 decomposition_cluster_size=256,
+                 decomposition_clustering_type="grid",
+                 decomposition_cluster_finder_type="genetic",
+                 decomposition_workers_count=0,
+                 compact_dtypes=False,
+                 distance_matrix_memmap_threshold=None,
+                 distance_matrix_memmap_dir=None
                  ):
         """
         Инициализировать параметры.
@@ -42,9 +74,98 @@ class RouteGeneratorFactory:
         self.route_turns_angle_weight = route_turns_angle_weight
         self.route_self_intersection_weight = route_self_intersection_weight
         self.repair_route_genotypes = repair_route_genotypes
+        self.batch_fitness_estimation = batch_fitness_estimation
+        self.fitness_cache_size = fitness_cache_size
+        self.crossing_type = crossing_type
+        self.fitness_workers_count = fitness_workers_count
+        self.route_finder_type = route_finder_type
+        self.islands_count = islands_count
+        self.islands_settings = islands_settings
+        self.migration_interval = migration_interval
+        self.migrants_count = migrants_count
+        self.migration_topology = migration_topology
+        self.stagnation_lifecycles = stagnation_lifecycles
+        self.min_relative_improvement = min_relative_improvement
+        self.improvement_window = improvement_window
+        self.time_budget = time_budget
+        self.target_fitness = target_fitness
+        self.seeding_rate = seeding_rate
+        self.local_search = local_search
+        self.local_search_scope = local_search_scope
+        self.local_search_top_count = local_search_top_count
+        self.local_search_time_cap = local_search_time_cap
+        self.heuristic_construction_type = heuristic_construction_type
+        self.heuristic_local_search_passes = heuristic_local_search_passes
+        self.decomposition_cluster_size = decomposition_cluster_size
+        self.decomposition_clustering_type = decomposition_clustering_type
+        self.decomposition_cluster_finder_type = decomposition_cluster_finder_type
+        self.decomposition_workers_count = decomposition_workers_count
+        self.compact_dtypes = compact_dtypes
+        self.distance_matrix_memmap_threshold = distance_matrix_memmap_threshold
+        self.distance_matrix_memmap_dir = distance_matrix_memmap_dir
 
         self.data_keep_func = data_keep_func
 
+    def _make_route_finder(self, genetic_algo):
+        """
+        Создать поисковик оптимального маршрута заданного типа: genetic, island, heuristic, decomposition.
+        """
+        route_finder_args = (
+            genetic_algo,
+            self.mutation_swap_value,
+            self.mutation_swap_type,
+            self.route_distance_weight,
+            self.route_turns_angle_weight,
+            self.route_self_intersection_weight,
+            self.repair_route_genotypes,
+            self.data_keep_func
+        )
+        route_finder_kwargs = {
+            "batch_fitness_estimation": self.batch_fitness_estimation,
+            "fitness_cache_size": self.fitness_cache_size,
+            "crossing_type": self.crossing_type,
+            "fitness_workers_count": self.fitness_workers_count,
+            "seeding_rate": self.seeding_rate,
+            "local_search": self.local_search,
+            "local_search_time_cap": self.local_search_time_cap,
+            "compact_dtypes": self.compact_dtypes,
+            "distance_matrix_memmap_threshold": self.distance_matrix_memmap_threshold,
+            "distance_matrix_memmap_dir": self.distance_matrix_memmap_dir
+        }
+
+        if self.route_finder_type == "island":
+            return IslandOptimalRouteFinder(
+                *route_finder_args,
+                islands_count=self.islands_count,
+                islands_settings=self.islands_settings,
+                migration_interval=self.migration_interval,
+                migrants_count=self.migrants_count,
+                migration_topology=self.migration_topology,
+                **route_finder_kwargs
+            )
+
+        heuristic_params = {
+            "construction_type": self.heuristic_construction_type,
+            "local_search_passes": self.heuristic_local_search_passes,
+            "time_budget": self.time_budget
+        }
+
+        if self.route_finder_type == "heuristic":
+            return HeuristicOptimalRouteFinder(*route_finder_args, **heuristic_params, **route_finder_kwargs)
+
+        if self.route_finder_type == "decomposition":
+            return DecompositionOptimalRouteFinder(
+                *route_finder_args,
+                cluster_size=self.decomposition_cluster_size,
+                clustering_type=self.decomposition_clustering_type,
+                cluster_finder_type=self.decomposition_cluster_finder_type,
+                cluster_finder_params=heuristic_params if self.decomposition_cluster_finder_type == "heuristic" else None,
+                clusters_workers_count=self.decomposition_workers_count,
+                **route_finder_kwargs
+            )
+
+        return GeneticOptimalRouteFinder(*route_finder_args, **route_finder_kwargs)
+
     def make(self):
         """
         Создать объект генератора маршрута.
@@ -57,20 +178,18 @@ class RouteGeneratorFactory:
             self.max_lifecycles,
             self.parents_choice_type,
             self.parents_similarity_type,
-            self.data_keep_func
+            self.data_keep_func,
+            stagnation_lifecycles=self.stagnation_lifecycles,
+            min_relative_improvement=self.min_relative_improvement,
+            improvement_window=self.improvement_window,
+            time_budget=self.time_budget,
+            target_fitness=self.target_fitness,
+            local_search_scope=self.local_search_scope,
+            local_search_top_count=self.local_search_top_count
         )
 
-        genetic_optimal_route_finder = GeneticOptimalRouteFinder(
-            genetic_algo,
-            self.mutation_swap_value,
-            self.mutation_swap_type,
-            self.route_distance_weight,
-            self.route_turns_angle_weight,
-            self.route_self_intersection_weight,
-            self.repair_route_genotypes,
-            self.data_keep_func
-        )
+        optimal_route_finder = self._make_route_finder(genetic_algo)
 
         return RouteGenerator(
-            genetic_optimal_route_finder
+            optimal_route_finder
         )
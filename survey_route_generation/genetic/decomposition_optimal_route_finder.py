@@ -0,0 +1,383 @@
+"""
+Поиск оптимального маршрута декомпозицией: ключевые точки разбиваются на пространственные кластеры,
+маршруты кластеров ищутся независимо, в том числе параллельно, и сшиваются в один маршрут.
+Матрица расстояний строится только внутри кластеров, поэтому поиск применим к тысячам ключевых точек.
+"""
+import random
+import logging
+import itertools
+import collections
+import multiprocessing
+import numpy as np
+
+from survey_route_generation.geo.geo import calc_distance, calc_distance_matrix, calc_points_distances, \
+    calc_pairs_distances, calc_triangle_angle
+from survey_route_generation.genetic.genetic_algorithm import GeneticAlgorithm
+from survey_route_generation.genetic.genetic_optimal_route_finder import GeneticOptimalRouteFinder
+from survey_route_generation.heuristics.heuristic_optimal_route_finder import HeuristicOptimalRouteFinder
+from survey_route_generation.heuristics.route_seeds_generator import RouteSeedsGenerator
+from survey_route_generation.heuristics.route_local_search import RouteLocalSearch
+
+# Наибольшее количество точек кластера, маршрут которого находится перебором всех перестановок.
+BRUTE_FORCE_CLUSTER_SIZE = 3
+
+
+def _solve_small_cluster(cluster_points, in_point, out_point):
+    """
+    Найти кратчайший маршрут кластера из нескольких точек перебором всех перестановок.
+    """
+    best_genotype = None
+    best_distance = None
+    for genotype in itertools.permutations(range(cluster_points.shape[0])):
+        distance = calc_distance(in_point, *cluster_points[list(genotype)], out_point)
+        if best_distance is None or distance < best_distance:
+            best_genotype = np.array(genotype)
+            best_distance = distance
+
+    return best_genotype, None
+
+
+def _solve_cluster(cluster_finder_type, genetic_algo_params, route_finder_params, search_data, seed):
+    """
+    Найти маршрут кластера поисковиком заданного типа.
+
+    :return: Генотип маршрута в номерах точек кластера и причина остановки поиска.
+    """
+    cluster_points, in_point, out_point, keypoint_distance = search_data
+    if cluster_points.shape[0] <= BRUTE_FORCE_CLUSTER_SIZE:
+        return _solve_small_cluster(cluster_points, in_point, out_point)
+
+    random.seed(seed)
+    np.random.seed(seed)
+
+    if cluster_finder_type == "heuristic":
+        route_finder = HeuristicOptimalRouteFinder(None, **route_finder_params)
+    else:
+        route_finder = GeneticOptimalRouteFinder(GeneticAlgorithm(**genetic_algo_params), **route_finder_params)
+
+    route_finder.find(cluster_points, in_point, out_point, keypoint_distance)
+
+    return route_finder._best_genotype, route_finder.stop_reason
+
+
+class DecompositionOptimalRouteFinder(GeneticOptimalRouteFinder):
+    def __init__(self,
+                 genetic_algo,
+                 *args,
+                 cluster_size=256,
+                 clustering_type="grid",
+                 cluster_finder_type="genetic",
+                 cluster_finder_params=None,
+                 clusters_workers_count=0,
+                 kmeans_iterations=16,
+                 **kwargs
+                 ):
+        """
+        Параметры генетического алгоритма задают настройки поиска маршрутов кластеров,
+        остальные параметры совпадают с параметрами GeneticOptimalRouteFinder.
+
+        :param cluster_size: Наибольшее количество ключевых точек в кластере сетки, среднее - для k-means.
+        :param clustering_type: Способ разбиения на кластеры: grid - ячейки сетки ключевых точек, kmeans - k-средних.
+        :param cluster_finder_type: Поисковик маршрутов кластеров: genetic, heuristic.
+        :param cluster_finder_params: Дополнительные параметры поисковика маршрутов кластеров.
+        :param clusters_workers_count: Количество процессов для параллельного поиска маршрутов кластеров;
+         0 - без пула.
+        :param kmeans_iterations: Количество итераций метода k-средних.
+        """
+        super().__init__(genetic_algo, *args, **kwargs)
+
+        self.cluster_size = cluster_size
+        self.clustering_type = clustering_type
+        self.cluster_finder_type = cluster_finder_type
+        self.cluster_finder_params = cluster_finder_params
+        self.clusters_workers_count = clusters_workers_count
+        self.kmeans_iterations = kmeans_iterations
+
+        self.clusters_statistics = []
+
+        self._clusters_points_indexes = []
+
+    def _get_gens_distance(self, gen1, gen2):
+        """
+        Получить расстояние между соответствующими точками по их генам без матрицы расстояний.
+        """
+        return calc_distance(self.route_points[gen1], self.route_points[gen2])
+
+    def _project_route_points(self):
+        """
+        Спроецировать ключевые точки на плоскость, в которой расстояния по широте и долготе соразмерны.
+        """
+        self._plane_lon_scale = np.cos(np.radians(np.average(self.route_points[:, 0])))
+        self._plane_points = np.column_stack((self.route_points[:, 0], self.route_points[:, 1] * self._plane_lon_scale))
+
+    def _cluster_by_grid(self):
+        """
+        Разбить ключевые точки на квадратные ячейки сетки ключевых точек.
+        """
+        _, rows = np.unique(self.route_points[:, 0], return_inverse=True)
+        _, cols = np.unique(self.route_points[:, 1], return_inverse=True)
+        cell_side = max(int(np.floor(np.sqrt(self.cluster_size))), 1)
+
+        _, clusters_labels = np.unique(
+            np.column_stack((rows // cell_side, cols // cell_side)),
+            axis=0,
+            return_inverse=True
+        )
+
+        return clusters_labels.reshape(-1)
+
+    def _cluster_by_kmeans(self):
+        """
+        Разбить ключевые точки на кластеры методом k-средних.
+        """
+        clusters_count = max(int(np.ceil(self.route_points.shape[0] / self.cluster_size)), 1)
+        centers = self._plane_points[
+            self._rng.choice(self._plane_points.shape[0], size=clusters_count, replace=False)
+        ]
+
+        clusters_labels = None
+        for _ in range(self.kmeans_iterations):
+            squared_distances = np.square(self._plane_points[:, np.newaxis, :] - centers[np.newaxis, :, :]).sum(axis=2)
+            clusters_labels = np.argmin(squared_distances, axis=1)
+
+            for cluster_index in range(clusters_count):
+                cluster_mask = clusters_labels == cluster_index
+                if np.any(cluster_mask):
+                    centers[cluster_index] = self._plane_points[cluster_mask].mean(axis=0)
+
+        # Номера опустевших кластеров пропускаем.
+        return np.unique(clusters_labels, return_inverse=True)[1].reshape(-1)
+
+    def _split_into_clusters(self):
+        """
+        Разбить ключевые точки на кластеры заданным способом.
+        """
+        if self.route_points.shape[0] <= self.cluster_size:
+            clusters_labels = np.zeros(self.route_points.shape[0], dtype=np.intp)
+        elif self.clustering_type == "kmeans":
+            clusters_labels = self._cluster_by_kmeans()
+        else:
+            clusters_labels = self._cluster_by_grid()
+
+        self._clusters_points_indexes = [
+            np.flatnonzero(clusters_labels == cluster_index)
+            for cluster_index in range(clusters_labels.max() + 1)
+        ]
+        self._clusters_centers = np.array([
+            self.route_points[points_indexes].mean(axis=0)
+            for points_indexes in self._clusters_points_indexes
+        ])
+
+    def _order_clusters(self):
+        """
+        Упорядочить кластеры кратчайшим обходом их центров
+        из построенных конструктивными эвристиками и улучшенных локальным поиском.
+        """
+        clusters_count = self._clusters_centers.shape[0]
+        if clusters_count < 3:
+            in_point_distances = calc_points_distances(self._clusters_centers, self.in_point)
+            self._clusters_order = np.argsort(in_point_distances, kind="stable")
+            return
+
+        distance_matrix = calc_distance_matrix(self._clusters_centers)
+        in_point_distances = calc_points_distances(self._clusters_centers, self.in_point)
+        out_point_distances = calc_points_distances(self._clusters_centers, self.out_point)
+        neighbor_genes = np.argsort(distance_matrix, axis=1, kind="stable")[:, 1:].tolist()
+
+        local_search = RouteLocalSearch(distance_matrix, in_point_distances, out_point_distances, neighbor_genes)
+        orders = [
+            local_search.improve(order)[0]
+            for order in RouteSeedsGenerator(self._clusters_centers, distance_matrix, in_point_distances).gen()
+        ]
+        orders_distances = [
+            in_point_distances[order[0]] + distance_matrix[order[:-1], order[1:]].sum() + out_point_distances[order[-1]]
+            for order in orders
+        ]
+
+        self._clusters_order = orders[int(np.argmin(orders_distances))]
+
+    def _choose_boundary_point(self, cluster_index, target_point):
+        """
+        Выбрать точку кластера, ближайшую к заданной точке на плоскости проекции.
+        """
+        points_indexes = self._clusters_points_indexes[cluster_index]
+        squared_distances = np.square(self._plane_points[points_indexes] - target_point).sum(axis=1)
+
+        return self.route_points[points_indexes[np.argmin(squared_distances)]]
+
+    def _gen_clusters_search_data(self):
+        """
+        Сформировать данные поиска маршрута каждого кластера в порядке обхода.
+        Точками входа и выхода кластера служат ближайшие к его центру точки предыдущего и следующего кластеров.
+        """
+        clusters_search_data = []
+        for position, cluster_index in enumerate(self._clusters_order):
+            center = self._clusters_centers[cluster_index]
+            plane_center = np.array([center[0], center[1] * self._plane_lon_scale])
+
+            if position == 0:
+                in_point = self.in_point
+            else:
+                in_point = self._choose_boundary_point(self._clusters_order[position - 1], plane_center)
+
+            if position == len(self._clusters_order) - 1:
+                out_point = self.out_point
+            else:
+                out_point = self._choose_boundary_point(self._clusters_order[position + 1], plane_center)
+
+            clusters_search_data.append((
+                self.route_points[self._clusters_points_indexes[cluster_index]],
+                in_point,
+                out_point,
+                self.keypoint_distance
+            ))
+
+        return clusters_search_data
+
+    def _solve_clusters(self):
+        """
+        Найти маршруты кластеров, при заданном количестве процессов - параллельно.
+        """
+        genetic_algo_params = self._gen_genetic_algo_params() if self.cluster_finder_type == "genetic" else None
+        route_finder_params = self._gen_route_finder_params()
+        route_finder_params.update(self.cluster_finder_params or {})
+
+        clusters_search_data = self._gen_clusters_search_data()
+        seeds = np.random.randint(np.iinfo(np.int32).max, size=len(clusters_search_data))
+        tasks = [
+            (self.cluster_finder_type, genetic_algo_params, route_finder_params, search_data, int(seed))
+            for search_data, seed in zip(clusters_search_data, seeds)
+        ]
+
+        if self.clusters_workers_count > 0 and len(tasks) > 1:
+            with multiprocessing.Pool(min(self.clusters_workers_count, len(tasks))) as pool:
+                self._clusters_results = pool.starmap(_solve_cluster, tasks)
+        else:
+            self._clusters_results = [_solve_cluster(*task) for task in tasks]
+
+    def _stitch_clusters_routes(self):
+        """
+        Сшить маршруты кластеров в генотип маршрута по всем ключевым точкам.
+        """
+        self._best_genotype = np.concatenate([
+            self._clusters_points_indexes[cluster_index][cluster_genotype]
+            for cluster_index, (cluster_genotype, _) in zip(self._clusters_order, self._clusters_results)
+        ])
+
+    def _calc_genotype_components(self, genotype):
+        """
+        Вычислить составляющие приспособленности маршрута по расстояниям между соседними точками,
+        без матрицы расстояний между всеми ключевыми точками.
+        """
+        route_components = np.zeros(3)
+        if genotype.shape[0] < 2:
+            return route_components
+
+        points = self.route_points[genotype]
+        in_point_distances = calc_points_distances(points[:2], self.in_point)
+        out_point_distances = calc_points_distances(points[-2:], self.out_point)
+        legs_distances = calc_pairs_distances(points[:-1], points[1:])
+
+        if self.route_distance_weight > self.epsilon:
+            route_components[0] = in_point_distances[0] + legs_distances.sum() + out_point_distances[-1]
+
+        if self.route_turns_angle_weight > self.epsilon:
+            route_components[1] = (
+                calc_triangle_angle(in_point_distances[0], legs_distances[0], in_point_distances[1]) +
+                calc_triangle_angle(legs_distances[-1], out_point_distances[-1], out_point_distances[0]) +
+                calc_triangle_angle(
+                    legs_distances[:-1],
+                    legs_distances[1:],
+                    calc_pairs_distances(points[:-2], points[2:])
+                ).sum()
+            )
+
+        if self.route_self_intersection_weight > self.epsilon:
+            route_components[2] = self._segments_intersection_counter.count(genotype)
+
+        return route_components
+
+    def _estimate_best_genotype(self):
+        """
+        Оценить сшитый маршрут функцией приспособленности генетического поиска.
+        """
+        route_components = self._calc_genotype_components(self._best_genotype)
+        self.best_genotype_fitness = float(self._calc_components_fitness(route_components[np.newaxis, :])[0])
+
+        stop_reasons = [stop_reason for _, stop_reason in self._clusters_results if stop_reason is not None]
+        self.stop_reason = collections.Counter(stop_reasons).most_common(1)[0][0] if stop_reasons else None
+
+    def _collect_clusters_statistics(self):
+        """
+        Собрать показатели кластеров в порядке обхода.
+        """
+        self.clusters_statistics = [
+            {
+                "cluster": int(cluster_index),
+                "points_count": int(self._clusters_points_indexes[cluster_index].shape[0]),
+                "stop_reason": stop_reason
+            }
+            for cluster_index, (_, stop_reason) in zip(self._clusters_order, self._clusters_results)
+        ]
+
+    def prepare(self,
+                route_points,
+                in_point,
+                out_point,
+                keypoint_distance
+                ):
+        """
+        Подготовить данные поиска без матрицы расстояний между всеми ключевыми точками.
+
+        :param keypoint_distance: Расстояние между ключевыми точками.
+        :param route_points: Точки маршрута, которые надо посетить.
+        :param in_point: Точка входа в зону обследования.
+        :param out_point: Точка выхода из зоны обследования.
+        """
+        self.route_points = route_points
+        self.in_point = in_point
+        self.out_point = out_point
+        self.keypoint_distance = keypoint_distance
+
+        self._init_best_genotype_hash()
+        self._create_segments_intersection_counter()
+        self._create_points_genome()
+        self._count_mutation_swaps()
+        self._create_random_generator()
+        self._invalidate_fitness_cache()
+        self._calc_route_max_distance()
+        self._calc_route_max_turns_angle()
+        self._calc_route_max_self_intersections()
+        self._project_route_points()
+
+    def find(self,
+             route_points,
+             in_point,
+             out_point,
+             keypoint_distance
+             ):
+        """
+        Найти оптимальный маршрут декомпозицией на кластеры.
+
+        :param keypoint_distance: Расстояние между ключевыми точками.
+        :param route_points: Точки маршрута, которые надо посетить.
+        :param in_point: Точка входа в зону обследования.
+        :param out_point: Точка выхода из зоны обследования.
+        """
+        self.prepare(route_points, in_point, out_point, keypoint_distance)
+
+        self._keep_data("genotype_search_beginning")
+
+        self._split_into_clusters()
+        self._order_clusters()
+        self._solve_clusters()
+        self._stitch_clusters_routes()
+        self._estimate_best_genotype()
+        self._collect_clusters_statistics()
+        self._keep_data("clusters_solving_ending")
+
+        logging.info("Количество кластеров: \t" + str(len(self._clusters_points_indexes)))
+        logging.info("Причина остановки поиска в большинстве кластеров: \t" + str(self.stop_reason))
+        self._keep_data("genotype_search_ending")
+
+        return self._genotype_to_route(self._best_genotype)
@@ -0,0 +1,78 @@
+"""
+Кэш значений, вычисленных для генотипов, с вытеснением давно не использованных записей.
+"""
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+
+class FitnessCache:
+    def __init__(self, max_size=4096):
+        """
+        :param max_size: Наибольшее количество хранимых записей; 0 отключает кэш.
+        """
+        self.max_size = max_size
+
+        self.hits = 0
+        self.misses = 0
+
+        self._signature = None
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _calc_key(genotype):
+        """
+        Вычислить ключ генотипа - 128-битный дайджест BLAKE2 его байтового представления.
+        """
+        return hashlib.blake2b(np.ascontiguousarray(genotype).tobytes(), digest_size=16).digest()
+
+    def get(self, genotype):
+        """
+        Получить сохранённое значение для генотипа или None.
+        """
+        key = self._calc_key(genotype)
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+
+        return value
+
+    def put(self, genotype, value):
+        """
+        Сохранить значение для генотипа, вытеснив при переполнении самую давнюю запись.
+        """
+        if self.max_size <= 0:
+            return
+
+        key = self._calc_key(genotype)
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Удалить все записи и обнулить счётчики.
+        """
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self, signature):
+        """
+        Очистить кэш, если изменились данные, от которых зависят сохранённые значения.
+
+        :param signature: Описание таких данных, сравнимое через ==.
+        """
+        if self._signature != signature:
+            self.clear()
+            self._signature = signature
@@ -16,7 +16,14 @@ class GeneticAlgorithm:
                  max_lifecycles=128,
                  parents_choice_type="panmixia",
                  parents_similarity_type="fitness",
-                 data_keeper_func=None
+                 data_keeper_func=None,
+                 stagnation_lifecycles=None,
+                 min_relative_improvement=None,
+                 improvement_window=8,
+                 time_budget=None,
+                 target_fitness=None,
+                 local_search_scope="children",
+                 local_search_top_count=4
                  ):
         """
         :param population_size: Начальный размер популяции.
@@ -27,6 +34,15 @@ class GeneticAlgorithm:
         :param parents_choice_type: Способ выбора родителей при размножении: panmixia, inbreeding, outbreeding.
         :param parents_similarity_type: Тип сравнения генотипов родителей при размножении: fitness, combination.
         :param data_keeper_func: Функция сохранения данных.
+        :param stagnation_lifecycles: Количество жизненных циклов без улучшения лучшей приспособленности,
+         после которого эволюция останавливается.
+        :param min_relative_improvement: Наименьший относительный прирост лучшей приспособленности
+         за improvement_window жизненных циклов, при котором эволюция продолжается.
+        :param improvement_window: Количество жизненных циклов, за которое оценивается относительный прирост.
+        :param time_budget: Наибольшая длительность эволюции, с.
+        :param target_fitness: Приспособленность, по достижении которой эволюция останавливается.
+        :param local_search_scope: Генотипы, улучшаемые локальным поиском: children - потомки, top - лучшие выжившие.
+        :param local_search_top_count: Количество лучших выживших, улучшаемых локальным поиском.
         """
         self.population_size = population_size
         self.selection_rate = selection_rate
@@ -35,16 +51,39 @@ class GeneticAlgorithm:
         self.parents_choice_type = parents_choice_type
         self.parents_similarity_type = parents_similarity_type
         self.max_lifecycles = max_lifecycles
+        self.stagnation_lifecycles = stagnation_lifecycles
+        self.min_relative_improvement = min_relative_improvement
+        self.improvement_window = improvement_window
+        self.time_budget = time_budget
+        self.target_fitness = target_fitness
+        self.local_search_scope = local_search_scope
+        self.local_search_top_count = local_search_top_count
 
         self.data_keeper_func = data_keeper_func
 
         self.genome = None
         self.genotype_comparison_func = None
+        self.population_comparison_func = None
+        self.population_crossing_func = None
+        self.population_mutation_func = None
+        self.seed_genotypes = None
+        self.local_search_func = None
         self.fitness_func = None
+        self.population_fitness_func = None
         self.crossing_func = None
         self.mutation_func = None
 
         self.lifecycle_counter = 0
+        self._alive_counter = None
+
+        self.stop_reason = None
+        self._best_estimation = None
+        self._best_estimations_history = []
+        self._last_improvement_lifecycle = 0
+        self._evolution_start_time = None
+
+        self.current_population = None
+        self._population_buffer = None
 
     def _keep_data(self, event_name):
         """
@@ -74,74 +113,70 @@ class GeneticAlgorithm:
         """
         self.parent_groups_count = math.floor(self.current_population.shape[0] / self.parents_count)
 
-    def _choose_genotype_sort_func(self):
+    def _calc_parents_sort_order(self):
         """
-        Выбрать функцию для сортировки генотипов при скрещивании.
+        Вычислить порядок генотипов по возрастанию значений их сравнения при группировке родителей.
         """
         if self.parents_similarity_type == "fitness":
-            self._genotype_sort_func = self.fitness_func
+            # Приспособленность выживших уже известна после отбора.
+            similarity_values = self.population_estimation
+        elif self.population_comparison_func is not None:
+            similarity_values = self.population_comparison_func(self.current_population)
         else:
-            self._genotype_sort_func = self.genotype_comparison_func
+            similarity_values = np.array([
+                self.genotype_comparison_func(genotype) for genotype in self.current_population
+            ])
 
-    def _inbreeding_group_parents(self):
+        self._parents_sort_order = np.argsort(similarity_values, kind="stable")
+
+    def _group_sorted_parents(self):
         """
-         Группировать родителей по принципу инбридинга.
+         Группировать родителей по порядку сравнения: в группу попадают соседние по порядку генотипы.
         """
-        sorted_population = sorted(self.current_population, key=self._genotype_sort_func)
+        parents_indexes = self._parents_sort_order[:self.parent_groups_count * self.parents_count]
 
-        parent_groups = []
-        group = []
-        for genotype_index in range(self.parent_groups_count * self.parents_count):
-            group.append(sorted_population[genotype_index])
-            if len(group) == self.parents_count:
-                parent_groups.append(np.array(group))
-                group = []
+        self._parent_groups = self.current_population[parents_indexes].reshape(
+            self.parent_groups_count,
+            self.parents_count,
+            self.current_population.shape[1]
+        )
 
-        self._parent_groups = np.array(parent_groups)
+    def _inbreeding_group_parents(self):
+        """
+         Группировать родителей по принципу инбридинга.
+        """
+        self._group_sorted_parents()
 
     def _outbreeding_group_parents(self):
         """
          Группировать родителей по принципу аутбридинга.
         """
-        sorted_population = sorted(self.current_population, key=self._genotype_sort_func)
-
-        parent_groups = []
-
-        for group_index in range(self.parent_groups_count):
-            group = []
-            for group_parent_index in range(self.parents_count):
-                group.append(sorted_population[group_index * self.parents_count + group_parent_index])
-
-            parent_groups.append(group)
-
-        self._parent_groups = np.array(parent_groups)
+        self._group_sorted_parents()
 
     def _panmixia_group_parents(self):
         """
          Группировать родителей по принципу панмиксии.
         """
-        parent_groups = []
-        group = []
-        for genotype_index in self._genotype_indexes[:self.parent_groups_count * self.parents_count]:
-            group.append(self.current_population[genotype_index])
-            if len(group) == self.parents_count:
-                parent_groups.append(group)
-                group = []
+        parents_indexes = self._genotype_indexes[:self.parent_groups_count * self.parents_count]
 
-        self._parent_groups = np.array(parent_groups)
+        self._parent_groups = self.current_population[parents_indexes].reshape(
+            self.parent_groups_count,
+            self.parents_count,
+            self.current_population.shape[1]
+        )
 
     def _create_inbreeding_parent_groups(self):
         """
         Создать группы родителей популяции по принципу инбридинга.
         """
-        self._choose_genotype_sort_func()
+        self._calc_parents_sort_order()
         self._inbreeding_group_parents()
 
     def _create_outbreeding_parent_groups(self):
         """
         Создать группы родителей популяции по принципу аутбридинга.
         """
-        self._choose_genotype_sort_func()
+        self._calc_parents_sort_order()
         self._outbreeding_group_parents()
 
     def _create_panmixia_parent_groups(self):
@@ -169,19 +204,23 @@ class GeneticAlgorithm:
         """
         self._calc_alive_counter()
         self._calc_deaths_counter()
-        population_estimation = np.flip(np.sort(self.population_estimation))
 
-        self._best_estimations = population_estimation[:self._alive_counter]
+        best_genotype_indexes = np.arange(self.population_estimation.shape[0])
+        if self._alive_counter < self.population_estimation.shape[0]:
+            best_genotype_indexes = np.argpartition(-self.population_estimation, self._alive_counter)
+            best_genotype_indexes = best_genotype_indexes[:self._alive_counter]
+
+        order = np.argsort(-self.population_estimation[best_genotype_indexes], kind="stable")
+        self._best_genotype_indexes = best_genotype_indexes[order]
+        self._best_estimations = self.population_estimation[self._best_genotype_indexes]
 
     def _keep_alive_population(self):
         """
         Оставить в живых часть популяции после естественного отбора.
         """
-        alive_population = []
-        for estimation in self._best_estimations:
-            genotype_index = np.where(self.population_estimation == estimation)[0][0]
-            alive_population.append(self.current_population[genotype_index])
-        self.current_population = np.array(alive_population)
+        self._population_buffer[:self._alive_counter] = self.current_population[self._best_genotype_indexes]
+        self._set_population_size(self._alive_counter)
+        self.population_estimation = self._best_estimations
 
     def _select_alive_genotypes(self):
         """
@@ -207,13 +246,20 @@ class GeneticAlgorithm:
         """
         Скрестить особей групп - размножение.
         """
-        children = []
-        for genotypes_group in self._parent_groups:
-            children.append(self.crossing_func(genotypes_group))
+        population_size = self.current_population.shape[0]
+        self.children_count = len(self._parent_groups)
+        self._ensure_population_capacity(population_size + self.children_count)
+
+        if self.population_crossing_func is not None:
+            self._population_buffer[population_size:population_size + self.children_count] = \
+                self.population_crossing_func(self._parent_groups)
+        else:
+            for group_index in range(self.children_count):
+                self._population_buffer[population_size + group_index] = \
+                    self.crossing_func(self._parent_groups[group_index])
 
-        self.children_count = len(children)
         if self.children_count > 1:
-            self.current_population = np.concatenate((self.current_population, np.array(children)))
+            self._set_population_size(population_size + self.children_count)
 
     def _mutate_genotypes(self):
         """
@@ -221,9 +267,38 @@ class GeneticAlgorithm:
         """
         self._create_shuffled_genotype_indexes()
         self._calc_mutants_count()
-        for genotype_index in self._genotype_indexes[:self.mutants_count]:
-            mutant = self.mutation_func(self.current_population[genotype_index])
-            self.current_population[genotype_index] = mutant
+        mutants_indexes = self._genotype_indexes[:self.mutants_count]
+
+        if self.population_mutation_func is not None:
+            if self.mutants_count > 0:
+                self.current_population[mutants_indexes] = \
+                    self.population_mutation_func(self.current_population[mutants_indexes])
+        else:
+            for genotype_index in mutants_indexes:
+                mutant = self.mutation_func(self.current_population[genotype_index])
+                self.current_population[genotype_index] = mutant
+
+    def _calc_local_search_indexes(self):
+        """
+        Определить индексы генотипов, улучшаемых локальным поиском.
+        """
+        if self.local_search_scope == "top":
+            return np.arange(min(self.local_search_top_count, self.current_population.shape[0]))
+
+        # Потомки размещаются сразу за выжившими.
+        return np.arange(self._alive_counter, self.current_population.shape[0])
+
+    def _search_locally(self):
+        """
+        Улучшить часть генотипов локальным поиском.
+        """
+        if self.local_search_func is None:
+            return
+
+        local_search_indexes = self._calc_local_search_indexes()
+        if local_search_indexes.shape[0] > 0:
+            self.current_population[local_search_indexes] = \
+                self.local_search_func(self.current_population[local_search_indexes])
 
     def _inc_lifecycle_counter(self):
         self.lifecycle_counter += 1
@@ -233,6 +308,7 @@ class GeneticAlgorithm:
         Провести один шаг эволюции.
         """
         self._estimate_population()
+        self._record_best_estimation()
         self._keep_data("lifecycle_step_beginning")
 
         logging.info("Эволюционный цикл: \t" + str(self.lifecycle_counter))
@@ -248,27 +324,98 @@ class GeneticAlgorithm:
         self._create_parents_groups()
         self._cross_population()
         self._mutate_genotypes()
+        self._search_locally()
+
+    def _record_best_estimation(self):
+        """
+        Запомнить лучшую приспособленность, достигнутую к текущему жизненному циклу.
+        """
+        best_estimation = float(np.max(self.population_estimation))
+        if self._best_estimation is None or best_estimation > self._best_estimation:
+            self._best_estimation = best_estimation
+            self._last_improvement_lifecycle = self.lifecycle_counter
+
+        self._best_estimations_history.append(self._best_estimation)
+
+    def _is_stagnated(self):
+        """
+        Проверить, что лучшая приспособленность не улучшалась заданное количество жизненных циклов.
+        """
+        if self.stagnation_lifecycles is None or self._best_estimation is None:
+            return False
+
+        return self.lifecycle_counter - 1 - self._last_improvement_lifecycle >= self.stagnation_lifecycles
+
+    def _is_improvement_slow(self):
+        """
+        Проверить, что относительный прирост лучшей приспособленности за окно жизненных циклов меньше заданного.
+        """
+        if self.min_relative_improvement is None or len(self._best_estimations_history) <= self.improvement_window:
+            return False
+
+        previous_estimation = self._best_estimations_history[-1 - self.improvement_window]
+        improvement = self._best_estimations_history[-1] - previous_estimation
+        if previous_estimation != 0:
+            improvement /= abs(previous_estimation)
+
+        return improvement < self.min_relative_improvement
+
+    def _is_time_budget_exhausted(self):
+        """
+        Проверить, что время эволюции исчерпано.
+        """
+        return self.time_budget is not None and time.time() - self._evolution_start_time >= self.time_budget
+
+    def _is_target_fitness_reached(self):
+        """
+        Проверить, что достигнута целевая приспособленность.
+        """
+        return (self.target_fitness is not None and self._best_estimation is not None
+                and self._best_estimation >= self.target_fitness)
+
+    def _find_stop_reason(self):
+        """
+        Определить причину остановки эволюции или None, если эволюцию можно продолжать.
+        """
+        if self._alive_counter is not None and self._alive_counter <= 2:
+            return "population_exhausted"
+        if self._is_target_fitness_reached():
+            return "target_fitness"
+        if self._is_stagnated():
+            return "stagnation"
+        if self._is_improvement_slow():
+            return "slow_improvement"
+        if self._is_time_budget_exhausted():
+            return "time_budget"
+        if self.lifecycle_counter >= self.max_lifecycles:
+            return "max_lifecycles"
+
+        return None
 
     def _continue_evolution(self) -> bool:
         """
-        Проверить возможность продолжения эволюции.
+        Проверить возможность продолжения эволюции, запомнив причину остановки.
         """
-        return (self.lifecycle_counter < self.max_lifecycles
-                and (not hasattr(self, "_alive_counter") or self._alive_counter > 2))
+        self.stop_reason = self._find_stop_reason()
+
+        return self.stop_reason is None
 
     def _choose_best_genotype(self):
         """
         Выбрать наиболее приспособленный генотип из текущей популяции.
         """
-        max_estimation = np.max(self.population_estimation)
-        genotype_index = np.where(self.population_estimation == max_estimation)[0][0]
+        genotype_index = np.argmax(self.population_estimation)
 
-        return self.current_population[genotype_index], max_estimation
+        return self.current_population[genotype_index].copy(), self.population_estimation[genotype_index]
 
     def _estimate_population(self):
         """
         Оценить приспособленность особей текущей популяции.
         """
+        if self.population_fitness_func is not None:
+            self.population_estimation = np.asarray(self.population_fitness_func(self.current_population))
+            return
+
         population_estimation = []
         for genotype_index in range(self.current_population.shape[0]):
             genotype = self.current_population[genotype_index]
@@ -276,39 +423,172 @@ class GeneticAlgorithm:
 
         self.population_estimation = np.array(population_estimation)
 
-    def _evolution(self):
+    def _live_lifecycle(self):
         """
-        Эволюционировать.
+        Прожить один жизненный цикл, замерив его длительность.
         """
-        while self._continue_evolution():
-            start_lifecycle_time = time.time()
-            self._evolve()
-            self.lifecycle_elapsed_time = time.time() - start_lifecycle_time
+        start_lifecycle_time = time.time()
+        self._evolve()
+        self.lifecycle_elapsed_time = time.time() - start_lifecycle_time
 
-            self._keep_data("lifecycle_step_ending")
+        self._keep_data("lifecycle_step_ending")
 
-            self._inc_lifecycle_counter()
+        self._inc_lifecycle_counter()
 
-        self._estimate_population()
+    def _calc_population_capacity(self):
+        """
+        Вычислить наибольший размер популяции за время эволюции.
+        """
+        population_size = self.population_size
+        self._population_capacity = population_size
+        for lifecycle in range(self.max_lifecycles):
+            alive_counter = math.floor(population_size * self.selection_rate)
+            children_count = math.floor(alive_counter / self.parents_count)
+            population_size = alive_counter + (children_count if children_count > 1 else 0)
+            self._population_capacity = max(self._population_capacity, population_size)
+
+            if alive_counter <= 2:
+                break
+
+    def _allocate_population_buffer(self):
+        """
+        Выделить память под популяцию наибольшего размера.
+        """
+        self._calc_population_capacity()
+        self._population_buffer = np.empty((self._population_capacity, self.genome.shape[0]), dtype=self.genome.dtype)
+
+    def _ensure_population_capacity(self, population_size):
+        """
+        Расширить память под популяцию, если она не вмещает заданное количество генотипов.
+        """
+        if population_size <= self._population_buffer.shape[0]:
+            return
+
+        population_buffer = np.empty((population_size, self._population_buffer.shape[1]), dtype=self._population_buffer.dtype)
+        population_buffer[:self.current_population.shape[0]] = self.current_population
+        self._population_buffer = population_buffer
+        self._set_population_size(self.current_population.shape[0])
+
+    def _set_population_size(self, population_size):
+        """
+        Задать размер текущей популяции, хранящейся в начале выделенной памяти.
+        """
+        self.current_population = self._population_buffer[:population_size]
 
     def _gen_first_population(self):
         """
         Создать первую популяцию.
         """
-        population = []
-        for i in range(self.population_size):
-            genotype = self.genome.copy()
+        self._allocate_population_buffer()
+
+        seeds_count = 0
+        if self.seed_genotypes is not None:
+            seeds_count = min(len(self.seed_genotypes), self.population_size)
+            self._population_buffer[:seeds_count] = self.seed_genotypes[:seeds_count]
+
+        for genotype_index in range(seeds_count, self.population_size):
+            genotype = self._population_buffer[genotype_index]
+            genotype[:] = self.genome
             np.random.shuffle(genotype)
-            population.append(genotype)
 
-        self.current_population = np.array(population)
+        self._set_population_size(self.population_size)
+
+    def start_evolution(self,
+                        genome,
+                        fitness_func,
+                        genotype_comparison_func,
+                        crossing_func,
+                        mutation_func,
+                        population_fitness_func=None,
+                        population_comparison_func=None,
+                        population_crossing_func=None,
+                        population_mutation_func=None,
+                        seed_genotypes=None,
+                        local_search_func=None
+                        ):
+        """
+        Начать эволюцию: задать функции алгоритма и создать первую популяцию.
+        Параметры совпадают с параметрами find_best_genotype.
+        """
+        self.genome = genome
+        self.fitness_func = fitness_func
+        self.genotype_comparison_func = genotype_comparison_func
+        self.crossing_func = crossing_func
+        self.mutation_func = mutation_func
+        self.population_fitness_func = population_fitness_func
+        self.population_comparison_func = population_comparison_func
+        self.population_crossing_func = population_crossing_func
+        self.population_mutation_func = population_mutation_func
+        self.seed_genotypes = seed_genotypes
+        self.local_search_func = local_search_func
+
+        self.lifecycle_counter = 0
+        self._alive_counter = None
+
+        self.stop_reason = None
+        self._best_estimation = None
+        self._best_estimations_history = []
+        self._last_improvement_lifecycle = 0
+        self._evolution_start_time = time.time()
+
+        self._keep_data("evolution_beginning")
+
+        self._gen_first_population()
+
+    def evolve(self, lifecycles):
+        """
+        Провести не более заданного количества жизненных циклов.
+        Вернуть признак возможности продолжения эволюции.
+        """
+        last_lifecycle = self.lifecycle_counter + lifecycles
+        while self.lifecycle_counter < last_lifecycle and self._continue_evolution():
+            self._live_lifecycle()
+
+        return self._continue_evolution()
+
+    def choose_best_genotypes(self, count):
+        """
+        Оценить текущую популяцию и выбрать копии не более count наиболее приспособленных генотипов
+        вместе с их приспособленностью.
+        """
+        self._estimate_population()
+
+        best_indexes = np.argsort(-self.population_estimation, kind="stable")[:count]
+
+        return self.current_population[best_indexes].copy(), self.population_estimation[best_indexes].copy()
+
+    def accept_genotypes(self, genotypes):
+        """
+        Заменить наименее приспособленные генотипы текущей популяции заданными.
+        Используется после choose_best_genotypes, пока оценки популяции актуальны.
+        """
+        count = min(len(genotypes), self.current_population.shape[0])
+        if count == 0:
+            return
+
+        worst_indexes = np.argsort(self.population_estimation, kind="stable")[:count]
+        self.current_population[worst_indexes] = genotypes[:count]
+
+    def finish_evolution(self):
+        """
+        Завершить эволюцию: оценить итоговую популяцию и выбрать наилучший генотип.
+        """
+        self._estimate_population()
+
+        return self._choose_best_genotype()
 
     def find_best_genotype(self,
                            genome,
                            fitness_func,
                            genotype_comparison_func,
                            crossing_func,
-                           mutation_func
+                           mutation_func,
+                           population_fitness_func=None,
+                           population_comparison_func=None,
+                           population_crossing_func=None,
+                           population_mutation_func=None,
+                           seed_genotypes=None,
+                           local_search_func=None
                            ):
         """
         Подобрать наилучший генотип путём эволюции.
@@ -318,17 +598,26 @@ class GeneticAlgorithm:
         :param genotype_comparison_func: Функция сравнения генотипов.
         :param crossing_func: Функция скрещивания особей.
         :param mutation_func: Функция мутации генотипа.
-        """
-        self.genome = genome
-        self.fitness_func = fitness_func
-        self.genotype_comparison_func = genotype_comparison_func
-        self.crossing_func = crossing_func
-        self.mutation_func = mutation_func
-
-        self._keep_data("evolution_beginning")
-
-        self._gen_first_population()
-
-        self._evolution()
+        :param population_fitness_func: Функция приспособленности всей популяции, заданной матрицей генотипов.
+        :param population_comparison_func: Функция сравнения всех генотипов популяции, заданной матрицей генотипов.
+        :param population_crossing_func: Функция скрещивания всех групп родителей, заданных тензором генотипов.
+        :param population_mutation_func: Функция мутации всех мутантов, заданных матрицей генотипов.
+        :param seed_genotypes: Матрица генотипов, включаемых в первую популяцию вместо случайных.
+        :param local_search_func: Функция локального улучшения генотипов, заданных матрицей.
+        """
+        self.start_evolution(
+            genome,
+            fitness_func,
+            genotype_comparison_func,
+            crossing_func,
+            mutation_func,
+            population_fitness_func,
+            population_comparison_func,
+            population_crossing_func,
+            population_mutation_func,
+            seed_genotypes,
+            local_search_func
+        )
+        self.evolve(self.max_lifecycles)
 
-        return self._choose_best_genotype()
+        return self.finish_evolution()
@@ -2,10 +2,19 @@
 Применение генетического алгоритма для поиска оптимальной комбинации путевых точек - маршрута.
 """
 import math
+import time
 import random
+import tempfile
+import hashlib
+import logging
 import numpy as np
-from shapely.geometry import LineString
-from survey_route_generation.geo.geo import calc_distance, calc_3_points_angle
+from survey_route_generation.geo.geo import calc_distance_matrix, fill_distance_matrix, calc_points_distances, \
+    calc_triangle_angle
+from survey_route_generation.geo.segments_intersection import SegmentsIntersectionCounter
+from survey_route_generation.genetic.fitness_cache import FitnessCache
+from survey_route_generation.genetic.parallel_fitness import ParallelFitnessEstimator
+from survey_route_generation.heuristics.route_seeds_generator import RouteSeedsGenerator
+from survey_route_generation.heuristics.route_local_search import RouteLocalSearch
 
 
 class GeneticOptimalRouteFinder:
@@ -17,7 +26,17 @@ class GeneticOptimalRouteFinder:
                  route_turns_angle_weight=1.5,
                  route_self_intersection_weight=2,
                  repair_route_genotypes=True,
-                 data_keeper_func=None
+                 data_keeper_func=None,
+                 batch_fitness_estimation=True,
+                 fitness_cache_size=4096,
+                 crossing_type="first_unused",
+                 fitness_workers_count=0,
+                 seeding_rate=0.0,
+                 local_search=False,
+                 local_search_time_cap=0.05,
+                 compact_dtypes=False,
+                 distance_matrix_memmap_threshold=None,
+                 distance_matrix_memmap_dir=None
                  ):
         """
         :param genetic_algo: Генетический алгоритм.
@@ -28,6 +47,17 @@ class GeneticOptimalRouteFinder:
         :param route_self_intersection_weight: Вес значимости самопересечений для функции оценки приспособленности.
         :param repair_route_genotypes: Применять ли к генотипам правило "ближайших точек".
         :param data_keeper_func: Функция сохранения данных.
+        :param batch_fitness_estimation: Оценивать ли приспособленность всей популяции за один векторизованный проход.
+        :param fitness_cache_size: Количество генотипов, составляющие приспособленности которых хранятся в кэше.
+        :param crossing_type: Способ скрещивания: first_unused, order.
+        :param fitness_workers_count: Количество процессов для параллельной оценки приспособленности; 0 - без пула.
+        :param seeding_rate: Доля первой популяции, заполняемая маршрутами конструктивных эвристик.
+        :param local_search: Улучшать ли генотипы локальным поиском 2-opt и Or-opt на каждом жизненном цикле.
+        :param local_search_time_cap: Наибольшая длительность локального поиска за жизненный цикл, с.
+        :param compact_dtypes: Хранить ли генотипы в int16/int32, а матрицу расстояний - в float32.
+        :param distance_matrix_memmap_threshold: Количество ключевых точек, начиная с которого матрица расстояний
+         хранится в отображённом на диск файле; None - всегда в памяти.
+        :param distance_matrix_memmap_dir: Каталог файла матрицы расстояний; None - системный временный каталог.
         """
 
         self.genetic_algo = genetic_algo
@@ -37,16 +67,47 @@ class GeneticOptimalRouteFinder:
         self.route_turns_angle_weight = route_turns_angle_weight
         self.route_self_intersection_weight = route_self_intersection_weight
         self.repair_route_genotypes = repair_route_genotypes
+        self.batch_fitness_estimation = batch_fitness_estimation
+        self.crossing_type = crossing_type
+        self.fitness_workers_count = fitness_workers_count
+        self.seeding_rate = seeding_rate
+        self.local_search = local_search
+        self.local_search_time_cap = local_search_time_cap
+        self.compact_dtypes = compact_dtypes
+        self.distance_matrix_memmap_threshold = distance_matrix_memmap_threshold
+        self.distance_matrix_memmap_dir = distance_matrix_memmap_dir
 
         self.data_keeper_func = data_keeper_func
 
         self.best_genotype_hash = None
+        self.stop_reason = None
+        self.survey_problem = None
 
         self.route_points = None
         self.in_point = None
         self.out_point = None
         self.keypoint_distance = None
         self.epsilon = 0.000000001
+        # Наибольшее количество точек маршрута, для которого таблица углов поворота хранится целиком.
+        self.dense_turns_angle_table_limit = 128
+        # Доля от количества точек маршрута, до которой перестановки генов пересчитываются инкрементально.
+        self.delta_fitness_swaps_rate = 0.0625
+        # Количество ближайших соседей каждой точки, проверяемых при корректировке генотипа.
+        self.repair_neighbors_count = 8
+        # Наименьшее количество оцениваемых маршрутов, при котором их оценка распределяется между процессами.
+        self.parallel_fitness_min_routes = 32
+        # Количество строк матрицы расстояний, обрабатываемых за один проход при её заполнении и поиске соседей.
+        self.distance_matrix_rows_block_size = 256
+
+        self.fitness_cache = FitnessCache(fitness_cache_size)
+        self._rng = None
+        self._parallel_fitness_estimator = None
+        self._route_local_search = None
+        self._distance_matrix_file = None
+
+        self.local_search_moves = 0
+        self.local_search_improved_routes = 0
+        self.local_search_elapsed_time = 0
 
     def _keep_data(self, event_name):
         """
@@ -88,11 +149,11 @@ class GeneticOptimalRouteFinder:
         Добавить к значению размера поворотов маршрута повороты между точками маршрута.
         """
         if route_index < (route.shape[0] - 2):
-            point = self._get_gen_point(route[route_index])
-            next_point = self._get_gen_point(route[route_index + 1])
-            after_next_point = self._get_gen_point(route[route_index + 2])
-
-            self.route_turns_angle += calc_3_points_angle(point, next_point, after_next_point)
+            self.route_turns_angle += self._get_gens_angle(
+                route[route_index],
+                route[route_index + 1],
+                route[route_index + 2]
+            )
 
     def _calc_fitness_values(self, route):
         """
@@ -105,20 +166,23 @@ class GeneticOptimalRouteFinder:
             if self.route_turns_angle_weight > self.epsilon:
                 self._add_route_angles(route, route_index)
 
-            if self.route_self_intersection_weight > self.epsilon:
-                self._calc_route_self_intersection(route, route_index)
+        if self.route_self_intersection_weight > self.epsilon:
+            self._calc_route_self_intersections(route)
 
     def _add_start_end_angles(self, route):
         """
         Добавить к значению размера поворотов маршрута повороты между точкой входа и точкой выхода.
         """
-        first_point = self._get_gen_point(route[0])
-        second_point = self._get_gen_point(route[1])
-        last_point = self._get_gen_point(route.shape[0] - 1)
-        pre_last_point = self._get_gen_point(route.shape[0] - 2)
-
-        self.route_turns_angle += calc_3_points_angle(self.in_point, first_point, second_point)
-        self.route_turns_angle += calc_3_points_angle(pre_last_point, last_point, self.out_point)
+        self.route_turns_angle += calc_triangle_angle(
+            self._in_point_distances[route[0]],
+            self._get_gens_distance(route[0], route[1]),
+            self._in_point_distances[route[1]]
+        )
+        self.route_turns_angle += calc_triangle_angle(
+            self._get_gens_distance(route[-1], route[-2]),
+            self._out_point_distances[route[-1]],
+            self._out_point_distances[route[-2]]
+        )
 
     def _add_route_distance(self, route, route_index):
         """
@@ -130,26 +194,14 @@ class GeneticOptimalRouteFinder:
         """
         Добавить к значению длины маршрута расстояния между точками входа и выхода.
         """
-        first_point = self._get_gen_point(route[0])
-        last_point = self._get_gen_point(route.shape[0] - 1)
-
-        self.route_distance += calc_distance(self.in_point, first_point)
-        self.route_distance += calc_distance(last_point, self.out_point)
+        self.route_distance += self._in_point_distances[route[0]]
+        self.route_distance += self._out_point_distances[route[-1]]
 
-    def _calc_route_self_intersection(self, route, route_index):
+    def _calc_route_self_intersections(self, route):
         """
         Посчитать количество само-пересечений.
         """
-        point = self._get_gen_point(route[route_index])
-        next_point = self._get_gen_point(route[route_index + 1])
-        line1 = LineString([point, next_point])
-
-        for j in range(route_index + 1, route.shape[0] - 1):
-            point3 = self._get_gen_point(route[j])
-            point4 = self._get_gen_point(route[j+1])
-            line2 = LineString([point3, point4])
-            if line1.crosses(line2):
-                self.route_self_intersections += 1
+        self.route_self_intersections = self._segments_intersection_counter.count(route)
 
     def _init_fitness_values(self):
         """
@@ -163,6 +215,24 @@ class GeneticOptimalRouteFinder:
         self.normalized_route_turns_angle = 0
         self.normalized_route_self_intersections = 0
 
+    def _get_route_components(self, route):
+        """
+        Получить копию сохранённых составляющих приспособленности маршрута: длины, суммы углов поворотов
+        и количества самопересечений. Если маршрут не оценивался, вернуть None.
+        """
+        route_components = self.fitness_cache.get(route)
+        if route_components is None:
+            return None
+
+        return route_components.copy()
+
+    def _store_route_components(self, route, route_components):
+        """
+        Сохранить составляющие приспособленности маршрута.
+        """
+        if route_components is not None:
+            self.fitness_cache.put(route, route_components.copy())
+
     def _route_fitness(self, route, route_id=None):
         """
         Посчитать приспособленность маршрута.
@@ -170,13 +240,22 @@ class GeneticOptimalRouteFinder:
         self._init_fitness_values()
         self.route_id = route_id
 
-        if self.route_distance_weight > self.epsilon:
-            self._add_start_end_distances(route)
+        route_components = self._get_route_components(route)
+        if route_components is not None:
+            self.route_distance, self.route_turns_angle, self.route_self_intersections = route_components
+        else:
+            if self.route_distance_weight > self.epsilon:
+                self._add_start_end_distances(route)
 
-        if self.route_turns_angle_weight > self.epsilon:
-            self._add_start_end_angles(route)
+            if self.route_turns_angle_weight > self.epsilon:
+                self._add_start_end_angles(route)
+
+            self._calc_fitness_values(route)
 
-        self._calc_fitness_values(route)
+            self._store_route_components(
+                route,
+                np.array([self.route_distance, self.route_turns_angle, self.route_self_intersections], dtype=float)
+            )
 
         if self.route_distance_weight > self.epsilon:
             self._normalize_route_distance()
@@ -191,10 +270,118 @@ class GeneticOptimalRouteFinder:
 
         return self._calc_route_fitness()
 
+    def _calc_population_distances(self, population):
+        """
+        Вычислить длины маршрутов популяции вместе с расстояниями от точки входа и до точки выхода.
+        """
+        distances = self._in_point_distances[population[:, 0]] + self._out_point_distances[population[:, -1]]
+
+        return distances + self._distance_matrix[population[:, :-1], population[:, 1:]].sum(axis=1, dtype=np.float64)
+
+    def _calc_population_turns_angles(self, population):
+        """
+        Вычислить суммы углов поворотов маршрутов популяции вместе с поворотами в первой и последней точках.
+        """
+        turns_angles = calc_triangle_angle(
+            self._in_point_distances[population[:, 0]],
+            self._distance_matrix[population[:, 0], population[:, 1]],
+            self._in_point_distances[population[:, 1]]
+        )
+        turns_angles += calc_triangle_angle(
+            self._distance_matrix[population[:, -1], population[:, -2]],
+            self._out_point_distances[population[:, -1]],
+            self._out_point_distances[population[:, -2]]
+        )
+
+        return turns_angles + self._get_gens_angle(
+            population[:, :-2],
+            population[:, 1:-1],
+            population[:, 2:]
+        ).sum(axis=1, dtype=np.float64)
+
+    def _calc_population_self_intersections(self, population):
+        """
+        Вычислить количества самопересечений маршрутов популяции.
+        """
+        return self._segments_intersection_counter.count_population(population)
+
+    def _calc_population_fitness(self):
+        """
+        Посчитать значения функции приспособленности для маршрутов популяции.
+        """
+        return (self.population_normalized_route_turns_angle * self.route_turns_angle_weight -
+                self.population_normalized_route_distance * self.route_distance_weight -
+                self.population_normalized_route_self_intersections * self.route_self_intersection_weight +
+                self.route_distance_weight + self.route_turns_angle_weight + self.route_self_intersection_weight
+                )
+
+    def _calc_population_components(self, population):
+        """
+        Вычислить составляющие приспособленности маршрутов популяции.
+        """
+        if self._parallel_fitness_estimator is not None and population.shape[0] >= self.parallel_fitness_min_routes:
+            return self._parallel_fitness_estimator.calc_population_components(population)
+
+        population_components = np.zeros((population.shape[0], 3))
+
+        if self.route_distance_weight > self.epsilon:
+            population_components[:, 0] = self._calc_population_distances(population)
+
+        if self.route_turns_angle_weight > self.epsilon:
+            population_components[:, 1] = self._calc_population_turns_angles(population)
+
+        if self.route_self_intersection_weight > self.epsilon:
+            population_components[:, 2] = self._calc_population_self_intersections(population)
+
+        return population_components
+
+    def _estimate_population_components(self, population):
+        """
+        Получить составляющие приспособленности маршрутов популяции, вычисляя только неизвестные.
+        """
+        population_components = np.empty((population.shape[0], 3))
+        unknown_routes = []
+        for route_index in range(population.shape[0]):
+            route_components = self.fitness_cache.get(population[route_index])
+            if route_components is None:
+                unknown_routes.append(route_index)
+            else:
+                population_components[route_index] = route_components
+
+        if len(unknown_routes) > 0:
+            population_components[unknown_routes] = self._calc_population_components(population[unknown_routes])
+            for route_index in unknown_routes:
+                self.fitness_cache.put(population[route_index], population_components[route_index].copy())
+
+        return population_components
+
+    def _population_fitness(self, population):
+        """
+        Посчитать приспособленность всех маршрутов популяции, заданной матрицей генотипов.
+        """
+        population_components = self._estimate_population_components(population)
+
+        self.population_route_distance = population_components[:, 0]
+        self.population_route_turns_angle = population_components[:, 1]
+        self.population_route_self_intersections = population_components[:, 2]
+
+        self.population_normalized_route_distance = self.population_route_distance / self.max_route_distance
+        self.population_normalized_route_turns_angle = self.population_route_turns_angle / self.max_route_turns_angle
+        self.population_normalized_route_self_intersections = (
+                self.population_route_self_intersections / self.max_route_self_intersections
+        )
+
+        self._keep_data("population_fitness_calculation")
+
+        return self._calc_population_fitness()
+
     def _cross_routes(self, route_group):
         """
         Скрестить несколько маршрутов в один.
         """
+        if self.crossing_type == "order":
+            return self._cross_route_groups(np.asarray(route_group)[np.newaxis])[0]
+
         points_usage = np.full(self.route_points.shape[0], False)
 
         child_genotype = []
@@ -210,6 +397,83 @@ class GeneticOptimalRouteFinder:
         else:
             return np.array(child_genotype)
 
+    @staticmethod
+    def _calc_route_groups_genes_positions(route_groups):
+        """
+        Вычислить позиции генов в каждом генотипе групп маршрутов.
+        """
+        # Позиции храним в intp: в компактном типе генов произведение позиции на число родителей переполняется.
+        genes_positions = np.empty(route_groups.shape, dtype=np.intp)
+        np.put_along_axis(genes_positions, route_groups, np.arange(route_groups.shape[2]), axis=2)
+
+        return genes_positions
+
+    @staticmethod
+    def _calc_first_unused_genes_order(genes_positions):
+        """
+        Вычислить для каждого гена номер шага, на котором он впервые встречается
+        при обходе позиций генотипов группы, а внутри позиции - самих генотипов.
+        """
+        parents_count = genes_positions.shape[1]
+        parents_indexes = np.arange(parents_count)[:, np.newaxis]
+
+        return np.min(genes_positions * parents_count + parents_indexes, axis=1)
+
+    def _cross_first_unused_route_groups(self, route_groups):
+        """
+        Скрестить маршруты каждой группы, выбирая по порядку позиций первый неиспользованный ген родителей.
+        """
+        genes_positions = self._calc_route_groups_genes_positions(route_groups)
+        genes_order = self._calc_first_unused_genes_order(genes_positions)
+
+        return np.argsort(genes_order, axis=1).astype(route_groups.dtype)
+
+    def _cross_order_route_groups(self, route_groups):
+        """
+        Скрестить маршруты каждой группы упорядоченным скрещиванием:
+        случайный участок первого родителя остаётся на месте,
+        остальные позиции по порядку заполняются недостающими генами прочих родителей.
+        """
+        groups_count, parents_count, genes_count = route_groups.shape
+        genes_positions = self._calc_route_groups_genes_positions(route_groups)
+
+        cuts = np.sort(np.random.randint(0, genes_count + 1, size=(groups_count, 2)), axis=1)
+        positions = np.arange(genes_count)
+        segment_positions = (positions >= cuts[:, :1]) & (positions < cuts[:, 1:])
+
+        first_parent_positions = genes_positions[:, 0]
+        segment_genes = np.take_along_axis(segment_positions, first_parent_positions, axis=1)
+
+        if parents_count > 1:
+            rest_genes_order = self._calc_first_unused_genes_order(genes_positions[:, 1:])
+        else:
+            rest_genes_order = first_parent_positions
+
+        # Гены участка ставим в конец порядка, сохраняя их позиции в первом родителе.
+        genes_order = np.where(segment_genes, genes_count * parents_count + first_parent_positions, rest_genes_order)
+        ordered_genes = np.argsort(genes_order, axis=1)
+        ordered_positions = np.argsort(segment_positions, axis=1, kind="stable")
+
+        children = np.empty((groups_count, genes_count), dtype=route_groups.dtype)
+        np.put_along_axis(children, ordered_positions, ordered_genes, axis=1)
+
+        return children
+
+    def _cross_route_groups(self, route_groups):
+        """
+        Скрестить маршруты всех групп за один проход - по одному потомку на группу.
+        """
+        if self.crossing_type == "order":
+            children = self._cross_order_route_groups(route_groups)
+        else:
+            children = self._cross_first_unused_route_groups(route_groups)
+
+        if self.repair_route_genotypes:
+            for child in children:
+                self._repair_genotype(child)
+
+        return children
+
     def _calc_genotype_positions_weight(self, genotype):
         """
         Вычислить позиционный вес генотипа.
@@ -217,44 +481,334 @@ class GeneticOptimalRouteFinder:
         weight = 0
         pos_index = 0
         for point_index in genotype:
-            weight += pos_index * point_index
+            weight += pos_index * int(point_index)
             pos_index += 1
 
         return weight
 
+    def _mask_repeated_indexes(self, indexes, low, high):
+        """
+        Упорядочить индексы в строках и построить маску индексов из диапазона [low, high], исключив повторы.
+        """
+        indexes = np.sort(indexes, axis=1)
+        valid = (indexes >= low) & (indexes <= high)
+        valid[:, 1:] &= indexes[:, 1:] != indexes[:, :-1]
+
+        return indexes, valid
+
+    def _calc_population_edges_distance(self, population, edges):
+        """
+        Вычислить для каждого маршрута популяции сумму длин заданных рёбер.
+        Ребро k соединяет k-ю и (k+1)-ю точки маршрута, ребро -1 ведёт из точки входа, а последнее - в точку выхода.
+        """
+        edges, valid = self._mask_repeated_indexes(edges, -1, population.shape[1] - 1)
+        rows = np.arange(population.shape[0])[:, np.newaxis]
+
+        from_gens = population[rows, np.clip(edges, 0, population.shape[1] - 1)]
+        to_gens = population[rows, np.clip(edges + 1, 0, population.shape[1] - 1)]
+
+        distances = self._distance_matrix[from_gens, to_gens]
+        distances = np.where(edges < 0, self._in_point_distances[to_gens], distances)
+        distances = np.where(edges + 1 >= population.shape[1], self._out_point_distances[from_gens], distances)
+
+        return np.where(valid, distances, 0.0).sum(axis=1)
+
+    def _calc_population_positions_turns_angle(self, population, positions):
+        """
+        Вычислить для каждого маршрута популяции сумму углов поворотов в заданных позициях,
+        учитывая точки входа и выхода для крайних позиций.
+        """
+        positions, valid = self._mask_repeated_indexes(positions, 0, population.shape[1] - 1)
+        rows = np.arange(population.shape[0])[:, np.newaxis]
+        has_previous = positions > 0
+        has_next = positions < population.shape[1] - 1
+
+        gens = population[rows, np.clip(positions, 0, population.shape[1] - 1)]
+        previous_gens = population[rows, np.clip(positions - 1, 0, population.shape[1] - 1)]
+        next_gens = population[rows, np.clip(positions + 1, 0, population.shape[1] - 1)]
+
+        previous_distances = np.where(
+            has_previous,
+            self._distance_matrix[gens, previous_gens],
+            self._in_point_distances[gens]
+        )
+        next_distances = np.where(
+            has_next,
+            self._distance_matrix[gens, next_gens],
+            self._out_point_distances[gens]
+        )
+        chord_distances = np.where(
+            has_previous,
+            np.where(has_next, self._distance_matrix[previous_gens, next_gens], self._out_point_distances[previous_gens]),
+            self._in_point_distances[next_gens]
+        )
+
+        angles = calc_triangle_angle(previous_distances, next_distances, chord_distances)
+
+        return np.where(valid, angles, 0.0).sum(axis=1)
+
+    def _calc_population_segments_self_intersections(self, population, segments):
+        """
+        Вычислить для каждого маршрута популяции количество самопересечений с участием заданных отрезков.
+        """
+        segments, valid = self._mask_repeated_indexes(segments, 0, population.shape[1] - 2)
+
+        return self._segments_intersection_counter.count_population_segments(population, segments, valid)
+
+    def _calc_population_swap_components(self, population, indexes1, indexes2):
+        """
+        Вычислить для маршрутов популяции составляющие приспособленности, которые зависят от переставляемых генов.
+        """
+        swap_components = np.zeros((population.shape[0], 3))
+        indexes = np.stack([indexes1, indexes2], axis=1)
+
+        if self.route_distance_weight > self.epsilon:
+            swap_components[:, 0] = self._calc_population_edges_distance(
+                population,
+                np.concatenate([indexes - 1, indexes], axis=1)
+            )
+
+        if self.route_turns_angle_weight > self.epsilon:
+            swap_components[:, 1] = self._calc_population_positions_turns_angle(
+                population,
+                np.concatenate([indexes - 1, indexes, indexes + 1], axis=1)
+            )
+
+        if self.route_self_intersection_weight > self.epsilon:
+            swap_components[:, 2] = self._calc_population_segments_self_intersections(
+                population,
+                np.concatenate([indexes - 1, indexes], axis=1)
+            )
+
+        return swap_components
+
+    def _swap_population_genes(self, population, indexes1, indexes2, population_components=None):
+        """
+        Переставить в каждом маршруте популяции пару генов.
+        Если известны составляющие приспособленности маршрутов, обновить их по затронутым рёбрам, углам и отрезкам.
+        """
+        rows = np.arange(population.shape[0])
+
+        if population_components is not None:
+            population_components -= self._calc_population_swap_components(population, indexes1, indexes2)
+
+        genes1 = population[rows, indexes1]
+        population[rows, indexes1] = population[rows, indexes2]
+        population[rows, indexes2] = genes1
+
+        if population_components is not None:
+            population_components += self._calc_population_swap_components(population, indexes1, indexes2)
+
+    def _swap_route_genes(self, route, index1, index2, route_components=None):
+        """
+        Переставить пару генов маршрута, обновив составляющие его приспособленности, если они известны.
+        """
+        if route_components is None:
+            temp = route[index1]
+            route[index1] = route[index2]
+            route[index2] = temp
+        elif index1 != index2:
+            population_components = route_components[np.newaxis, :]
+            self._swap_population_genes(
+                route[np.newaxis, :],
+                np.array([index1]),
+                np.array([index2]),
+                population_components
+            )
+
+    def _replay_repair_swaps(self, route, route_components):
+        """
+        Повторить перестановки последней корректировки генотипа на исходном маршруте, обновляя составляющие
+        его приспособленности. Если перестановок слишком много, составляющие считаются неизвестными.
+        """
+        if route_components is None or len(self._repair_swaps) > self._delta_swaps_limit:
+            return None
+
+        for index1, index2 in self._repair_swaps:
+            self._swap_route_genes(route, index1, index2, route_components)
+
+        return route_components
+
+    def _calc_population_positions_weight(self, population):
+        """
+        Вычислить позиционные веса всех генотипов популяции.
+        """
+        return population @ np.arange(population.shape[1])
+
     def _mutate_route(self, route):
         """
         Мутировать маршрут путём случайных перестановок в порядке следования.
         """
+        route_components = None
+        if self.mutation_swap_count <= self._delta_swaps_limit:
+            route_components = self._get_route_components(route)
+
         for i in range(self.mutation_swap_count):
             index1 = random.randint(0, self.route_points.shape[0] - 1)
             index2 = random.randint(0, self.route_points.shape[0] - 1)
-            temp = route[index1]
-            route[index1] = route[index2]
-            route[index2] = temp
+            self._swap_route_genes(route, index1, index2, route_components)
 
         if self.repair_route_genotypes:
-            return self._repair_genotype(route)
-        else:
-            return route
+            initial_route = route.copy()
+            route = self._repair_genotype(route)
+            route_components = self._replay_repair_swaps(initial_route, route_components)
+
+        self._store_route_components(route, route_components)
+
+        return route
+
+    def _draw_population_swap_indexes(self, population_size):
+        """
+        Вытянуть индексы всех пар переставляемых генов всех мутантов одним обращением к генератору случайных чисел.
+        """
+        return self._rng.integers(
+            0,
+            self.route_points.shape[0],
+            size=(population_size, self.mutation_swap_count, 2)
+        )
+
+    def _get_population_components(self, population):
+        """
+        Получить копии сохранённых составляющих приспособленности маршрутов популяции
+        и маску маршрутов, для которых они известны.
+        """
+        population_components = np.zeros((population.shape[0], 3))
+        known_routes = np.full(population.shape[0], False)
+        for route_index in range(population.shape[0]):
+            route_components = self.fitness_cache.get(population[route_index])
+            if route_components is not None:
+                population_components[route_index] = route_components
+                known_routes[route_index] = True
+
+        return population_components, known_routes
+
+    def _apply_population_swaps(self, population, swap_indexes, population_components=None):
+        """
+        Применить к маршрутам популяции последовательности перестановок генов.
+        Шаги последовательностей выполняются по очереди, каждый шаг - сразу для всех маршрутов.
+        """
+        for swap_index in range(swap_indexes.shape[1]):
+            self._swap_population_genes(
+                population,
+                swap_indexes[:, swap_index, 0],
+                swap_indexes[:, swap_index, 1],
+                population_components
+            )
+
+    def _mutate_population(self, population):
+        """
+        Мутировать все маршруты популяции, заданной матрицей генотипов, случайными перестановками генов.
+        """
+        swap_indexes = self._draw_population_swap_indexes(population.shape[0])
+
+        population_components = None
+        known_routes = np.full(population.shape[0], False)
+        if self.mutation_swap_count <= self._delta_swaps_limit:
+            population_components, known_routes = self._get_population_components(population)
+
+        if np.any(known_routes):
+            known_population = population[known_routes]
+            known_components = population_components[known_routes]
+            self._apply_population_swaps(known_population, swap_indexes[known_routes], known_components)
+            population[known_routes] = known_population
+            population_components[known_routes] = known_components
+
+        if not np.all(known_routes):
+            unknown_routes = ~known_routes
+            unknown_population = population[unknown_routes]
+            self._apply_population_swaps(unknown_population, swap_indexes[unknown_routes])
+            population[unknown_routes] = unknown_population
+
+        for route_index in range(population.shape[0]):
+            route = population[route_index]
+            route_components = population_components[route_index] if known_routes[route_index] else None
+
+            if self.repair_route_genotypes:
+                initial_route = route.copy()
+                self._repair_genotype(route)
+                route_components = self._replay_repair_swaps(initial_route, route_components)
+
+            self._store_route_components(route, route_components)
+
+        return population
+
+    def _scan_nearest_next_gen_index(self, genes, gen_index, near_distance):
+        """
+        Найти позицию ближайшего следующего гена полным просмотром оставшейся части маршрута.
+        """
+        distances = self._distance_matrix[genes[gen_index], genes[gen_index + 1:]]
+
+        near_indexes = np.flatnonzero(distances < near_distance)
+        if near_indexes.shape[0] > 0:
+            return gen_index + 1 + int(near_indexes[0])
+
+        # При равных расстояниях выбирается самая дальняя позиция.
+        return len(genes) - 1 - int(np.argmin(distances[::-1]))
+
+    def _find_nearest_next_gen_index(self, genes, gens_positions, gen_index, near_distance):
+        """
+        Найти позицию гена, который должен следовать за геном в заданной позиции:
+        самую раннюю из позиций генов ближе порогового расстояния, а если таких нет - позицию ближайшего гена.
+        Проверяются только соседи гена из его списка ближайших; если по ним ответ не гарантирован,
+        выполняется полный просмотр.
+        """
+        gen = genes[gen_index]
+        neighbor_genes = self._neighbor_genes[gen]
+        neighbor_distances = self._neighbor_distances[gen]
+
+        near_index = None
+        nearest_index = None
+        nearest_distance = None
+        for neighbor_gen, distance in zip(neighbor_genes, neighbor_distances):
+            position = gens_positions[neighbor_gen]
+            if position <= gen_index:
+                continue
+
+            if distance < near_distance and (near_index is None or position < near_index):
+                near_index = position
+
+            if nearest_distance is None or distance < nearest_distance or \
+                    (distance == nearest_distance and position > nearest_index):
+                nearest_distance = distance
+                nearest_index = position
+
+        # Гены вне списка соседей не ближе последнего соседа.
+        neighbors_complete = len(neighbor_genes) == len(genes) - 1
+        farthest_neighbor_distance = neighbor_distances[-1] if len(neighbor_distances) > 0 else 0
+
+        if neighbors_complete or farthest_neighbor_distance >= near_distance:
+            if near_index is not None:
+                return near_index
+            if nearest_index is not None and (neighbors_complete or nearest_distance < farthest_neighbor_distance):
+                return nearest_index
+
+        return self._scan_nearest_next_gen_index(genes, gen_index, near_distance)
 
     def _repair_genotype(self, route):
         """
         Корректировка генотипа.
         """
-        for gen_index in range(route.shape[0] - 1):
-            min_dist = None
-            nearest_next_gen_index = None
-            for next_gen_index in range(route.shape[0] - 1, gen_index, -1):
-                dist = self._get_gens_distance(route[gen_index], route[next_gen_index])
-                if min_dist is None or (dist < self.keypoint_distance * 1.15) or dist < min_dist:
-                    min_dist = dist
-                    nearest_next_gen_index = next_gen_index
+        self._repair_swaps = []
+        near_distance = self.keypoint_distance * 1.15
+
+        genes = route.tolist()
+        gens_positions = [0] * len(genes)
+        for position, gen in enumerate(genes):
+            gens_positions[gen] = position
+
+        for gen_index in range(len(genes) - 1):
+            nearest_next_gen_index = self._find_nearest_next_gen_index(genes, gens_positions, gen_index, near_distance)
 
             if nearest_next_gen_index != (gen_index + 1):
-                temp = route[gen_index + 1]
-                route[gen_index + 1] = route[nearest_next_gen_index]
-                route[nearest_next_gen_index] = temp
+                next_gen = genes[gen_index + 1]
+                nearest_next_gen = genes[nearest_next_gen_index]
+                genes[gen_index + 1] = nearest_next_gen
+                genes[nearest_next_gen_index] = next_gen
+                gens_positions[nearest_next_gen] = gen_index + 1
+                gens_positions[next_gen] = nearest_next_gen_index
+                self._repair_swaps.append((gen_index + 1, nearest_next_gen_index))
+
+        route[:] = genes
 
         return route
 
@@ -265,23 +819,142 @@ class GeneticOptimalRouteFinder:
         route = []
         pos_index = 0
         for gen in genotype:
-            self.best_genotype_hash += gen * pos_index
+            self.best_genotype_hash += int(gen) * pos_index
             pos_index += 1
 
             route.append(self._get_gen_point(gen))
 
         return np.array(route)
 
-    def _find_best_genotype(self):
+    def _calc_components_fitness(self, population_components):
+        """
+        Посчитать значения функции приспособленности по составляющим приспособленности маршрутов.
+        """
+        normalized_components = population_components / np.array([
+            self.max_route_distance,
+            self.max_route_turns_angle,
+            self.max_route_self_intersections
+        ])
+
+        return (normalized_components[:, 1] * self.route_turns_angle_weight -
+                normalized_components[:, 0] * self.route_distance_weight -
+                normalized_components[:, 2] * self.route_self_intersection_weight +
+                self.route_distance_weight + self.route_turns_angle_weight + self.route_self_intersection_weight
+                )
+
+    def _choose_seed_genotypes(self):
+        """
+        Выбрать наиболее приспособленные маршруты конструктивных эвристик для первой популяции.
+        """
+        seeds_count = math.floor(self.genetic_algo.population_size * self.seeding_rate)
+        if seeds_count <= 0:
+            self._seed_genotypes = None
+            return
+
+        seed_genotypes = RouteSeedsGenerator(
+            self.route_points,
+            self._distance_matrix,
+            self._in_point_distances
+        ).gen().astype(self._points_genome.dtype)
+
+        seeds_fitness = self._calc_components_fitness(self._estimate_population_components(seed_genotypes))
+        best_seeds_indexes = np.argsort(-seeds_fitness, kind="stable")[:seeds_count]
+
+        self._seed_genotypes = seed_genotypes[best_seeds_indexes]
+
+    def _search_population_locally(self, population):
+        """
+        Улучшить маршруты популяции, заданной матрицей генотипов, перестановками 2-opt и Or-opt
+        в пределах отведённого времени. Улучшенный маршрут принимается, если его приспособленность не ниже исходной.
+        """
+        start_time = time.time()
+        deadline = start_time + self.local_search_time_cap
+
+        improved_population = population.copy()
+        routes_moves = np.zeros(population.shape[0], dtype=int)
+        for route_index in range(population.shape[0]):
+            if time.time() >= deadline:
+                break
+            improved_population[route_index], routes_moves[route_index] = \
+                self._route_local_search.improve(population[route_index], deadline)
+
+        accepted_routes = np.flatnonzero(routes_moves > 0)
+        if accepted_routes.shape[0] > 0:
+            fitness = self._calc_components_fitness(self._estimate_population_components(population[accepted_routes]))
+            improved_fitness = self._calc_components_fitness(
+                self._estimate_population_components(improved_population[accepted_routes])
+            )
+            accepted_routes = accepted_routes[improved_fitness >= fitness]
+            population[accepted_routes] = improved_population[accepted_routes]
+
+        self.local_search_moves = int(routes_moves[accepted_routes].sum())
+        self.local_search_improved_routes = accepted_routes.shape[0]
+        self.local_search_elapsed_time = time.time() - start_time
+        self._keep_data("local_search_ending")
+
+        return population
+
+    def _gen_genetic_algo_params(self):
         """
-        Подобрать оптимальный маршрут.
+        Сформировать параметры генетического алгоритма для поисковиков в других процессах.
         """
-        self._best_genotype, self.best_genotype_fitness = self.genetic_algo.find_best_genotype(
+        return {
+            "population_size": self.genetic_algo.population_size,
+            "selection_rate": self.genetic_algo.selection_rate,
+            "parents_count": self.genetic_algo.parents_count,
+            "mutants_rate": self.genetic_algo.mutants_rate,
+            "max_lifecycles": self.genetic_algo.max_lifecycles,
+            "parents_choice_type": self.genetic_algo.parents_choice_type,
+            "parents_similarity_type": self.genetic_algo.parents_similarity_type,
+            "stagnation_lifecycles": self.genetic_algo.stagnation_lifecycles,
+            "min_relative_improvement": self.genetic_algo.min_relative_improvement,
+            "improvement_window": self.genetic_algo.improvement_window,
+            "time_budget": self.genetic_algo.time_budget,
+            "target_fitness": self.genetic_algo.target_fitness,
+            "local_search_scope": self.genetic_algo.local_search_scope,
+            "local_search_top_count": self.genetic_algo.local_search_top_count
+        }
+
+    def _gen_route_finder_params(self):
+        """
+        Сформировать параметры поисковика маршрута для поисковиков в других процессах.
+        Пул оценки приспособленности в них не запускается.
+        """
+        return {
+            "mutation_swap_value": self.mutation_swap_value,
+            "mutation_swap_type": self.mutation_swap_type,
+            "route_distance_weight": self.route_distance_weight,
+            "route_turns_angle_weight": self.route_turns_angle_weight,
+            "route_self_intersection_weight": self.route_self_intersection_weight,
+            "repair_route_genotypes": self.repair_route_genotypes,
+            "batch_fitness_estimation": self.batch_fitness_estimation,
+            "fitness_cache_size": self.fitness_cache.max_size,
+            "crossing_type": self.crossing_type,
+            "seeding_rate": self.seeding_rate,
+            "local_search": self.local_search,
+            "local_search_time_cap": self.local_search_time_cap,
+            "compact_dtypes": self.compact_dtypes,
+            "distance_matrix_memmap_threshold": self.distance_matrix_memmap_threshold,
+            "distance_matrix_memmap_dir": self.distance_matrix_memmap_dir
+        }
+
+    def _start_evolution(self):
+        """
+        Начать эволюцию генотипов маршрута.
+        """
+        self._choose_seed_genotypes()
+        self.genetic_algo.start_evolution(
             self._points_genome,
             self._route_fitness,
             self._calc_genotype_positions_weight,
             self._cross_routes,
-            self._mutate_route
+            self._mutate_route,
+            self._population_fitness if self.batch_fitness_estimation else None,
+            self._calc_population_positions_weight,
+            self._cross_route_groups,
+            self._mutate_population,
+            self._seed_genotypes,
+            self._search_population_locally if self.local_search else None
         )
 
     def _calc_route_max_self_intersections(self):
@@ -305,6 +978,33 @@ class GeneticOptimalRouteFinder:
             self.route_points.shape[0] - 1
         ) * self.route_points.shape[0] * 10
 
+    def _calc_delta_swaps_limit(self):
+        """
+        Посчитать наибольшее количество перестановок генов, при котором приспособленность маршрута
+        выгоднее пересчитывать инкрементально, чем заново.
+        """
+        self._delta_swaps_limit = math.floor(self.route_points.shape[0] * self.delta_fitness_swaps_rate)
+
+    def _invalidate_fitness_cache(self):
+        """
+        Очистить кэш составляющих приспособленности, если изменились точки маршрута или веса функции приспособленности.
+        """
+        self.fitness_cache.invalidate((
+            hashlib.blake2b(np.ascontiguousarray(self.route_points).tobytes(), digest_size=16).digest(),
+            tuple(self.in_point),
+            tuple(self.out_point),
+            self.route_distance_weight,
+            self.route_turns_angle_weight,
+            self.route_self_intersection_weight
+        ))
+
+    def _create_random_generator(self):
+        """
+        Создать генератор случайных чисел для пакетных операторов.
+        Зерно берётся из глобального генератора numpy, чтобы фиксированное np.random.seed воспроизводило поиск.
+        """
+        self._rng = np.random.default_rng(np.random.randint(np.iinfo(np.int32).max))
+
     def _count_mutation_swaps(self):
         """
         Посчитать количество перестановок в маршруте при мутации.
@@ -324,7 +1024,13 @@ class GeneticOptimalRouteFinder:
         """
         Создать геном для точек маршрута.
         """
-        self._points_genome = np.arange(self.route_points.shape[0])
+        points_count = self.route_points.shape[0]
+        if not self.compact_dtypes:
+            self._points_genome = np.arange(points_count)
+        elif points_count <= np.iinfo(np.int16).max:
+            self._points_genome = np.arange(points_count, dtype=np.int16)
+        else:
+            self._points_genome = np.arange(points_count, dtype=np.int32)
 
     def _get_gens_distance(self, gen1, gen2):
         """
@@ -333,33 +1039,212 @@ class GeneticOptimalRouteFinder:
         """
         return self._distance_matrix[gen1][gen2]
 
+    def _get_gens_angle(self, gen1, gen2, gen3):
+        """
+        Получить величину угла поворота маршрута во второй из трёх точек по их генам.
+        """
+        if self._turns_angle_table is not None:
+            return self._turns_angle_table[gen1, gen2, gen3]
+
+        # Углы вычисляем в двойной точности и при компактной матрице расстояний.
+        return calc_triangle_angle(
+            self._distance_matrix[gen2, gen1].astype(np.float64),
+            self._distance_matrix[gen2, gen3].astype(np.float64),
+            self._distance_matrix[gen1, gen3].astype(np.float64)
+        )
+
+    def _get_problem_data(self, key, create_func):
+        """
+        Получить данные, зависящие только от геометрии задачи, из кэша подготовленной задачи обследования,
+        если поиск ведётся по ней, иначе - создать их.
+        """
+        if self.survey_problem is None or self.survey_problem.route_points is not self.route_points:
+            return create_func()
+
+        return self.survey_problem.get_cached_data(key, create_func)
+
+    def _is_distance_matrix_memmapped(self):
+        """
+        Проверить, хранится ли матрица расстояний в отображённом на диск файле.
+        """
+        return (self.distance_matrix_memmap_threshold is not None and
+                self.route_points.shape[0] >= self.distance_matrix_memmap_threshold)
+
+    def _calc_distance_matrix(self):
+        """
+        Вычислить матрицу расстояний между ключевыми точками и вернуть её вместе с файлом, на который она отображена.
+        Компактная матрица и матрица в отображённом на диск файле заполняются по блокам строк,
+        без промежуточных массивов двойной точности размера всей матрицы.
+        """
+        points_count = self.route_points.shape[0]
+        distance_matrix_file = None
+        if self._is_distance_matrix_memmapped():
+            distance_matrix_file = tempfile.TemporaryFile(dir=self.distance_matrix_memmap_dir)
+            distance_matrix = np.memmap(
+                distance_matrix_file,
+                dtype=self._distance_matrix_dtype(),
+                mode="w+",
+                shape=(points_count, points_count)
+            )
+        elif self.compact_dtypes:
+            distance_matrix = np.empty((points_count, points_count), dtype=self._distance_matrix_dtype())
+        else:
+            return calc_distance_matrix(self.route_points), None
+
+        fill_distance_matrix(self.route_points, distance_matrix, self.distance_matrix_rows_block_size)
+
+        return distance_matrix, distance_matrix_file
+
     def _create_distance_matrix(self):
         """
         Создать матрицу расстояний между ключевыми точками.
         """
-        self._distance_matrix = np.empty((self.route_points.shape[0], self.route_points.shape[0]))
-        for i in range(self.route_points.shape[0]):
-            for j in range(self.route_points.shape[0]):
-                if i == j:
-                    self._distance_matrix[i][j] = 0.0
-                else:
-                    point1 = self._get_gen_point(i)
-                    point2 = self._get_gen_point(j)
-                    distance = calc_distance(point1, point2)
-                    self._distance_matrix[i][j] = distance
-                    self._distance_matrix[j][i] = distance
+        self._distance_matrix, self._distance_matrix_file = self._get_problem_data(
+            ("distance_matrix", self.compact_dtypes, self._is_distance_matrix_memmapped()),
+            self._calc_distance_matrix
+        )
+
+    def _distance_matrix_dtype(self):
+        """
+        Определить тип хранения матрицы расстояний и таблицы углов поворота.
+        """
+        return np.float32 if self.compact_dtypes else np.float64
+
+    def _calc_neighbor_lists(self):
+        """
+        Составить для каждой ключевой точки список ближайших соседей и расстояний до них по возрастанию расстояния.
+        """
+        points_count = self.route_points.shape[0]
+        neighbors_count = min(self.repair_neighbors_count, points_count - 1)
+        if neighbors_count <= 0:
+            return [[] for _ in range(points_count)], [[] for _ in range(points_count)]
+
+        neighbor_genes_lists = []
+        neighbor_distances_lists = []
+        for block_start in range(0, points_count, self.distance_matrix_rows_block_size):
+            block_end = min(block_start + self.distance_matrix_rows_block_size, points_count)
+            block_rows = np.arange(block_end - block_start)
+
+            distances = np.array(self._distance_matrix[block_start:block_end], dtype=np.float64)
+            distances[block_rows, block_start + block_rows] = np.inf
+
+            neighbor_genes = np.argpartition(distances, neighbors_count - 1, axis=1)[:, :neighbors_count]
+            neighbor_distances = np.take_along_axis(distances, neighbor_genes, axis=1)
+            neighbors_order = np.argsort(neighbor_distances, axis=1, kind="stable")
+
+            # Списки Python быстрее массивов numpy при поэлементном обходе.
+            neighbor_genes_lists.extend(np.take_along_axis(neighbor_genes, neighbors_order, axis=1).tolist())
+            neighbor_distances_lists.extend(np.take_along_axis(neighbor_distances, neighbors_order, axis=1).tolist())
+
+        return neighbor_genes_lists, neighbor_distances_lists
+
+    def _create_neighbor_lists(self):
+        """
+        Создать списки ближайших соседей ключевых точек.
+        """
+        self._neighbor_genes, self._neighbor_distances = self._get_problem_data(
+            ("neighbor_lists", self.compact_dtypes, self._is_distance_matrix_memmapped(), self.repair_neighbors_count),
+            self._calc_neighbor_lists
+        )
+
+    def _calc_in_out_point_distances(self):
+        """
+        Вычислить векторы расстояний от ключевых точек до точек входа и выхода.
+        """
+        return (
+            calc_points_distances(self.route_points, self.in_point),
+            calc_points_distances(self.route_points, self.out_point)
+        )
+
+    def _create_in_out_point_distances(self):
+        """
+        Создать векторы расстояний от ключевых точек до точек входа и выхода.
+        """
+        self._in_point_distances, self._out_point_distances = self._get_problem_data(
+            ("in_out_point_distances",),
+            self._calc_in_out_point_distances
+        )
+
+    def _calc_turns_angle_table(self):
+        """
+        Вычислить таблицу углов поворота для всех троек ключевых точек по матрице расстояний.
+        Для большого количества точек углы вычисляются по матрице расстояний при обращении.
+        """
+        if self.route_points.shape[0] > self.dense_turns_angle_table_limit:
+            return None
+
+        distance_matrix = self._distance_matrix
+        if distance_matrix.dtype != np.float64:
+            # Таблица строится для немногих точек, поэтому расстояния для неё пересчитываются в двойной точности.
+            distance_matrix = calc_distance_matrix(self.route_points)
+
+        return calc_triangle_angle(
+            distance_matrix[:, :, np.newaxis],
+            distance_matrix[np.newaxis, :, :],
+            distance_matrix[:, np.newaxis, :]
+        ).astype(self._distance_matrix_dtype())
+
+    def _create_turns_angle_table(self):
+        """
+        Создать таблицу углов поворота для всех троек ключевых точек.
+        """
+        self._turns_angle_table = self._get_problem_data(
+            ("turns_angle_table", self.compact_dtypes, self.dense_turns_angle_table_limit),
+            self._calc_turns_angle_table
+        )
+
+    def _create_route_local_search(self):
+        """
+        Создать локальный поиск улучшений маршрута по матрицам расстояний и спискам соседей.
+        """
+        if not self.local_search:
+            self._route_local_search = None
+            return
+
+        self._route_local_search = RouteLocalSearch(
+            self._distance_matrix,
+            self._in_point_distances,
+            self._out_point_distances,
+            self._neighbor_genes,
+            epsilon=self.epsilon
+        )
+
+    def _create_segments_intersection_counter(self):
+        """
+        Создать счётчик самопересечений маршрутов по ключевым точкам.
+        """
+        self._segments_intersection_counter = self._get_problem_data(
+            ("segments_intersection_counter",),
+            lambda: SegmentsIntersectionCounter(self.route_points)
+        )
+
+    def _start_parallel_fitness_estimation(self):
+        """
+        Запустить пул процессов оценки приспособленности, если он задан настройками.
+        """
+        if self.fitness_workers_count > 0 and self.batch_fitness_estimation:
+            self._parallel_fitness_estimator = ParallelFitnessEstimator(self.fitness_workers_count)
+            self._parallel_fitness_estimator.start(self)
+
+    def _stop_parallel_fitness_estimation(self):
+        """
+        Остановить пул процессов оценки приспособленности и освободить разделяемую память.
+        """
+        if self._parallel_fitness_estimator is not None:
+            self._parallel_fitness_estimator.stop()
+            self._parallel_fitness_estimator = None
 
     def _init_best_genotype_hash(self):
         self.best_genotype_hash = 0
 
-    def find(self,
-             route_points,
-             in_point,
-             out_point,
-             keypoint_distance
-             ):
+    def prepare(self,
+                route_points,
+                in_point,
+                out_point,
+                keypoint_distance
+                ):
         """
-        Найти оптимальный маршрут.
+        Подготовить данные поиска: матрицы расстояний и углов, геном, параметры мутаций и нормировки.
 
         :param keypoint_distance: Расстояние между ключевыми точками.
         :param route_points: Точки маршрута, которые надо посетить.
@@ -373,14 +1258,103 @@ class GeneticOptimalRouteFinder:
 
         self._init_best_genotype_hash()
         self._create_distance_matrix()
+        self._create_neighbor_lists()
+        self._create_in_out_point_distances()
+        self._create_turns_angle_table()
+        self._create_segments_intersection_counter()
+        self._create_route_local_search()
         self._create_points_genome()
         self._count_mutation_swaps()
+        self._calc_delta_swaps_limit()
+        self._create_random_generator()
+        self._invalidate_fitness_cache()
         self._calc_route_max_distance()
         self._calc_route_max_turns_angle()
         self._calc_route_max_self_intersections()
 
+    def start_search(self):
+        """
+        Начать поиск по подготовленным данным: создать первую популяцию.
+        """
         self._keep_data("genotype_search_beginning")
 
-        self._find_best_genotype()
+        self._start_parallel_fitness_estimation()
+        self._start_evolution()
+
+    def continue_search(self, lifecycles):
+        """
+        Продолжить поиск на заданное количество жизненных циклов.
+        Вернуть признак возможности его продолжения.
+        """
+        return self.genetic_algo.evolve(lifecycles)
+
+    def finish_search(self):
+        """
+        Завершить поиск и собрать маршрут по наилучшему генотипу.
+        """
+        self._best_genotype, self.best_genotype_fitness = self.genetic_algo.finish_evolution()
+        self.stop_reason = self.genetic_algo.stop_reason
+        self._stop_parallel_fitness_estimation()
+
+        logging.info(
+            "Кэш приспособленности, попадания и промахи: \t" +
+            str(self.fitness_cache.hits) + "\t" + str(self.fitness_cache.misses)
+        )
+        logging.info("Причина остановки эволюции: \t" + str(self.stop_reason))
+        self._keep_data("genotype_search_ending")
 
         return self._genotype_to_route(self._best_genotype)
+
+    def find(self,
+             route_points,
+             in_point,
+             out_point,
+             keypoint_distance
+             ):
+        """
+        Найти оптимальный маршрут.
+
+        :param keypoint_distance: Расстояние между ключевыми точками.
+        :param route_points: Точки маршрута, которые надо посетить.
+        :param in_point: Точка входа в зону обследования.
+        :param out_point: Точка выхода из зоны обследования.
+        """
+        self.prepare(route_points, in_point, out_point, keypoint_distance)
+
+        try:
+            self.start_search()
+            self.continue_search(self.genetic_algo.max_lifecycles)
+            return self.finish_search()
+        finally:
+            self._stop_parallel_fitness_estimation()
+
+    def prepare_problem(self, survey_problem):
+        """
+        Подготовить данные поиска по подготовленной задаче обследования для пошагового поиска.
+
+        :param survey_problem: Подготовленная задача обследования зоны.
+        """
+        self.survey_problem = survey_problem
+
+        self.prepare(
+            survey_problem.route_points,
+            survey_problem.in_point,
+            survey_problem.out_point,
+            survey_problem.keypoint_distance
+        )
+
+    def find_problem(self, survey_problem):
+        """
+        Найти оптимальный маршрут по подготовленной задаче обследования,
+        переиспользуя вычисленные для неё матрицы расстояний, списки соседей и таблицу углов.
+
+        :param survey_problem: Подготовленная задача обследования зоны.
+        """
+        self.survey_problem = survey_problem
+
+        return self.find(
+            survey_problem.route_points,
+            survey_problem.in_point,
+            survey_problem.out_point,
+            survey_problem.keypoint_distance
+        )
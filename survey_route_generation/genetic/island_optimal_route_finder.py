@@ -0,0 +1,278 @@
+"""
+Островная модель поиска оптимального маршрута: несколько популяций эволюционируют в отдельных процессах
+и периодически обмениваются лучшими генотипами.
+"""
+import random
+import logging
+import multiprocessing
+import numpy as np
+
+from survey_route_generation.genetic.genetic_algorithm import GeneticAlgorithm
+from survey_route_generation.genetic.genetic_optimal_route_finder import GeneticOptimalRouteFinder
+from survey_route_generation.survey_problem import SurveyProblem
+
+# Способы выбора родителей, перебираемые по островам, если настройки островов не заданы.
+ISLANDS_PARENTS_CHOICE_TYPES = ["panmixia", "inbreeding", "outbreeding"]
+
+
+def _collect_island_statistics(island_index, route_finder, emigrants_fitness):
+    """
+    Собрать показатели острова после очередного этапа эволюции.
+    """
+    genetic_algo = route_finder.genetic_algo
+
+    return {
+        "island": island_index,
+        "lifecycle": genetic_algo.lifecycle_counter,
+        "population_size": genetic_algo.current_population.shape[0],
+        "best_fitness": float(emigrants_fitness[0]) if len(emigrants_fitness) > 0 else None,
+        "average_fitness": float(np.average(genetic_algo.population_estimation)),
+        "parents_choice_type": genetic_algo.parents_choice_type,
+        "selection_rate": genetic_algo.selection_rate
+    }
+
+
+def _run_island(connection, island_index, seed, genetic_algo_params, route_finder_params, survey_problem,
+                migration_interval, migrants_count):
+    """
+    Провести эволюцию популяции острова, обмениваясь мигрантами с управляющим процессом.
+    Матрицы расстояний, списки соседей и таблица углов берутся из кэша задачи обследования,
+    заполненного управляющим процессом.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+
+    try:
+        route_finder = GeneticOptimalRouteFinder(GeneticAlgorithm(**genetic_algo_params), **route_finder_params)
+        route_finder.prepare_problem(survey_problem)
+        route_finder.start_search()
+
+        while True:
+            can_continue = route_finder.continue_search(migration_interval)
+            emigrants, emigrants_fitness = route_finder.genetic_algo.choose_best_genotypes(migrants_count)
+            connection.send({
+                "emigrants": emigrants,
+                "emigrants_fitness": emigrants_fitness,
+                "statistics": _collect_island_statistics(island_index, route_finder, emigrants_fitness),
+                "continue": can_continue
+            })
+            if not can_continue:
+                break
+
+            immigrants = connection.recv()
+            route_finder.genetic_algo.accept_genotypes(immigrants)
+
+        route_finder.finish_search()
+        connection.send({
+            "best_genotype": route_finder._best_genotype,
+            "best_fitness": route_finder.best_genotype_fitness,
+            "stop_reason": route_finder.stop_reason,
+            "cache_hits": route_finder.fitness_cache.hits,
+            "cache_misses": route_finder.fitness_cache.misses
+        })
+    finally:
+        connection.close()
+
+
+class IslandOptimalRouteFinder(GeneticOptimalRouteFinder):
+    def __init__(self,
+                 genetic_algo,
+                 *args,
+                 islands_count=4,
+                 islands_settings=None,
+                 migration_interval=8,
+                 migrants_count=2,
+                 migration_topology="ring",
+                 **kwargs
+                 ):
+        """
+        Параметры генетического алгоритма задают базовые настройки островов,
+        остальные параметры совпадают с параметрами GeneticOptimalRouteFinder.
+
+        :param islands_count: Количество островов.
+        :param islands_settings: Список изменений настроек генетического алгоритма для островов, применяемых по кругу;
+         если не задан, острова различаются способом выбора родителей.
+        :param migration_interval: Количество жизненных циклов между миграциями.
+        :param migrants_count: Количество генотипов, принимаемых островом при миграции.
+        :param migration_topology: Топология миграции: ring - от предыдущего острова, all - лучшие со всех островов.
+        """
+        super().__init__(genetic_algo, *args, **kwargs)
+
+        self.islands_count = islands_count
+        self.islands_settings = islands_settings
+        self.migration_interval = migration_interval
+        self.migrants_count = migrants_count
+        self.migration_topology = migration_topology
+
+        self.islands_statistics = []
+        self.last_islands_statistics = []
+        self.best_island_index = None
+
+        self._islands = []
+
+    def _ensure_survey_problem(self, route_points, in_point, out_point, keypoint_distance):
+        """
+        Обеспечить задачу обследования, в кэше которой управляющий процесс сохраняет данные поиска
+        для процессов островов, если поиск ведётся не по подготовленной задаче.
+        """
+        if self.survey_problem is not None and self.survey_problem.route_points is route_points:
+            return
+
+        self.survey_problem = SurveyProblem(None, None, None)
+        self.survey_problem.route_points = route_points
+        self.survey_problem.in_point = in_point
+        self.survey_problem.out_point = out_point
+        self.survey_problem.keypoint_distance = keypoint_distance
+
+    def _gen_island_genetic_algo_params(self, island_index):
+        """
+        Сформировать параметры генетического алгоритма острова.
+        """
+        genetic_algo_params = self._gen_genetic_algo_params()
+
+        if self.islands_settings:
+            genetic_algo_params.update(self.islands_settings[island_index % len(self.islands_settings)])
+        else:
+            genetic_algo_params["parents_choice_type"] = \
+                ISLANDS_PARENTS_CHOICE_TYPES[island_index % len(ISLANDS_PARENTS_CHOICE_TYPES)]
+
+        return genetic_algo_params
+
+    def _start_islands(self):
+        """
+        Запустить процессы островов. Процессы получают задачу обследования вместе с кэшем данных поиска.
+        """
+        route_finder_params = self._gen_route_finder_params()
+        seeds = np.random.randint(np.iinfo(np.int32).max, size=self.islands_count)
+
+        self._islands = []
+        for island_index in range(self.islands_count):
+            connection, island_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_run_island,
+                args=(
+                    island_connection,
+                    island_index,
+                    int(seeds[island_index]),
+                    self._gen_island_genetic_algo_params(island_index),
+                    route_finder_params,
+                    self.survey_problem,
+                    self.migration_interval,
+                    self.migrants_count
+                )
+            )
+            process.start()
+            island_connection.close()
+
+            self._islands.append({"process": process, "connection": connection})
+
+    def _choose_donor_islands(self, island_index, reported_islands):
+        """
+        Выбрать острова, отдающие мигрантов заданному острову, согласно топологии миграции.
+        """
+        if self.migration_topology == "all":
+            return [donor_index for donor_index in reported_islands if donor_index != island_index]
+
+        position = reported_islands.index(island_index)
+        donor_index = reported_islands[position - 1]
+
+        return [donor_index] if donor_index != island_index else []
+
+    def _gather_immigrants(self, island_index, messages):
+        """
+        Собрать наиболее приспособленных мигрантов для заданного острова.
+        """
+        donor_islands = self._choose_donor_islands(island_index, sorted(messages))
+        if len(donor_islands) == 0:
+            return []
+
+        emigrants = np.concatenate([messages[donor_index]["emigrants"] for donor_index in donor_islands])
+        emigrants_fitness = np.concatenate([messages[donor_index]["emigrants_fitness"] for donor_index in donor_islands])
+        best_indexes = np.argsort(-emigrants_fitness, kind="stable")[:self.migrants_count]
+
+        return emigrants[best_indexes]
+
+    def _migrate(self):
+        """
+        Проводить миграции между островами, пока хотя бы один из них продолжает эволюцию.
+        """
+        active_islands = list(range(self.islands_count))
+        while len(active_islands) > 0:
+            messages = {}
+            for island_index in active_islands:
+                messages[island_index] = self._islands[island_index]["connection"].recv()
+
+            self.last_islands_statistics = [messages[island_index]["statistics"] for island_index in active_islands]
+            self.islands_statistics.extend(self.last_islands_statistics)
+            self._keep_data("island_migration")
+
+            active_islands = [island_index for island_index in active_islands if messages[island_index]["continue"]]
+            for island_index in active_islands:
+                self._islands[island_index]["connection"].send(self._gather_immigrants(island_index, messages))
+
+    def _collect_islands_results(self):
+        """
+        Получить наилучшие генотипы островов и выбрать из них глобально наилучший.
+        """
+        for island_index, island in enumerate(self._islands):
+            result = island["connection"].recv()
+            self.fitness_cache.hits += result["cache_hits"]
+            self.fitness_cache.misses += result["cache_misses"]
+
+            if self.best_island_index is None or result["best_fitness"] > self.best_genotype_fitness:
+                self.best_island_index = island_index
+                self._best_genotype = result["best_genotype"]
+                self.best_genotype_fitness = result["best_fitness"]
+                self.stop_reason = result["stop_reason"]
+
+    def _stop_islands(self):
+        """
+        Дождаться завершения процессов островов, прервав оставшиеся.
+        """
+        for island in self._islands:
+            island["connection"].close()
+            island["process"].join(timeout=1)
+            if island["process"].is_alive():
+                island["process"].terminate()
+                island["process"].join()
+
+        self._islands = []
+
+    def find(self,
+             route_points,
+             in_point,
+             out_point,
+             keypoint_distance
+             ):
+        """
+        Найти оптимальный маршрут эволюцией нескольких островов.
+
+        :param keypoint_distance: Расстояние между ключевыми точками.
+        :param route_points: Точки маршрута, которые надо посетить.
+        :param in_point: Точка входа в зону обследования.
+        :param out_point: Точка выхода из зоны обследования.
+        """
+        self._ensure_survey_problem(route_points, in_point, out_point, keypoint_distance)
+        self.prepare(route_points, in_point, out_point, keypoint_distance)
+        self.fitness_cache.clear()
+        self.islands_statistics = []
+        self.best_island_index = None
+
+        self._keep_data("genotype_search_beginning")
+
+        self._start_islands()
+        try:
+            self._migrate()
+            self._collect_islands_results()
+        finally:
+            self._stop_islands()
+
+        logging.info("Наилучший остров: \t" + str(self.best_island_index))
+        logging.info("Причина остановки эволюции наилучшего острова: \t" + str(self.stop_reason))
+        logging.info(
+            "Кэш приспособленности, попадания и промахи: \t" +
+            str(self.fitness_cache.hits) + "\t" + str(self.fitness_cache.misses)
+        )
+        self._keep_data("genotype_search_ending")
+
+        return self._genotype_to_route(self._best_genotype)
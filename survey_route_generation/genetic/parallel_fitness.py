@@ -0,0 +1,245 @@
+"""
+Параллельное вычисление составляющих приспособленности маршрутов в пуле процессов.
+Данные о точках маршрута и оцениваемые генотипы передаются процессам через разделяемую память.
+"""
+import multiprocessing
+from multiprocessing import shared_memory, util
+
+import numpy as np
+
+# Состояние процесса пула: поисковик маршрута, восстановленный по разделяемым данным,
+# подключённые блоки разделяемой памяти и имена блоков текущих буферов популяции.
+_worker_route_finder = None
+_worker_shared_blocks = {}
+_worker_population_blocks_names = ()
+
+
+def _create_shared_array(shape, dtype):
+    """
+    Создать массив в новом блоке разделяемой памяти.
+    """
+    size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+    shared_block = shared_memory.SharedMemory(create=True, size=size)
+
+    return shared_block, np.ndarray(shape, dtype=dtype, buffer=shared_block.buf)
+
+
+def _attach_shared_array(descriptor):
+    """
+    Подключить массив из существующего блока разделяемой памяти по его описанию: имени, форме и типу.
+    """
+    name, shape, dtype = descriptor
+    shared_block = _worker_shared_blocks.get(name)
+    if shared_block is None:
+        shared_block = shared_memory.SharedMemory(name=name)
+        _worker_shared_blocks[name] = shared_block
+
+    return np.ndarray(shape, dtype=dtype, buffer=shared_block.buf)
+
+
+def _detach_shared_blocks(names):
+    """
+    Отключить процесс от блоков разделяемой памяти с заданными именами.
+    """
+    for name in names:
+        shared_block = _worker_shared_blocks.pop(name, None)
+        if shared_block is not None:
+            shared_block.close()
+
+
+def _detach_worker():
+    """
+    Отключить завершающийся процесс пула от всех блоков разделяемой памяти.
+    """
+    global _worker_route_finder
+
+    _worker_route_finder = None
+    _detach_shared_blocks(list(_worker_shared_blocks))
+
+
+def _init_worker(route_finder_class, route_finder_settings, arrays_descriptors):
+    """
+    Восстановить в процессе пула поисковик маршрута, способный вычислять составляющие приспособленности.
+    """
+    global _worker_route_finder
+
+    route_finder = route_finder_class(None, **route_finder_settings["params"])
+    for name, value in route_finder_settings["attributes"].items():
+        setattr(route_finder, name, value)
+
+    for name, descriptor in arrays_descriptors.items():
+        setattr(route_finder, name, None if descriptor is None else _attach_shared_array(descriptor))
+
+    route_finder._create_segments_intersection_counter()
+
+    _worker_route_finder = route_finder
+    util.Finalize(None, _detach_worker, exitpriority=10)
+
+
+def _calc_population_slice_components(population_descriptor, components_descriptor, start, stop):
+    """
+    Вычислить составляющие приспособленности части маршрутов популяции и записать их в разделяемую память.
+    Блоки прежних, заменённых при увеличении буферов популяции отключаются.
+    """
+    global _worker_population_blocks_names
+
+    population_blocks_names = (population_descriptor[0], components_descriptor[0])
+    if population_blocks_names != _worker_population_blocks_names:
+        _detach_shared_blocks(_worker_population_blocks_names)
+        _worker_population_blocks_names = population_blocks_names
+
+    population = _attach_shared_array(population_descriptor)
+    population_components = _attach_shared_array(components_descriptor)
+
+    population_components[start:stop] = _worker_route_finder._calc_population_components(population[start:stop])
+
+
+class ParallelFitnessEstimator:
+    def __init__(self, workers_count):
+        """
+        :param workers_count: Количество процессов пула.
+        """
+        self.workers_count = workers_count
+
+        self._pool = None
+        self._shared_blocks = []
+        self._population = None
+        self._population_block = None
+        self._population_descriptor = None
+        self._components = None
+        self._components_block = None
+        self._components_descriptor = None
+
+    def _share_array(self, array):
+        """
+        Скопировать массив в разделяемую память и вернуть его описание.
+        """
+        shared_block, shared_array = _create_shared_array(array.shape, array.dtype)
+        shared_array[...] = array
+        self._shared_blocks.append(shared_block)
+
+        return shared_block.name, array.shape, array.dtype.str
+
+    def _release_shared_block(self, shared_block):
+        """
+        Освободить блок разделяемой памяти.
+        """
+        if shared_block is None:
+            return
+
+        self._shared_blocks.remove(shared_block)
+        shared_block.close()
+        shared_block.unlink()
+
+    def _share_route_finder_arrays(self, route_finder):
+        """
+        Поместить в разделяемую память массивы, от которых зависят составляющие приспособленности.
+        """
+        arrays_descriptors = {}
+        for name in ["route_points", "_distance_matrix", "_in_point_distances", "_out_point_distances",
+                     "_turns_angle_table"]:
+            array = getattr(route_finder, name)
+            arrays_descriptors[name] = None if array is None else self._share_array(np.asarray(array))
+
+        return arrays_descriptors
+
+    @staticmethod
+    def _collect_route_finder_settings(route_finder):
+        """
+        Собрать скалярные параметры поисковика маршрута, нужные для вычисления составляющих приспособленности.
+        """
+        return {
+            "params": {
+                "route_distance_weight": route_finder.route_distance_weight,
+                "route_turns_angle_weight": route_finder.route_turns_angle_weight,
+                "route_self_intersection_weight": route_finder.route_self_intersection_weight,
+                "fitness_cache_size": 0
+            },
+            "attributes": {
+                "epsilon": route_finder.epsilon,
+                "dense_turns_angle_table_limit": route_finder.dense_turns_angle_table_limit
+            }
+        }
+
+    def _ensure_population_capacity(self, routes_count, genes_count, dtype):
+        """
+        Обеспечить разделяемые буферы генотипов и составляющих приспособленности нужного размера.
+        Прежние буферы при замене освобождаются.
+        """
+        if self._population is not None and self._population.shape[0] >= routes_count and \
+                self._population.shape[1] == genes_count and self._population.dtype == dtype:
+            return
+
+        capacity = routes_count
+        if self._population is not None:
+            capacity = max(routes_count, 2 * self._population.shape[0])
+
+        replaced_blocks = [self._population_block, self._components_block]
+
+        self._population_block, self._population = _create_shared_array((capacity, genes_count), dtype)
+        self._shared_blocks.append(self._population_block)
+        self._population_descriptor = (self._population_block.name, self._population.shape, self._population.dtype.str)
+
+        self._components_block, self._components = _create_shared_array((capacity, 3), np.float64)
+        self._shared_blocks.append(self._components_block)
+        self._components_descriptor = (self._components_block.name, self._components.shape, self._components.dtype.str)
+
+        for shared_block in replaced_blocks:
+            self._release_shared_block(shared_block)
+
+    def _gen_slices(self, routes_count):
+        """
+        Разбить маршруты на непересекающиеся части по числу процессов.
+        """
+        bounds = np.linspace(0, routes_count, min(self.workers_count, routes_count) + 1).astype(int)
+
+        return [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+    def start(self, route_finder):
+        """
+        Разместить данные поисковика маршрута в разделяемой памяти и запустить пул процессов.
+        """
+        self.stop()
+
+        arrays_descriptors = self._share_route_finder_arrays(route_finder)
+        self._pool = multiprocessing.Pool(
+            self.workers_count,
+            initializer=_init_worker,
+            initargs=(type(route_finder), self._collect_route_finder_settings(route_finder), arrays_descriptors)
+        )
+
+    def calc_population_components(self, population):
+        """
+        Вычислить составляющие приспособленности маршрутов популяции, разделив её между процессами пула.
+        """
+        routes_count = population.shape[0]
+        self._ensure_population_capacity(routes_count, population.shape[1], population.dtype)
+        self._population[:routes_count] = population
+
+        self._pool.starmap(
+            _calc_population_slice_components,
+            [
+                (self._population_descriptor, self._components_descriptor, start, stop)
+                for start, stop in self._gen_slices(routes_count)
+            ]
+        )
+
+        return self._components[:routes_count].copy()
+
+    def stop(self):
+        """
+        Остановить пул процессов и освободить разделяемую память.
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+        self._population = None
+        self._population_block = None
+        self._components = None
+        self._components_block = None
+        for shared_block in self._shared_blocks:
+            shared_block.close()
+            shared_block.unlink()
+        self._shared_blocks = []
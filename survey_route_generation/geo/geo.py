@@ -14,6 +14,100 @@ def calc_distance(*points):
     return geod.line_length(points_array[:, 1], points_array[:, 0])
 
 
+def calc_distance_matrix(points):
+    """
+    Вычислить симметричную матрицу геодезических расстояний между точками.
+
+    Расстояния считаются одним векторизованным вызовом Geod.inv только для верхнего треугольника матрицы,
+    после чего треугольник отражается относительно главной диагонали.
+    """
+    points_array = np.asarray(points, dtype=np.float64)
+    points_count = points_array.shape[0]
+
+    distance_matrix = np.zeros((points_count, points_count))
+    if points_count < 2:
+        return distance_matrix
+
+    rows, cols = np.triu_indices(points_count, 1)
+    _, _, distances = geod.inv(
+        points_array[rows, 1], points_array[rows, 0],
+        points_array[cols, 1], points_array[cols, 0]
+    )
+
+    distance_matrix[rows, cols] = distances
+    distance_matrix[cols, rows] = distances
+
+    return distance_matrix
+
+
+def fill_distance_matrix(points, distance_matrix, rows_block_size=256):
+    """
+    Заполнить заданную матрицу, например отображённую на диск, геодезическими расстояниями между точками.
+
+    Расстояния считаются по блокам строк, чтобы промежуточные массивы не превышали размера блока.
+    Как и в calc_distance_matrix, вычисляется верхний треугольник, который отражается относительно главной диагонали.
+    """
+    points_array = np.asarray(points, dtype=np.float64)
+    points_count = points_array.shape[0]
+
+    for block_start in range(0, points_count, rows_block_size):
+        block_end = min(block_start + rows_block_size, points_count)
+        rows = np.repeat(np.arange(block_start, block_end), points_count - block_start)
+        cols = np.tile(np.arange(block_start, points_count), block_end - block_start)
+
+        _, _, distances = geod.inv(
+            points_array[rows, 1], points_array[rows, 0],
+            points_array[cols, 1], points_array[cols, 0]
+        )
+        distances = np.reshape(distances, (block_end - block_start, points_count - block_start))
+
+        # В квадрате блока на главной диагонали берём верхний треугольник и отражаем его.
+        block_size = block_end - block_start
+        block_distances = np.triu(distances[:, :block_size], 1)
+        distances[:, :block_size] = block_distances + block_distances.T
+
+        distance_matrix[block_start:block_end, block_start:] = distances
+        distance_matrix[block_end:, block_start:block_end] = distances[:, block_size:].T
+
+    return distance_matrix
+
+
+def calc_points_distances(points, point):
+    """
+    Вычислить геодезические расстояния от каждой из точек до заданной точки.
+    """
+    points_array = np.asarray(points, dtype=np.float64)
+    lats = np.full(points_array.shape[0], point[0], dtype=np.float64)
+    lons = np.full(points_array.shape[0], point[1], dtype=np.float64)
+
+    _, _, distances = geod.inv(points_array[:, 1], points_array[:, 0], lons, lats)
+
+    return np.asarray(distances, dtype=np.float64)
+
+
+def calc_pairs_distances(first_points, second_points):
+    """
+    Вычислить геодезические расстояния между соответствующими точками двух наборов.
+    """
+    first_array = np.asarray(first_points, dtype=np.float64)
+    second_array = np.asarray(second_points, dtype=np.float64)
+
+    _, _, distances = geod.inv(first_array[:, 1], first_array[:, 0], second_array[:, 1], second_array[:, 0])
+
+    return np.asarray(distances, dtype=np.float64)
+
+
+def calc_triangle_angle(a, b, c):
+    """
+    Вычислить величину угла треугольника между сторонами a и b по длинам его сторон.
+    Принимает как числа, так и массивы длин сторон.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cos = (np.square(a) + np.square(b) - np.square(c)) / (2 * np.multiply(a, b))
+
+    return np.arccos(np.clip(cos, -1.0, 1.0))
+
+
 def calc_3_points_angle(p1, p2, p3):
     """
     Вычислить величину угла, образованного тремя точками.
@@ -22,13 +116,7 @@ def calc_3_points_angle(p1, p2, p3):
     b = calc_distance(p2, p3)
     c = calc_distance(p1, p3)
 
-    cos = (pow(a, 2) + pow(b, 2) - pow(c, 2)) / (2 * a * b)
-    if cos > 1.0:
-        cos = 1.0
-    elif cos < -1.0:
-        cos = -1.0
-
-    return math.acos(cos)
+    return float(calc_triangle_angle(a, b, c))
 
 
 def gen_borders(area_points):
@@ -0,0 +1,317 @@
+"""
+Подсчёт самопересечений ломаных линий, заданных порядком обхода точек.
+
+Пересечением считается только собственное пересечение двух отрезков во внутренних точках,
+что соответствует предикату crosses библиотеки Shapely для пары отрезков.
+"""
+from fractions import Fraction
+
+import numpy as np
+
+# Граница погрешности вычисления ориентации тройки точек в арифметике двойной точности (Shewchuk).
+ORIENTATION_ERROR_BOUND = (3.0 + 16.0 * np.finfo(np.float64).eps / 2) * np.finfo(np.float64).eps / 2
+
+
+def _calc_exact_orientation(p, q, r):
+    """
+    Вычислить знак ориентации тройки точек в точной рациональной арифметике.
+    """
+    px, py = Fraction(float(p[0])), Fraction(float(p[1]))
+    det = (Fraction(float(q[0])) - px) * (Fraction(float(r[1])) - py) - \
+          (Fraction(float(q[1])) - py) * (Fraction(float(r[0])) - px)
+
+    return (det > 0) - (det < 0)
+
+
+def calc_orientations(p, q, r):
+    """
+    Вычислить знаки ориентации троек точек (p, q, r): 1 - против часовой стрелки, -1 - по часовой, 0 - на одной прямой.
+
+    Возвращает знаки, вычисленные в арифметике двойной точности, и маску троек,
+    для которых знак не гарантирован и должен быть уточнён функцией _calc_exact_orientation.
+    """
+    left = (q[..., 0] - p[..., 0]) * (r[..., 1] - p[..., 1])
+    right = (q[..., 1] - p[..., 1]) * (r[..., 0] - p[..., 0])
+    det = left - right
+    error_bound = ORIENTATION_ERROR_BOUND * (np.abs(left) + np.abs(right))
+
+    return np.sign(det).astype(np.int8), (np.abs(det) <= error_bound) & (error_bound > 0)
+
+
+def _classify_crossings(orientations, uncertain):
+    """
+    Посчитать собственные пересечения пар отрезков по ориентациям их концов.
+
+    :param orientations: Знаки ориентаций размерности (4, ...): концы второго отрезка относительно первого,
+    затем концы первого отрезка относительно второго.
+    :param uncertain: Маска неточных знаков той же размерности.
+    :return: Маска пересекающихся пар и маска пар, результат для которых зависит от неточных знаков.
+    """
+    crossings = ((orientations[0] * orientations[1] < 0) &
+                 (orientations[2] * orientations[3] < 0))
+
+    first_ruled_out = ~uncertain[0] & ~uncertain[1] & (orientations[0] * orientations[1] >= 0)
+    second_ruled_out = ~uncertain[2] & ~uncertain[3] & (orientations[2] * orientations[3] >= 0)
+    undecided = uncertain.any(axis=0) & ~first_ruled_out & ~second_ruled_out
+
+    return crossings, undecided
+
+
+def calc_crossings(first_starts, first_ends, second_starts, second_ends):
+    """
+    Определить, пересекаются ли отрезки пар во внутренних точках.
+    Координаты концов отрезков задаются массивами, совместимыми при broadcasting.
+
+    :return: Маска пересекающихся пар.
+    """
+    triples = [
+        np.broadcast_arrays(first_starts, first_ends, second_starts),
+        np.broadcast_arrays(first_starts, first_ends, second_ends),
+        np.broadcast_arrays(second_starts, second_ends, first_starts),
+        np.broadcast_arrays(second_starts, second_ends, first_ends)
+    ]
+    orientations, uncertain = calc_orientations(
+        np.stack([p for p, _, _ in triples]),
+        np.stack([q for _, q, _ in triples]),
+        np.stack([r for _, _, r in triples])
+    )
+    crossings, undecided = _classify_crossings(orientations, uncertain)
+
+    # Уточняем знаки только для тех пар, результат проверки которых от них зависит.
+    for index in zip(*np.nonzero(undecided)):
+        signs = [
+            _calc_exact_orientation(p[index], q[index], r[index])
+            if uncertain[(triple_index, *index)] else orientations[(triple_index, *index)]
+            for triple_index, (p, q, r) in enumerate(triples)
+        ]
+        crossings[index] = signs[0] * signs[1] < 0 and signs[2] * signs[3] < 0
+
+    return crossings
+
+
+class SegmentsIntersectionCounter:
+    def __init__(self, points, grid_segments_threshold=256, kernel_chunk_size=4194304, grid_pairs_rate=0.25):
+        """
+        :param points: Точки, порядок обхода которых задаёт ломаную.
+        :param grid_segments_threshold: Количество отрезков, начиная с которого используется пространственный хеш.
+        :param kernel_chunk_size: Наибольшее количество ориентаций, вычисляемых векторно за один проход.
+        :param grid_pairs_rate: Доля от всех пар отрезков, при превышении которой пространственный хеш
+        не даёт выигрыша и маршрут проверяется перебором.
+        """
+        self.points = np.asarray(points, dtype=np.float64)
+        self.grid_segments_threshold = grid_segments_threshold
+        self.kernel_chunk_size = kernel_chunk_size
+        self.grid_pairs_rate = grid_pairs_rate
+
+        self._segment_pairs = {}
+
+    def _get_segment_pairs(self, segments_count):
+        """
+        Получить индексы всех пар несмежных отрезков ломаной.
+        """
+        if segments_count not in self._segment_pairs:
+            self._segment_pairs[segments_count] = np.triu_indices(segments_count, 2)
+
+        return self._segment_pairs[segments_count]
+
+    def _count_population_by_kernel(self, population):
+        """
+        Посчитать самопересечения маршрутов популяции перебором всех пар отрезков.
+
+        Для каждого маршрута вычисляется матрица ориентаций "отрезок - точка", из которой
+        берутся ориентации концов отрезков каждой пары относительно друг друга.
+        """
+        segments_count = population.shape[1] - 1
+        first, second = self._get_segment_pairs(segments_count)
+
+        route_points = self.points[population]
+        starts = route_points[:, :-1, np.newaxis, :]
+        ends = route_points[:, 1:, np.newaxis, :]
+        others = route_points[:, np.newaxis, :, :]
+
+        orientations, uncertain = calc_orientations(starts, ends, others)
+
+        pair_segments = (first, first, second, second)
+        pair_points = (second, second + 1, first, first + 1)
+        crossings, undecided = _classify_crossings(
+            np.stack([orientations[:, segments, points] for segments, points in zip(pair_segments, pair_points)]),
+            np.stack([uncertain[:, segments, points] for segments, points in zip(pair_segments, pair_points)])
+        )
+
+        # Уточняем знаки только для тех пар, результат проверки которых от них зависит.
+        for route_index, pair_index in zip(*np.nonzero(undecided)):
+            for segments, points in zip(pair_segments, pair_points):
+                segment_index, point_index = segments[pair_index], points[pair_index]
+                if uncertain[route_index, segment_index, point_index]:
+                    orientations[route_index, segment_index, point_index] = _calc_exact_orientation(
+                        route_points[route_index, segment_index],
+                        route_points[route_index, segment_index + 1],
+                        route_points[route_index, point_index]
+                    )
+                    uncertain[route_index, segment_index, point_index] = False
+
+            crossings[route_index, pair_index] = (
+                    orientations[route_index, first[pair_index], second[pair_index]] *
+                    orientations[route_index, first[pair_index], second[pair_index] + 1] < 0 and
+                    orientations[route_index, second[pair_index], first[pair_index]] *
+                    orientations[route_index, second[pair_index], first[pair_index] + 1] < 0
+            )
+
+        return np.count_nonzero(crossings, axis=1)
+
+    def _count_population_by_kernel_chunks(self, population):
+        """
+        Посчитать самопересечения маршрутов популяции перебором, разбивая популяцию на части ограниченного размера.
+        """
+        segments_count = population.shape[1] - 1
+        chunk_size = max(1, self.kernel_chunk_size // (segments_count * population.shape[1]))
+        counts = [
+            self._count_population_by_kernel(population[chunk_start:chunk_start + chunk_size])
+            for chunk_start in range(0, population.shape[0], chunk_size)
+        ]
+
+        return np.concatenate(counts)
+
+    def _gen_grid_segment_pairs(self, route_points):
+        """
+        Сгенерировать пары несмежных отрезков ломаной, попадающих в общие ячейки пространственного хеша.
+        Если таких пар слишком много, вернуть None.
+        """
+        starts = route_points[:-1]
+        ends = route_points[1:]
+        segments_count = starts.shape[0]
+
+        low = np.minimum(starts, ends)
+        high = np.maximum(starts, ends)
+
+        origin = route_points.min(axis=0)
+        extent = np.maximum(route_points.max(axis=0) - origin, np.finfo(np.float64).tiny)
+        cells_per_side = max(1, int(np.sqrt(segments_count)))
+        cell_size = extent / cells_per_side
+
+        low_cells = np.minimum(((low - origin) / cell_size).astype(np.int64), cells_per_side - 1)
+        high_cells = np.minimum(((high - origin) / cell_size).astype(np.int64), cells_per_side - 1)
+        cells_shape = high_cells - low_cells + 1
+        segment_cells_count = cells_shape[:, 0] * cells_shape[:, 1]
+
+        max_pairs_count = self.grid_pairs_rate * segments_count * (segments_count - 1) / 2
+        if segment_cells_count.sum() > max_pairs_count:
+            return None
+
+        # Раскладываем отрезки по всем ячейкам их ограничивающих прямоугольников.
+        segment_indexes = np.repeat(np.arange(segments_count), segment_cells_count)
+        cell_offsets = np.arange(segment_indexes.shape[0]) - np.repeat(
+            np.cumsum(segment_cells_count) - segment_cells_count,
+            segment_cells_count
+        )
+        cell_rows = low_cells[segment_indexes, 0] + cell_offsets // cells_shape[segment_indexes, 1]
+        cell_cols = low_cells[segment_indexes, 1] + cell_offsets % cells_shape[segment_indexes, 1]
+        cell_ids = cell_rows * cells_per_side + cell_cols
+
+        order = np.lexsort((segment_indexes, cell_ids))
+        cell_ids = cell_ids[order]
+        segment_indexes = segment_indexes[order]
+
+        # Составляем все пары отрезков внутри каждой ячейки.
+        group_starts = np.flatnonzero(np.r_[True, cell_ids[1:] != cell_ids[:-1]])
+        group_sizes = np.diff(np.r_[group_starts, cell_ids.shape[0]])
+        if (group_sizes * (group_sizes - 1) // 2).sum() > max_pairs_count:
+            return None
+
+        group_ends = np.repeat(group_starts + group_sizes, group_sizes)
+
+        partners_count = group_ends - np.arange(cell_ids.shape[0]) - 1
+        first_positions = np.repeat(np.arange(cell_ids.shape[0]), partners_count)
+        second_positions = first_positions + 1 + np.arange(first_positions.shape[0]) - np.repeat(
+            np.cumsum(partners_count) - partners_count,
+            partners_count
+        )
+
+        first = segment_indexes[first_positions]
+        second = segment_indexes[second_positions]
+        non_adjacent = second - first >= 2
+
+        pair_ids = np.unique(first[non_adjacent] * segments_count + second[non_adjacent])
+
+        return pair_ids // segments_count, pair_ids % segments_count
+
+    def _count_route_pairs(self, route_points, first, second):
+        """
+        Посчитать пересекающиеся пары отрезков маршрута среди заданных.
+        """
+        if first.shape[0] == 0:
+            return 0
+
+        return np.count_nonzero(calc_crossings(
+            route_points[first],
+            route_points[first + 1],
+            route_points[second],
+            route_points[second + 1]
+        ))
+
+    def count(self, route):
+        """
+        Посчитать количество самопересечений маршрута.
+        """
+        return int(self.count_population(np.asarray(route)[np.newaxis, :])[0])
+
+    def count_population(self, population):
+        """
+        Посчитать количества самопересечений для каждого маршрута популяции.
+        """
+        population = np.asarray(population)
+        segments_count = population.shape[1] - 1
+        if segments_count < 3:
+            return np.zeros(population.shape[0], dtype=np.int64)
+
+        if segments_count < self.grid_segments_threshold:
+            return self._count_population_by_kernel_chunks(population).astype(np.int64)
+
+        counts = np.zeros(population.shape[0], dtype=np.int64)
+        kernel_route_indexes = []
+        for route_index in range(population.shape[0]):
+            route_points = self.points[population[route_index]]
+            segment_pairs = self._gen_grid_segment_pairs(route_points)
+            if segment_pairs is None:
+                kernel_route_indexes.append(route_index)
+            else:
+                counts[route_index] = self._count_route_pairs(route_points, *segment_pairs)
+
+        if len(kernel_route_indexes) > 0:
+            counts[kernel_route_indexes] = self._count_population_by_kernel_chunks(population[kernel_route_indexes])
+
+        return counts
+
+    def count_population_segments(self, population, segments, valid):
+        """
+        Посчитать для каждого маршрута популяции количество самопересечений, в которых участвует
+        хотя бы один из заданных отрезков.
+
+        :param population: Матрица маршрутов.
+        :param segments: Индексы отрезков для каждого маршрута, отрезок k соединяет k-ю и (k+1)-ю точки.
+        :param valid: Маска учитываемых индексов отрезков; индексы в строке не должны повторяться.
+        """
+        population = np.asarray(population)
+        segments_count = population.shape[1] - 1
+        rows = np.arange(population.shape[0])[:, np.newaxis]
+        segments = np.where(valid, segments, 0)
+
+        route_points = self.points[population]
+        crossings = calc_crossings(
+            route_points[rows, segments][:, :, np.newaxis],
+            route_points[rows, segments + 1][:, :, np.newaxis],
+            route_points[:, np.newaxis, :-1],
+            route_points[:, np.newaxis, 1:]
+        )
+
+        others = np.arange(segments_count)
+        affected = np.zeros((population.shape[0], segments_count), dtype=bool)
+        affected[np.nonzero(valid)[0], segments[valid]] = True
+
+        # Пары из двух заданных отрезков учитываем один раз.
+        counted = (crossings &
+                   valid[:, :, np.newaxis] &
+                   (np.abs(segments[:, :, np.newaxis] - others) >= 2) &
+                   (~affected[:, np.newaxis, :] | (others > segments[:, :, np.newaxis])))
+
+        return np.count_nonzero(counted, axis=(1, 2))
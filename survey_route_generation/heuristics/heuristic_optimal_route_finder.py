@@ -0,0 +1,141 @@
+"""
+Детерминированный поиск оптимального маршрута без эволюции: построение маршрутов конструктивными эвристиками
+и их улучшение локальным поиском 2-opt и Or-opt. Маршруты оцениваются той же функцией приспособленности,
+что и в генетическом поиске.
+"""
+import time
+import logging
+import numpy as np
+
+from survey_route_generation.genetic.genetic_optimal_route_finder import GeneticOptimalRouteFinder
+from survey_route_generation.heuristics.route_seeds_generator import RouteSeedsGenerator
+from survey_route_generation.heuristics.route_local_search import RouteLocalSearch
+
+
+class HeuristicOptimalRouteFinder(GeneticOptimalRouteFinder):
+    def __init__(self,
+                 genetic_algo=None,
+                 *args,
+                 construction_type="all",
+                 local_search_passes=16,
+                 time_budget=None,
+                 **kwargs
+                 ):
+        """
+        Генетический алгоритм не используется,
+        остальные параметры совпадают с параметрами GeneticOptimalRouteFinder.
+
+        :param construction_type: Эвристика построения маршрутов: all, boustrophedon, nearest_neighbor, hilbert.
+        :param local_search_passes: Наибольшее количество проходов локального поиска по каждому маршруту.
+        :param time_budget: Наибольшая длительность улучшения маршрутов, с; None - без ограничения.
+        """
+        super().__init__(genetic_algo, *args, **kwargs)
+
+        self.construction_type = construction_type
+        self.local_search_passes = local_search_passes
+        self.time_budget = time_budget
+
+        self._genotypes_fitness = None
+        self._routes_improved = None
+        self._routes_converged = None
+
+    def _create_route_local_search(self):
+        """
+        Создать локальный поиск улучшений маршрута; в этом поиске он применяется всегда.
+        """
+        self._route_local_search = RouteLocalSearch(
+            self._distance_matrix,
+            self._in_point_distances,
+            self._out_point_distances,
+            self._neighbor_genes,
+            max_passes=self.local_search_passes,
+            epsilon=self.epsilon
+        )
+
+    def _construct_genotypes(self):
+        """
+        Построить маршруты заданной конструктивной эвристикой.
+        """
+        construction_types = None if self.construction_type == "all" else [self.construction_type]
+
+        self._genotypes = RouteSeedsGenerator(
+            self.route_points,
+            self._distance_matrix,
+            self._in_point_distances
+        ).gen(construction_types).astype(self._points_genome.dtype)
+
+    def _improve_genotypes(self):
+        """
+        Улучшить построенные маршруты локальным поиском в пределах отведённого времени.
+        Улучшенный маршрут заменяет исходный, если его приспособленность не ниже исходной.
+        """
+        start_time = time.time()
+        deadline = None if self.time_budget is None else start_time + self.time_budget
+
+        improved_genotypes = self._genotypes.copy()
+        routes_moves = np.zeros(self._genotypes.shape[0], dtype=int)
+        self._routes_converged = np.full(self._genotypes.shape[0], False)
+        for route_index in range(self._genotypes.shape[0]):
+            if deadline is not None and time.time() >= deadline:
+                break
+
+            improved_genotypes[route_index], routes_moves[route_index] = \
+                self._route_local_search.improve(self._genotypes[route_index], deadline)
+            self._routes_converged[route_index] = self._route_local_search.converged
+
+        fitness = self._calc_components_fitness(self._estimate_population_components(self._genotypes))
+        improved_fitness = self._calc_components_fitness(self._estimate_population_components(improved_genotypes))
+        self._routes_improved = (routes_moves > 0) & (improved_fitness >= fitness)
+        self._genotypes[self._routes_improved] = improved_genotypes[self._routes_improved]
+        self._genotypes_fitness = np.where(self._routes_improved, improved_fitness, fitness)
+
+        self.local_search_moves = int(routes_moves[self._routes_improved].sum())
+        self.local_search_improved_routes = int(np.count_nonzero(self._routes_improved))
+        self.local_search_elapsed_time = time.time() - start_time
+        self._keep_data("local_search_ending")
+
+    def _choose_best_genotype(self):
+        """
+        Выбрать наиболее приспособленный маршрут и причину остановки его улучшения.
+        """
+        best_index = int(np.argmax(self._genotypes_fitness))
+
+        self._best_genotype = self._genotypes[best_index]
+        self.best_genotype_fitness = float(self._genotypes_fitness[best_index])
+
+        if not self._routes_improved[best_index]:
+            self.stop_reason = "construction"
+        elif self._routes_converged[best_index]:
+            self.stop_reason = "local_optimum"
+        elif self.time_budget is not None and self.local_search_elapsed_time >= self.time_budget:
+            self.stop_reason = "time_budget"
+        else:
+            self.stop_reason = "max_passes"
+
+    def find(self,
+             route_points,
+             in_point,
+             out_point,
+             keypoint_distance
+             ):
+        """
+        Найти оптимальный маршрут построением и локальным улучшением.
+
+        :param keypoint_distance: Расстояние между ключевыми точками.
+        :param route_points: Точки маршрута, которые надо посетить.
+        :param in_point: Точка входа в зону обследования.
+        :param out_point: Точка выхода из зоны обследования.
+        """
+        self.prepare(route_points, in_point, out_point, keypoint_distance)
+
+        self._keep_data("genotype_search_beginning")
+
+        self._construct_genotypes()
+        self._improve_genotypes()
+        self._choose_best_genotype()
+
+        logging.info("Перестановки локального поиска: \t" + str(self.local_search_moves))
+        logging.info("Причина остановки поиска: \t" + str(self.stop_reason))
+        self._keep_data("genotype_search_ending")
+
+        return self._genotype_to_route(self._best_genotype)
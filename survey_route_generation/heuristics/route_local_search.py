@@ -0,0 +1,203 @@
+"""
+Локальное улучшение маршрута перестановками 2-opt и Or-opt по спискам ближайших соседей.
+Перестановки принимаются по изменению длины маршрута вместе с отрезками от точки входа и до точки выхода.
+"""
+import time
+import numpy as np
+
+
+class RouteLocalSearch:
+    def __init__(self,
+                 distance_matrix,
+                 in_point_distances,
+                 out_point_distances,
+                 neighbor_genes,
+                 max_passes=4,
+                 or_opt_segment_length=3,
+                 epsilon=0.000000001
+                 ):
+        """
+        :param distance_matrix: Матрица расстояний между ключевыми точками.
+        :param in_point_distances: Расстояния от ключевых точек до точки входа.
+        :param out_point_distances: Расстояния от ключевых точек до точки выхода.
+        :param neighbor_genes: Списки ближайших соседей ключевых точек по возрастанию расстояния.
+        :param max_passes: Наибольшее количество проходов по маршруту.
+        :param or_opt_segment_length: Наибольшая длина участка, переносимого перестановкой Or-opt.
+        :param epsilon: Наименьшее сокращение длины, при котором перестановка считается улучшающей.
+        """
+        self.max_passes = max_passes
+        self.or_opt_segment_length = or_opt_segment_length
+        self.epsilon = epsilon
+
+        # Признак того, что последнее улучшение завершилось в локальном оптимуме, а не по ограничениям.
+        self.converged = False
+
+        self._create_nodes_distances(distance_matrix, in_point_distances, out_point_distances)
+        self._create_nodes_neighbors(neighbor_genes, in_point_distances)
+
+    def _create_nodes_distances(self, distance_matrix, in_point_distances, out_point_distances):
+        """
+        Запомнить расстояния между узлами: ключевыми точками, точкой входа и точкой выхода.
+        Матрица расстояний не копируется и может храниться в компактном типе или в отображённом на диск файле.
+        """
+        self._in_node = distance_matrix.shape[0]
+        self._out_node = distance_matrix.shape[0] + 1
+
+        self._distance_matrix = distance_matrix
+        self._in_point_distances = np.asarray(in_point_distances, dtype=np.float64).tolist()
+        self._out_point_distances = np.asarray(out_point_distances, dtype=np.float64).tolist()
+
+    def _calc_nodes_distance(self, node, other_node):
+        """
+        Получить расстояние между узлами. Между точками входа и выхода маршрут не проходит.
+        """
+        if node < self._in_node:
+            if other_node < self._in_node:
+                return self._distance_matrix.item(node, other_node)
+            node, other_node = other_node, node
+
+        if other_node >= self._in_node:
+            return 0.0
+        if node == self._in_node:
+            return self._in_point_distances[other_node]
+
+        return self._out_point_distances[other_node]
+
+    def _create_nodes_neighbors(self, neighbor_genes, in_point_distances):
+        """
+        Составить списки соседей узлов, дополнив их ближайшими к точке входа ключевыми точками.
+        """
+        neighbors_count = len(neighbor_genes[0]) if len(neighbor_genes) > 0 else 0
+        in_point_neighbors = np.argsort(in_point_distances, kind="stable")[:neighbors_count].tolist()
+
+        self._nodes_neighbors = list(neighbor_genes) + [in_point_neighbors]
+
+    def _apply_2opt_pass(self, nodes, positions):
+        """
+        Пройти по рёбрам маршрута, разворачивая участки, если это сокращает его длину.
+        """
+        distance = self._calc_nodes_distance
+        moves = 0
+        for position in range(len(nodes) - 1):
+            node = nodes[position]
+            next_distance = distance(node, nodes[position + 1])
+            previous_distance = distance(node, nodes[position - 1]) if position > 0 else 0
+
+            for neighbor in self._nodes_neighbors[node]:
+                neighbor_distance = distance(node, neighbor)
+                if neighbor_distance >= next_distance and neighbor_distance >= previous_distance:
+                    break
+
+                neighbor_position = positions[neighbor]
+                if neighbor_distance < next_distance and neighbor_position > position + 1:
+                    first_edge, second_edge = position, neighbor_position
+                elif neighbor_distance < previous_distance and neighbor_position < position - 1:
+                    first_edge, second_edge = neighbor_position - 1, position - 1
+                else:
+                    continue
+
+                delta = (distance(nodes[first_edge], nodes[second_edge]) +
+                         distance(nodes[first_edge + 1], nodes[second_edge + 1]) -
+                         distance(nodes[first_edge], nodes[first_edge + 1]) -
+                         distance(nodes[second_edge], nodes[second_edge + 1]))
+                if delta < -self.epsilon:
+                    nodes[first_edge + 1:second_edge + 1] = nodes[first_edge + 1:second_edge + 1][::-1]
+                    for node_position in range(first_edge + 1, second_edge + 1):
+                        positions[nodes[node_position]] = node_position
+                    moves += 1
+                    break
+
+        return moves
+
+    def _find_or_opt_move(self, nodes, positions, start, end):
+        """
+        Найти улучшающий перенос участка маршрута к одному из соседей его первой точки.
+        """
+        distance = self._calc_nodes_distance
+        first, last = nodes[start], nodes[end]
+        removal_gain = (distance(nodes[start - 1], first) + distance(last, nodes[end + 1]) -
+                        distance(nodes[start - 1], nodes[end + 1]))
+        if removal_gain <= self.epsilon:
+            return None
+
+        for neighbor in self._nodes_neighbors[first]:
+            if distance(first, neighbor) >= removal_gain:
+                break
+
+            neighbor_position = positions[neighbor]
+            if start <= neighbor_position <= end:
+                continue
+
+            # Первая точка участка встаёт рядом с соседом: после него или, развёрнутым участком, перед ним.
+            for edge, edge_start, edge_end in [(neighbor_position, first, last), (neighbor_position - 1, last, first)]:
+                if edge < 0 or edge + 1 >= len(nodes) or start - 1 <= edge <= end:
+                    continue
+
+                insertion_cost = (distance(nodes[edge], edge_start) + distance(edge_end, nodes[edge + 1]) -
+                                  distance(nodes[edge], nodes[edge + 1]))
+                if insertion_cost - removal_gain < -self.epsilon:
+                    return edge, edge_start != first
+
+        return None
+
+    def _apply_or_opt_pass(self, nodes, positions):
+        """
+        Пройти по маршруту, перенося короткие участки ближе к соседям, если это сокращает его длину.
+        """
+        moves = 0
+        start = 1
+        while start < len(nodes) - 1:
+            for length in range(1, self.or_opt_segment_length + 1):
+                end = start + length - 1
+                if end > len(nodes) - 2:
+                    break
+
+                move = self._find_or_opt_move(nodes, positions, start, end)
+                if move is None:
+                    continue
+
+                edge, reverse = move
+                segment = nodes[start:end + 1]
+                if reverse:
+                    segment.reverse()
+
+                rest_nodes = nodes[:start] + nodes[end + 1:]
+                insert_position = edge + 1 if edge < start else edge - length + 1
+                nodes[:] = rest_nodes[:insert_position] + segment + rest_nodes[insert_position:]
+                for node_position, node in enumerate(nodes):
+                    positions[node] = node_position
+
+                moves += 1
+                break
+
+            start += 1
+
+        return moves
+
+    def improve(self, route, deadline=None):
+        """
+        Улучшить маршрут перестановками 2-opt и Or-opt.
+
+        :param route: Генотип маршрута.
+        :param deadline: Момент времени, после которого новые проходы не начинаются.
+        :return: Улучшенный генотип и количество выполненных перестановок.
+        """
+        nodes = [self._in_node] + route.tolist() + [self._out_node]
+        positions = [0] * len(nodes)
+        for node_position, node in enumerate(nodes):
+            positions[node] = node_position
+
+        moves = 0
+        self.converged = False
+        for _ in range(self.max_passes):
+            pass_moves = self._apply_2opt_pass(nodes, positions)
+            pass_moves += self._apply_or_opt_pass(nodes, positions)
+            moves += pass_moves
+
+            if pass_moves == 0:
+                self.converged = True
+                break
+            if deadline is not None and time.time() >= deadline:
+                break
+
+        return np.array(nodes[1:-1], dtype=route.dtype), moves
@@ -0,0 +1,122 @@
+"""
+Построение начальных маршрутов конструктивными эвристиками: обходом сетки змейкой,
+жадным обходом ближайших точек и обходом по кривой Гильберта.
+"""
+import math
+import numpy as np
+
+
+class RouteSeedsGenerator:
+    def __init__(self, route_points, distance_matrix, in_point_distances):
+        """
+        :param route_points: Ключевые точки маршрута, лежащие в узлах сетки.
+        :param distance_matrix: Матрица расстояний между ключевыми точками.
+        :param in_point_distances: Расстояния от ключевых точек до точки входа.
+        """
+        self.route_points = route_points
+        self.distance_matrix = distance_matrix
+        self.in_point_distances = in_point_distances
+
+    def _calc_grid_indexes(self):
+        """
+        Определить номера строки (широты) и столбца (долготы) сетки для каждой ключевой точки.
+        """
+        _, self._rows = np.unique(self.route_points[:, 0], return_inverse=True)
+        _, self._cols = np.unique(self.route_points[:, 1], return_inverse=True)
+
+    @staticmethod
+    def _gen_boustrophedon_route(major, minor, major_reverse, minor_reverse):
+        """
+        Упорядочить точки змейкой: по возрастанию основного номера сетки,
+        чередуя направление обхода по второму номеру.
+        """
+        major_key = -major if major_reverse else major
+        ranks = np.unique(major_key, return_inverse=True)[1]
+        minor_key = np.where((ranks % 2 == 0) != minor_reverse, minor, -minor)
+
+        return np.lexsort((minor_key, major_key))
+
+    def _gen_boustrophedon_routes(self):
+        """
+        Построить обходы змейкой по строкам и по столбцам сетки во всех восьми ориентациях.
+        """
+        routes = []
+        for major, minor in [(self._rows, self._cols), (self._cols, self._rows)]:
+            for major_reverse in [False, True]:
+                for minor_reverse in [False, True]:
+                    routes.append(self._gen_boustrophedon_route(major, minor, major_reverse, minor_reverse))
+
+        return routes
+
+    def _gen_nearest_neighbor_route(self):
+        """
+        Построить жадный обход: от точки, ближайшей к точке входа, каждый раз к ближайшей непосещённой точке.
+        """
+        points_count = self.route_points.shape[0]
+        visited = np.full(points_count, False)
+
+        route = np.empty(points_count, dtype=np.intp)
+        route[0] = np.argmin(self.in_point_distances)
+        for position in range(1, points_count):
+            visited[route[position - 1]] = True
+            route[position] = np.argmin(np.where(visited, np.inf, self.distance_matrix[route[position - 1]]))
+
+        return route
+
+    @staticmethod
+    def _calc_hilbert_indexes(xs, ys, order):
+        """
+        Вычислить номера узлов квадратной сетки стороной 2^order вдоль кривой Гильберта.
+        """
+        side = 1 << order
+        xs = xs.astype(np.int64)
+        ys = ys.astype(np.int64)
+        indexes = np.zeros(xs.shape[0], dtype=np.int64)
+
+        step = side >> 1
+        while step > 0:
+            rx = (xs & step) > 0
+            ry = (ys & step) > 0
+            indexes += step * step * ((3 * rx.astype(np.int64)) ^ ry.astype(np.int64))
+
+            flip = ~ry & rx
+            xs = np.where(flip, side - 1 - xs, xs)
+            ys = np.where(flip, side - 1 - ys, ys)
+            xs, ys = np.where(~ry, ys, xs), np.where(~ry, xs, ys)
+
+            step >>= 1
+
+        return indexes
+
+    def _gen_hilbert_routes(self):
+        """
+        Построить обходы точек вдоль кривой Гильберта в прямом и обратном направлениях.
+        """
+        side = max(int(self._rows.max()), int(self._cols.max())) + 1
+        order = max(math.ceil(math.log2(side)), 1)
+
+        route = np.argsort(self._calc_hilbert_indexes(self._cols, self._rows, order), kind="stable")
+
+        return [route, route[::-1]]
+
+    def gen(self, construction_types=None):
+        """
+        Построить маршруты заданными эвристиками.
+
+        :param construction_types: Список эвристик: boustrophedon, nearest_neighbor, hilbert; если не задан - все.
+        :return: Матрица генотипов без повторов.
+        """
+        if construction_types is None:
+            construction_types = ["boustrophedon", "nearest_neighbor", "hilbert"]
+
+        self._calc_grid_indexes()
+
+        routes = []
+        if "boustrophedon" in construction_types:
+            routes.extend(self._gen_boustrophedon_routes())
+        if "nearest_neighbor" in construction_types:
+            routes.append(self._gen_nearest_neighbor_route())
+        if "hilbert" in construction_types:
+            routes.extend(self._gen_hilbert_routes())
+
+        return np.unique(np.array(routes), axis=0)
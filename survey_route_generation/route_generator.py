@@ -1,118 +1,107 @@
 """
 Создание и оптимизация маршрута обследования заданной зоны.
 """
-import numpy as np
-import logging
-from survey_route_generation.geo.grid_keyponts_generator import RectangleGridKeypointsGenerator
-from survey_route_generation.geo.polygon_nearest_point_to_point import PolygonNearestPointToPoint
-from survey_route_generation.geo.geo import gen_borders
-from shapely.geometry import Point, Polygon
+from survey_route_generation.survey_problem import SurveyProblem
 
 
 class RouteGenerator:
-    def __init__(self, genetic_optimal_route_finder):
-        self.genetic_optimal_route_finder = genetic_optimal_route_finder
+    def __init__(self, optimal_route_finder):
+        """
+        :param optimal_route_finder: Поисковик оптимального маршрута: генетический, островной или эвристический.
+        """
+        self.optimal_route_finder = optimal_route_finder
 
         self.vehicle_data = None
         self.mission_settings = None
         self.survey_area_points = None
+        self.survey_problem = None
 
-    def _filter_keypoints(self):
+    def _set_survey_problem(self, survey_problem):
         """
-        Отфильтровать ключевые точки, оставив только точки, доступные для полёта.
+        Запомнить подготовленную задачу обследования зоны.
         """
-        polygon = Polygon(self.survey_area_points)
-
-        inside_points = []
-        for key_point in self._grid_keypoints:
-            point = Point(key_point[0], key_point[1])
-            if polygon.contains(point):
-                inside_points.append(key_point)
-
-        self._inside_grid_key_points = np.array(inside_points)
+        self.survey_problem = survey_problem
+        self.vehicle_data = survey_problem.vehicle_data
+        self.mission_settings = survey_problem.mission_settings
+        self.survey_area_points = survey_problem.survey_area_points
 
-        logging.info("Количество ключевых точек в маршруте: \t" + str(self._inside_grid_key_points.shape[0]))
-
-    def _gen_keypoint_grid(self):
+    def _read_search_result(self):
         """
-        Сгенерировать сетку ключевых точек зоны обследования.
+        Прочитать показатели найденного маршрута.
         """
-        generator = RectangleGridKeypointsGenerator(self._area_borders, self._keypoint_distance)
-        self._grid_keypoints = generator.gen()
-        logging.info("Количество ключевых точек в начальной сетке: \t" + str(self._grid_keypoints.shape[0]))
+        self.route_fitness = self.optimal_route_finder.best_genotype_fitness
+        self.route_hash = self.optimal_route_finder.best_genotype_hash
+        self.stop_reason = self.optimal_route_finder.stop_reason
 
-    def _calc_keypoint_distance(self):
+    def _find_optimal_route(self):
         """
-        Вычислить расстояние между ключевыми точками.
+        Найти оптимальный маршрут обследования.
         """
-        self._keypoint_distance = self.vehicle_data.vision_width * (1 - 0.05)
-        logging.info("Расстояние между парой ключевых точек: \t" + str(self._keypoint_distance))
+        self.optimal_route = self.optimal_route_finder.find_problem(self.survey_problem)
+        self._read_search_result()
 
-    def _gen_area_borders(self):
-        self._area_borders = gen_borders(self.survey_area_points)
-        logging.info("Границы описанного прямоугольника зоны обследования: \t" + str(self._area_borders))
+    def _gen_route_result(self):
+        """
+        Сформировать результат составления маршрута.
+        """
+        return {
+            "in_point": self.survey_problem.in_point,
+            "route": self.optimal_route,
+            "route_fitness": self.route_fitness,
+            "route_hash": self.route_hash,
+            "stop_reason": self.stop_reason,
+            "out_point": self.survey_problem.out_point
+        }
 
-    def _choose_in_point(self):
+    def solve(self, survey_problem):
         """
-        Выбрать точку влёта в зону обследования.
+        Составить маршрут обследования по подготовленной задаче.
+
+        :param survey_problem: Подготовленная задача обследования зоны.
         """
-        p = PolygonNearestPointToPoint(self.survey_area_points, self.mission_settings.start_point)
-        self._area_in_point = p.find()
-        logging.info("Точка входа в зону обследования: \t" + str(self._area_in_point))
+        self._set_survey_problem(survey_problem)
+        self._find_optimal_route()
 
-    def _choose_out_point(self):
+        return self._gen_route_result()
+
+    def start_solving(self, survey_problem):
         """
-        Выбрать точку вылета из зоны обследования.
+        Начать пошаговое составление маршрута по подготовленной задаче: создать первую популяцию.
+        Доступно для поисковиков с пошаговым поиском.
+
+        :param survey_problem: Подготовленная задача обследования зоны.
         """
-        p = PolygonNearestPointToPoint(self.survey_area_points, self.mission_settings.end_point)
-        self._area_out_point = p.find()
-        logging.info("Точка выхода из зоны обследования: \t" + str(self._area_out_point))
+        self._set_survey_problem(survey_problem)
 
-    def _find_optimal_route(self):
+        self.optimal_route_finder.prepare_problem(survey_problem)
+        self.optimal_route_finder.start_search()
+
+    def continue_solving(self, lifecycles):
         """
-        Найти оптимальный маршрут обследования.
+        Продолжить составление маршрута на заданное количество жизненных циклов.
+        Вернуть признак возможности его продолжения.
         """
-        self.optimal_route = self.genetic_optimal_route_finder.find(
-            self._inside_grid_key_points,
-            self._area_in_point,
-            self._area_out_point,
-            self._keypoint_distance
-        )
-        self.route_fitness = self.genetic_optimal_route_finder.best_genotype_fitness
-        self.route_hash = self.genetic_optimal_route_finder.best_genotype_hash
+        return self.optimal_route_finder.continue_search(lifecycles)
 
-    def _gen_keypoints(self):
+    def estimate_solving(self):
         """
-        Сгенерировать ключевые точки маршрута, покрывающие область обследования.
+        Оценить приспособленность наилучшего маршрута, найденного к текущему жизненному циклу.
         """
-        self._gen_area_borders()
-        self._calc_keypoint_distance()
-        self._gen_keypoint_grid()
-        self._filter_keypoints()
+        _genotypes, genotypes_fitness = self.optimal_route_finder.genetic_algo.choose_best_genotypes(1)
+
+        return float(genotypes_fitness[0])
 
-    def _choose_in_out_points(self):
+    def finish_solving(self):
         """
-        Выбрать точки влёта и вылета из зоны обследования.
+        Завершить пошаговое составление маршрута.
         """
-        self._choose_in_point()
-        self._choose_out_point()
+        self.optimal_route = self.optimal_route_finder.finish_search()
+        self._read_search_result()
+
+        return self._gen_route_result()
 
     def generate_route(self, vehicle_data, mission_settings, survey_area_points):
         """
         Составить маршрут обследования зоны.
         """
-        self.vehicle_data = vehicle_data
-        self.mission_settings = mission_settings
-        self.survey_area_points = survey_area_points
-
-        self._choose_in_out_points()
-        self._gen_keypoints()
-        self._find_optimal_route()
-
-        return {
-            "in_point": self._area_in_point,
-            "route": self.optimal_route,
-            "route_fitness": self.route_fitness,
-            "route_hash": self.route_hash,
-            "out_point": self._area_out_point
-        }
+        return self.solve(SurveyProblem(vehicle_data, mission_settings, survey_area_points).prepare())
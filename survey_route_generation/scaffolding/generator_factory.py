@@ -31,3 +31,148 @@ def tune_generator_factory(generator_factory):
     generator_factory.route_self_intersection_weight = settings.route_self_intersection_weight
     # Применять ли к генотипам правило "ближайших точек"
     generator_factory.repair_route_genotypes = settings.repair_route_genotypes
+    # Оценивать ли приспособленность всей популяции за один векторизованный проход
+    generator_factory.batch_fitness_estimation = settings.get(
+        "batch_fitness_estimation",
+        generator_factory.batch_fitness_estimation
+    )
+    # Количество генотипов в кэше составляющих приспособленности
+    generator_factory.fitness_cache_size = settings.get(
+        "fitness_cache_size",
+        generator_factory.fitness_cache_size
+    )
+    # Способ скрещивания генотипов: first_unused, order
+    generator_factory.crossing_type = settings.get(
+        "crossing_type",
+        generator_factory.crossing_type
+    )
+    # Количество процессов параллельной оценки приспособленности; 0 - оценка в основном процессе
+    generator_factory.fitness_workers_count = settings.get(
+        "fitness_workers_count",
+        generator_factory.fitness_workers_count
+    )
+    # Тип поисковика оптимального маршрута: genetic, island, heuristic, decomposition
+    generator_factory.route_finder_type = settings.get(
+        "route_finder_type",
+        generator_factory.route_finder_type
+    )
+    # Количество островов островной модели
+    generator_factory.islands_count = settings.get(
+        "islands_count",
+        generator_factory.islands_count
+    )
+    # Изменения настроек генетического алгоритма для островов
+    generator_factory.islands_settings = settings.get(
+        "islands_settings",
+        generator_factory.islands_settings
+    )
+    # Количество жизненных циклов между миграциями
+    generator_factory.migration_interval = settings.get(
+        "migration_interval",
+        generator_factory.migration_interval
+    )
+    # Количество генотипов, принимаемых островом при миграции
+    generator_factory.migrants_count = settings.get(
+        "migrants_count",
+        generator_factory.migrants_count
+    )
+    # Топология миграции: ring, all
+    generator_factory.migration_topology = settings.get(
+        "migration_topology",
+        generator_factory.migration_topology
+    )
+    # Количество жизненных циклов без улучшения лучшей приспособленности до остановки эволюции
+    generator_factory.stagnation_lifecycles = settings.get(
+        "stagnation_lifecycles",
+        generator_factory.stagnation_lifecycles
+    )
+    # Наименьший относительный прирост лучшей приспособленности за окно жизненных циклов
+    generator_factory.min_relative_improvement = settings.get(
+        "min_relative_improvement",
+        generator_factory.min_relative_improvement
+    )
+    # Количество жизненных циклов окна относительного прироста
+    generator_factory.improvement_window = settings.get(
+        "improvement_window",
+        generator_factory.improvement_window
+    )
+    # Наибольшая длительность эволюции, с
+    generator_factory.time_budget = settings.get(
+        "time_budget",
+        generator_factory.time_budget
+    )
+    # Приспособленность, по достижении которой эволюция останавливается
+    generator_factory.target_fitness = settings.get(
+        "target_fitness",
+        generator_factory.target_fitness
+    )
+    # Доля первой популяции, заполняемая маршрутами конструктивных эвристик
+    generator_factory.seeding_rate = settings.get(
+        "seeding_rate",
+        generator_factory.seeding_rate
+    )
+    # Улучшать ли генотипы локальным поиском 2-opt и Or-opt
+    generator_factory.local_search = settings.get(
+        "local_search",
+        generator_factory.local_search
+    )
+    # Генотипы, улучшаемые локальным поиском: children, top
+    generator_factory.local_search_scope = settings.get(
+        "local_search_scope",
+        generator_factory.local_search_scope
+    )
+    # Количество лучших выживших, улучшаемых локальным поиском
+    generator_factory.local_search_top_count = settings.get(
+        "local_search_top_count",
+        generator_factory.local_search_top_count
+    )
+    # Наибольшая длительность локального поиска за жизненный цикл, с
+    generator_factory.local_search_time_cap = settings.get(
+        "local_search_time_cap",
+        generator_factory.local_search_time_cap
+    )
+    # Эвристика построения маршрутов эвристического поиска: all, boustrophedon, nearest_neighbor, hilbert
+    generator_factory.heuristic_construction_type = settings.get(
+        "heuristic_construction_type",
+        generator_factory.heuristic_construction_type
+    )
+    # Наибольшее количество проходов локального поиска эвристического поиска
+    generator_factory.heuristic_local_search_passes = settings.get(
+        "heuristic_local_search_passes",
+        generator_factory.heuristic_local_search_passes
+    )
+    # Наибольшее количество ключевых точек в кластере поиска декомпозицией
+    generator_factory.decomposition_cluster_size = settings.get(
+        "decomposition_cluster_size",
+        generator_factory.decomposition_cluster_size
+    )
+    # Способ разбиения ключевых точек на кластеры: grid, kmeans
+    generator_factory.decomposition_clustering_type = settings.get(
+        "decomposition_clustering_type",
+        generator_factory.decomposition_clustering_type
+    )
+    # Поисковик маршрутов кластеров: genetic, heuristic
+    generator_factory.decomposition_cluster_finder_type = settings.get(
+        "decomposition_cluster_finder_type",
+        generator_factory.decomposition_cluster_finder_type
+    )
+    # Количество процессов для параллельного поиска маршрутов кластеров; 0 - без пула
+    generator_factory.decomposition_workers_count = settings.get(
+        "decomposition_workers_count",
+        generator_factory.decomposition_workers_count
+    )
+    # Хранить ли генотипы в int16/int32, а матрицу расстояний - в float32
+    generator_factory.compact_dtypes = settings.get(
+        "compact_dtypes",
+        generator_factory.compact_dtypes
+    )
+    # Количество ключевых точек, начиная с которого матрица расстояний хранится в файле на диске; null - в памяти
+    generator_factory.distance_matrix_memmap_threshold = settings.get(
+        "distance_matrix_memmap_threshold",
+        generator_factory.distance_matrix_memmap_threshold
+    )
+    # Каталог файла матрицы расстояний; null - системный временный каталог
+    generator_factory.distance_matrix_memmap_dir = settings.get(
+        "distance_matrix_memmap_dir",
+        generator_factory.distance_matrix_memmap_dir
+    )
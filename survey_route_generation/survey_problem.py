@@ -0,0 +1,120 @@
+"""
+Подготовленная задача обследования зоны: точки входа и выхода, ключевые точки и расстояние между ними.
+Задача не зависит от параметров поиска маршрута, поэтому её геометрия строится один раз
+и переиспользуется всеми поисками по ней, в том числе через кэш массивов поисковика.
+"""
+import numpy as np
+import logging
+from survey_route_generation.geo.grid_keyponts_generator import RectangleGridKeypointsGenerator
+from survey_route_generation.geo.polygon_nearest_point_to_point import PolygonNearestPointToPoint
+from survey_route_generation.geo.geo import gen_borders
+from shapely.geometry import Point, Polygon
+
+
+class SurveyProblem:
+    def __init__(self, vehicle_data, mission_settings, survey_area_points):
+        """
+        :param vehicle_data: Данные БПЛА.
+        :param mission_settings: Данные полётной миссии.
+        :param survey_area_points: Точки зоны обследования.
+        """
+        self.vehicle_data = vehicle_data
+        self.mission_settings = mission_settings
+        self.survey_area_points = survey_area_points
+
+        self.in_point = None
+        self.out_point = None
+        self.route_points = None
+        self.keypoint_distance = None
+
+        self._cached_data = {}
+
+    def _filter_keypoints(self):
+        """
+        Отфильтровать ключевые точки, оставив только точки, доступные для полёта.
+        """
+        polygon = Polygon(self.survey_area_points)
+
+        inside_points = []
+        for key_point in self._grid_keypoints:
+            point = Point(key_point[0], key_point[1])
+            if polygon.contains(point):
+                inside_points.append(key_point)
+
+        self.route_points = np.array(inside_points)
+
+        logging.info("Количество ключевых точек в маршруте: \t" + str(self.route_points.shape[0]))
+
+    def _gen_keypoint_grid(self):
+        """
+        Сгенерировать сетку ключевых точек зоны обследования.
+        """
+        generator = RectangleGridKeypointsGenerator(self._area_borders, self.keypoint_distance)
+        self._grid_keypoints = generator.gen()
+        logging.info("Количество ключевых точек в начальной сетке: \t" + str(self._grid_keypoints.shape[0]))
+
+    def _calc_keypoint_distance(self):
+        """
+        Вычислить расстояние между ключевыми точками.
+        """
+        self.keypoint_distance = self.vehicle_data.vision_width * (1 - 0.05)
+        logging.info("Расстояние между парой ключевых точек: \t" + str(self.keypoint_distance))
+
+    def _gen_area_borders(self):
+        self._area_borders = gen_borders(self.survey_area_points)
+        logging.info("Границы описанного прямоугольника зоны обследования: \t" + str(self._area_borders))
+
+    def _choose_in_point(self):
+        """
+        Выбрать точку влёта в зону обследования.
+        """
+        p = PolygonNearestPointToPoint(self.survey_area_points, self.mission_settings.start_point)
+        self.in_point = p.find()
+        logging.info("Точка входа в зону обследования: \t" + str(self.in_point))
+
+    def _choose_out_point(self):
+        """
+        Выбрать точку вылета из зоны обследования.
+        """
+        p = PolygonNearestPointToPoint(self.survey_area_points, self.mission_settings.end_point)
+        self.out_point = p.find()
+        logging.info("Точка выхода из зоны обследования: \t" + str(self.out_point))
+
+    def _gen_keypoints(self):
+        """
+        Сгенерировать ключевые точки маршрута, покрывающие область обследования.
+        """
+        self._gen_area_borders()
+        self._calc_keypoint_distance()
+        self._gen_keypoint_grid()
+        self._filter_keypoints()
+
+    def _choose_in_out_points(self):
+        """
+        Выбрать точки влёта и вылета из зоны обследования.
+        """
+        self._choose_in_point()
+        self._choose_out_point()
+
+    def prepare(self):
+        """
+        Построить геометрию задачи: точки входа и выхода и ключевые точки маршрута.
+        """
+        self._cached_data = {}
+
+        self._choose_in_out_points()
+        self._gen_keypoints()
+
+        return self
+
+    def get_cached_data(self, key, create_func):
+        """
+        Получить данные задачи, вычисленные поисковиком маршрута, создав их при первом обращении.
+
+        :param key: Ключ данных, включающий параметры, от которых они зависят.
+        :param create_func: Функция создания данных.
+        """
+        if key not in self._cached_data:
+            self._cached_data[key] = create_func()
+
+        return self._cached_data[key]
@@ -0,0 +1,189 @@
+"""
+Сквозная проверка распределённого перебора: координатор на локальном адресе, три исполнителя,
+один из которых аварийно завершается во время обработки комбинации.
+"""
+import os
+import json
+import time
+import random
+import signal
+import socket
+import threading
+import multiprocessing
+import numpy as np
+
+from survey_route_generation.combinator import combinator as combinator_module
+from survey_route_generation.combinator.combinator import Combinator
+from survey_route_generation.combinator.combinations_journal import CombinationsJournal
+from survey_route_generation.combinator.distributed_combinator import DistributedCombinator, run_combinations_worker
+from survey_route_generation.data.data_keeper import DataKeeper
+from survey_route_generation.data.mission_settings import MissionSettings
+from survey_route_generation.data.vehicle_data import VehicleData
+from survey_route_generation.factories.route_generator_factory import RouteGeneratorFactory
+
+AREA_SETTINGS_FILE = os.path.join(os.path.dirname(__file__), "..", "areas", "settings_odessa.json")
+
+PARAMS_RANGES = {
+    "population_size": [64],
+    "selection_rate": [0.4, 0.5, 0.6],
+    "parents_count": [2],
+    "mutants_rate": [0],
+    "parents_choice_type": ["panmixia", "inbreeding"],
+    "parents_similarity_type": ["fitness"],
+    "mutation_swap_value": [0.01, 0.05],
+    "route_distance_weight": [1],
+    "route_turns_angle_weight": [1],
+    "route_self_intersection_weight": [1],
+    "repair_route_genotypes": [False, True]
+}
+
+TOP_SIZE = 5
+SEED = 7
+AUTHKEY = b"test-distributed-combinator"
+HEARTBEAT_INTERVAL = 0.5
+HEARTBEAT_TIMEOUT = 2
+
+
+def _gen_combinator_args(save_dir):
+    """
+    Сформировать аргументы комбинатора: фабрику, диапазоны параметров, данные миссии и хранитель данных.
+    """
+    with open(AREA_SETTINGS_FILE, encoding="utf-8") as file:
+        area_settings = json.load(file)
+
+    data_keeper = DataKeeper(str(save_dir))
+
+    factory = RouteGeneratorFactory()
+    factory.max_lifecycles = 8
+    factory.data_keep_func = data_keeper.keep
+
+    return (
+        factory,
+        PARAMS_RANGES,
+        VehicleData(area_settings["vision_width"]),
+        MissionSettings(area_settings["start_point"], area_settings["end_point"]),
+        np.array(area_settings["survey_area_points"]),
+        data_keeper
+    )
+
+
+def _describe_top(combinator):
+    """
+    Описать список лучших: приспособленность, хэш маршрута и комбинация параметров.
+    """
+    return [
+        (summary["route_fitness"], summary["route_hash"], CombinationsJournal.gen_combination_key(summary["combination"]))
+        for summary in combinator.get_top_results()
+    ]
+
+
+def _find_free_port():
+    """
+    Найти свободный порт локального адреса.
+    """
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _wait_for(condition, timeout=60):
+    """
+    Дождаться выполнения условия.
+    """
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "Условие не выполнено за отведённое время"
+        time.sleep(0.01)
+
+
+def _run_pool_sweep(save_dir):
+    """
+    Выполнить перебор в пуле процессов и вернуть описание списка лучших.
+    """
+    combinator = Combinator(*_gen_combinator_args(save_dir), top_size=TOP_SIZE, workers_count=2)
+
+    random.seed(SEED)
+    np.random.seed(SEED)
+    combinator.combine()
+
+    return _describe_top(combinator)
+
+
+def _start_worker(address, worker_id):
+    """
+    Запустить процесс исполнителя.
+    """
+    process = multiprocessing.Process(
+        target=run_combinations_worker,
+        args=(address, AUTHKEY),
+        kwargs={"worker_id": worker_id, "heartbeat_interval": HEARTBEAT_INTERVAL, "poll_interval": 0.1}
+    )
+    process.start()
+
+    return process
+
+
+def test_distributed_sweep_survives_killed_worker(tmp_path, monkeypatch):
+    monkeypatch.setattr(combinator_module, "cls", lambda: None)
+    signal_handlers = {signum: signal.getsignal(signum) for signum in (signal.SIGINT, signal.SIGTERM)}
+
+    try:
+        pool_top = _run_pool_sweep(tmp_path / "pool")
+
+        address = ("127.0.0.1", _find_free_port())
+        journal_file = str(tmp_path / "distributed" / "journal.jsonl")
+        coordinator = DistributedCombinator(
+            *_gen_combinator_args(tmp_path / "distributed"),
+            top_size=TOP_SIZE,
+            journal=CombinationsJournal(journal_file),
+            address=address,
+            authkey=AUTHKEY,
+            heartbeat_interval=HEARTBEAT_INTERVAL,
+            heartbeat_timeout=HEARTBEAT_TIMEOUT
+        )
+
+        random.seed(SEED)
+        np.random.seed(SEED)
+
+        errors = []
+
+        def combine():
+            try:
+                coordinator.combine()
+            except Exception as error:
+                errors.append(error)
+
+        coordinator_thread = threading.Thread(target=combine, daemon=True)
+        coordinator_thread.start()
+        _wait_for(lambda: coordinator._server is not None or len(errors) > 0)
+        assert errors == []
+
+        workers = [_start_worker(address, "worker-" + str(worker_index)) for worker_index in range(3)]
+        try:
+            # Исполнитель завершается аварийно, пока за ним числится взятая комбинация
+            dispatcher = coordinator._dispatcher
+            _wait_for(lambda: "worker-0" in dispatcher._assigned_tasks.values())
+            workers[0].kill()
+
+            coordinator_thread.join(timeout=300)
+            assert not coordinator_thread.is_alive()
+            assert errors == []
+        finally:
+            for worker in workers:
+                worker.join(timeout=30)
+                if worker.is_alive():
+                    worker.kill()
+    finally:
+        for signum, handler in signal_handlers.items():
+            signal.signal(signum, handler)
+
+    assert dispatcher.requeued_tasks_count > 0
+
+    journaled_keys = [
+        CombinationsJournal.gen_combination_key(entry["combination"])
+        for entry in CombinationsJournal(journal_file).read()
+    ]
+    assert len(journaled_keys) == coordinator.combinations_amount
+    assert len(set(journaled_keys)) == len(journaled_keys)
+
+    assert _describe_top(coordinator) == pool_top
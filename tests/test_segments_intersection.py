@@ -0,0 +1,136 @@
+"""
+Проверка подсчёта самопересечений маршрутов: количества должны совпадать с подсчётом по предикату crosses
+библиотеки Shapely для всех пар отрезков маршрута, как при переборе и векторном ядре, так и при пространственном хеше.
+"""
+import os
+import json
+import numpy as np
+import pytest
+from shapely.geometry import LineString
+
+from survey_route_generation.data.mission_settings import MissionSettings
+from survey_route_generation.data.vehicle_data import VehicleData
+from survey_route_generation.geo.segments_intersection import SegmentsIntersectionCounter
+from survey_route_generation.survey_problem import SurveyProblem
+
+AREAS_DIR = os.path.join(os.path.dirname(__file__), "..", "areas")
+AREAS = ["gdynia", "novorossiysk", "odessa", "pionerskiy"]
+
+
+def _count_crosses_by_shapely(points, route):
+    """
+    Посчитать самопересечения маршрута по предикату crosses для каждой пары его отрезков.
+    """
+    lines = [LineString([points[start], points[end]]) for start, end in zip(route[:-1], route[1:])]
+
+    return sum(
+        lines[first_index].crosses(lines[second_index])
+        for first_index in range(len(lines))
+        for second_index in range(first_index + 1, len(lines))
+    )
+
+
+def _gen_near_sorted_routes(points, rng, routes_count, swaps_count):
+    """
+    Сгенерировать маршруты обхода точек по строкам с несколькими случайными перестановками соседних точек.
+    Такие маршруты мало пересекаются сами с собой, и пространственный хеш отсекает большинство пар отрезков.
+    """
+    sorted_route = np.lexsort((points[:, 1], np.round(points[:, 0], 6)))
+
+    routes = []
+    for _ in range(routes_count):
+        route = sorted_route.copy()
+        for position in rng.integers(0, route.shape[0] - 1, size=swaps_count):
+            route[position], route[position + 1] = route[position + 1], route[position]
+        routes.append(route)
+
+    return np.array(routes)
+
+
+def _gen_grid_points(side):
+    """
+    Сгенерировать целочисленную сетку точек: много троек на одной прямой, касающихся и накладывающихся отрезков.
+    """
+    rows, cols = np.meshgrid(np.arange(side), np.arange(side), indexing="ij")
+
+    return np.stack([rows.ravel(), cols.ravel()], axis=1).astype(np.float64)
+
+
+def _assert_counts_match_shapely(points, population):
+    """
+    Сравнить количества самопересечений маршрутов популяции с подсчётом по Shapely.
+    """
+    counter = SegmentsIntersectionCounter(points)
+    expected = [_count_crosses_by_shapely(points, route) for route in population]
+
+    assert counter.count_population(population).tolist() == expected
+    assert [counter.count(route) for route in population] == expected
+
+
+def _is_grid_route(points, route):
+    """
+    Проверить, считается ли маршрут с помощью пространственного хеша.
+    """
+    counter = SegmentsIntersectionCounter(points)
+
+    return route.shape[0] - 1 >= counter.grid_segments_threshold and \
+        counter._gen_grid_segment_pairs(points[route]) is not None
+
+
+def test_kernel_matches_shapely_on_random_routes():
+    rng = np.random.default_rng(0)
+    points = rng.random((60, 2))
+    population = np.array([rng.permutation(points.shape[0]) for _ in range(8)])
+
+    _assert_counts_match_shapely(points, population)
+
+
+def test_kernel_matches_shapely_on_collinear_and_touching_segments():
+    rng = np.random.default_rng(1)
+    points = _gen_grid_points(6)
+    population = np.concatenate([
+        np.array([rng.permutation(points.shape[0]) for _ in range(8)]),
+        _gen_near_sorted_routes(points, rng, 4, 6)
+    ])
+
+    _assert_counts_match_shapely(points, population)
+
+
+def test_spatial_hash_matches_shapely_on_collinear_and_touching_segments():
+    rng = np.random.default_rng(2)
+    points = _gen_grid_points(17)
+    population = _gen_near_sorted_routes(points, rng, 3, 120)
+
+    assert all(_is_grid_route(points, route) for route in population)
+    _assert_counts_match_shapely(points, population)
+
+
+def test_spatial_hash_matches_shapely_on_random_points():
+    rng = np.random.default_rng(3)
+    points = rng.random((300, 2))
+    population = _gen_near_sorted_routes(points, rng, 3, 60)
+
+    assert all(_is_grid_route(points, route) for route in population)
+    _assert_counts_match_shapely(points, population)
+
+
+@pytest.mark.parametrize("area", AREAS)
+@pytest.mark.parametrize("vision_width_divisor", [1, 4])
+def test_counts_match_shapely_on_area_samples(area, vision_width_divisor):
+    with open(os.path.join(AREAS_DIR, "settings_" + area + ".json"), encoding="utf-8") as file:
+        area_settings = json.load(file)
+
+    survey_problem = SurveyProblem(
+        VehicleData(area_settings["vision_width"] / vision_width_divisor),
+        MissionSettings(area_settings["start_point"], area_settings["end_point"]),
+        np.array(area_settings["survey_area_points"])
+    ).prepare()
+    points = survey_problem.route_points
+
+    rng = np.random.default_rng(4)
+    population = np.concatenate([
+        np.array([rng.permutation(points.shape[0]) for _ in range(2)]),
+        _gen_near_sorted_routes(points, rng, 2, points.shape[0] // 10)
+    ])
+
+    _assert_counts_match_shapely(points, population)